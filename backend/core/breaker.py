@@ -0,0 +1,135 @@
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+import httpx
+from backend.core import metrics
+from backend.core.scheduler import Overloaded, is_upstream_failure
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Overloaded):
+    """The upstream is failing; calls are refused at once instead of timing out."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(503, "Upstream unavailable (circuit open)", retry_after)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over the outcomes of recent upstream calls.
+
+    Closed: calls pass; once at least ``min_calls`` of the last ``window`` have
+    finished and ``failure_rate`` of them failed (5xx, timeouts, connection
+    errors), the circuit opens. Open: calls fail fast with CircuitOpen for
+    ``open_seconds``. Half-open: up to ``probes`` trial calls pass; a success
+    closes the circuit, a failure opens it again.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int,
+        min_calls: int,
+        failure_rate: float,
+        open_seconds: float,
+        probes: int = 1,
+        enabled: bool = True,
+    ) -> None:
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.enabled = enabled
+        self.state = CLOSED
+        self._outcomes: deque[bool] = deque(maxlen=window)  # True = failure
+        self._opened_at = 0.0
+        self._trials = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.open_seconds - time.monotonic())
+
+    def before_call(self) -> bool:
+        """Admit a call or raise CircuitOpen; True if the call is a half-open trial."""
+        if not self.enabled:
+            return False
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                self._reject()
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._trials >= self.probes:
+                self._reject()
+            self._trials += 1
+            return True
+        return False
+
+    def record(self, failed: bool, trial: bool = False) -> None:
+        if not self.enabled:
+            return
+        if trial:
+            self._trials = max(0, self._trials - 1)
+            if self.state == HALF_OPEN:
+                if failed:
+                    self._open()
+                else:
+                    self._outcomes.clear()
+                    self._transition(CLOSED)
+            return
+        if self.state != CLOSED:
+            return  # a straggler from before the circuit opened
+        self._outcomes.append(failed)
+        if len(self._outcomes) >= self.min_calls:
+            if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                self._open()
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """Admit the block as one upstream call and record how it went.
+
+        Only upstream health counts: a 4xx is a success (the upstream answered),
+        while cancellations, deadlines and local shedding are not recorded.
+        """
+        trial = self.before_call()
+        try:
+            yield
+        except BaseException as e:
+            if is_upstream_failure(e):
+                self.record(True, trial)
+            elif isinstance(e, httpx.HTTPStatusError):
+                self.record(False, trial)
+            elif trial:
+                self._trials = max(0, self._trials - 1)
+            raise
+        else:
+            self.record(False, trial)
+
+    def stats(self) -> dict[str, Any]:
+        outcomes = list(self._outcomes)
+        return {
+            "state": self.state,
+            "failure_rate": round(sum(outcomes) / len(outcomes), 3) if outcomes else 0.0,
+            "calls": len(outcomes),
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "retry_after": round(self.retry_after(), 3) if self.state == OPEN else None,
+        }
+
+    def _reject(self) -> None:
+        self.rejected += 1
+        raise CircuitOpen(self.retry_after() or 1)
+
+    def _open(self) -> None:
+        self._opened_at = time.monotonic()
+        self.opened += 1
+        self._transition(OPEN)
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            self.state = state
+            self._trials = 0
+            metrics.breaker_transitions.inc(state)
@@ -0,0 +1,122 @@
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any
+from backend.core.keys import canonical_hash, is_deterministic
+from backend.core.shared_state import connect
+from backend.external.llm_client import build_payload
+from backend.schemas.chat import LLMRequest
+from backend.settings import settings
+
+CACHE_HEADER = "X-Cache"
+
+
+def cache_key_for(namespace: str, req: LLMRequest) -> str | None:
+    """Return the cache key for a deterministic request, or None if uncacheable."""
+    if not settings.CACHE_ENABLED or not is_deterministic(req):
+        return None
+    return canonical_hash(namespace, build_payload(req))
+
+
+class ResponseCache:
+    """Two-tier exact-match cache: in-memory LRU (byte budget + TTL) over optional sqlite."""
+
+    def __init__(self, max_bytes: int, ttl: float, sqlite_path: str | None = None) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (expires_at, size, value); ordered oldest -> most recently used.
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._bytes = 0
+        self._db: sqlite3.Connection | None = None
+        if sqlite_path:
+            self._db = connect(sqlite_path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            # Entries that expired while the process was down are pruned on open.
+            self._db.execute("DELETE FROM response_cache WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any | None:
+        """Return the cached value for ``key`` or None on a miss."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self._evict(key)
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[1] > now:
+                value = json.loads(row[0])
+                self._store(key, value, len(row[0]), row[1])
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Cache a JSON-serializable value under ``key``."""
+        text = json.dumps(value, separators=(",", ":"))
+        expires_at = time.time() + self.ttl
+        self._store(key, value, len(text), expires_at)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?)",
+                (key, text, expires_at),
+            )
+            self._db.commit()
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers and reset counters."""
+        self._entries.clear()
+        self._bytes = 0
+        self.hits = self.disk_hits = self.misses = 0
+        if self._db is not None:
+            self._db.execute("DELETE FROM response_cache")
+            self._db.commit()
+
+    def stats(self) -> dict[str, Any]:
+        """Snapshot of cache size and hit/miss counters."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+    def _store(self, key: str, value: Any, size: int, expires_at: float) -> None:
+        if size > self.max_bytes:
+            return
+        self._evict(key)
+        self._entries[key] = (expires_at, size, value)
+        self._bytes += size
+        # Evict least recently used entries until back under the byte budget.
+        while self._bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+
+response_cache = ResponseCache(
+    max_bytes=settings.CACHE_MAX_BYTES,
+    ttl=settings.CACHE_TTL_SECONDS,
+    sqlite_path=settings.CACHE_SQLITE_PATH,
+)
@@ -0,0 +1,91 @@
+import asyncio
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, TypeVar
+from fastapi import Request
+
+T = TypeVar("T")
+
+
+class ClientDisconnected(Exception):
+    """The client went away before the response was ready; mapped to 499."""
+
+
+class DisconnectStats:
+    """How many requests were cut short because the client left."""
+
+    def __init__(self) -> None:
+        self.streams_cancelled = 0
+        self.requests_cancelled = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "streams_cancelled": self.streams_cancelled,
+            "requests_cancelled": self.requests_cancelled,
+        }
+
+
+disconnect_stats = DisconnectStats()
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    # The body has already been read, so the next message is the disconnect.
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def until_disconnect(request: Request | None, work: Awaitable[T]) -> T:
+    """Await ``work``, cancelling it (and its upstream calls) if the client leaves.
+
+    With no request (background jobs) there is nobody to watch; just await it.
+    """
+    if request is None:
+        return await work
+    task = asyncio.ensure_future(work)
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            disconnect_stats.requests_cancelled += 1
+            raise ClientDisconnected("Client disconnected")
+        return task.result()
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+
+
+async def cancel_on_disconnect(
+    request: Request, gen: AsyncIterator[bytes]
+) -> AsyncGenerator[bytes, None]:
+    """Relay ``gen`` until the client disconnects, then close the upstream at once.
+
+    Each chunk is awaited in its own task so a disconnect can cancel a pending
+    upstream read instead of waiting for the next token to fail on send.
+    """
+    watcher = asyncio.ensure_future(_wait_for_disconnect(request))
+    pending: asyncio.Future[Any] | None = None
+    try:
+        while True:
+            pending = asyncio.ensure_future(anext(gen))
+            await asyncio.wait({pending, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not pending.done():
+                disconnect_stats.streams_cancelled += 1
+                return
+            try:
+                chunk = pending.result()
+            except StopAsyncIteration:
+                return
+            pending = None
+            yield chunk
+    finally:
+        watcher.cancel()
+        if pending is not None and not pending.done():
+            # Cancelling the read unwinds the upstream generator and its connection.
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        aclose = getattr(gen, "aclose", None)
+        if aclose is not None:
+            await aclose()
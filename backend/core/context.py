@@ -0,0 +1,124 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+# Scheduling classes; lower values are served first.
+INTERACTIVE = 0
+BULK = 1
+
+# Tenant of requests that carry no tenant header or API key.
+ANONYMOUS = "anonymous"
+
+QUEUE_TIMEOUT_HEADER = "x-queue-timeout"
+REQUEST_TIMEOUT_HEADER = "x-request-timeout"
+
+
+class DeadlineExceeded(Exception):
+    """The request's end-to-end deadline passed; mapped to 504."""
+
+
+@dataclass
+class RequestContext:
+    """Per-request state threaded from the routers down to llm_client."""
+
+    priority: int = INTERACTIVE
+    started: float = field(default_factory=time.monotonic)
+    # Caller-supplied bound (seconds) on time spent waiting for an upstream slot.
+    queue_timeout: float | None = None
+    # Absolute time.monotonic() by which all work for the request must finish.
+    deadline: float | None = None
+    # Seconds spent per phase (queue, connect, ttft, generate, validate, ...); fan-out
+    # sub-calls share the context, so their phases add up.
+    timings: dict[str, float] = field(default_factory=dict)
+    # Who the request is for, and its fair-queuing share and per-generation cost
+    # (estimated tokens); set by the tenant quotas before any upstream work.
+    tenant: str = ANONYMOUS
+    weight: float = 1.0
+    cost: float = 1.0
+
+    def remaining(self) -> float | None:
+        """Seconds left before the deadline (may be negative), or None if unbounded."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def check_deadline(self) -> None:
+        """Raise DeadlineExceeded if the deadline has already passed."""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded("Request deadline exceeded")
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the block and add it to ``name``'s total."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - start)
+
+
+_current: ContextVar[RequestContext | None] = ContextVar("request_context", default=None)
+
+
+def current_context() -> RequestContext:
+    """Return the active request context (a throwaway default outside requests)."""
+    ctx = _current.get()
+    return ctx if ctx is not None else RequestContext()
+
+
+@contextmanager
+def bind_context(ctx: RequestContext) -> Iterator[RequestContext]:
+    """Make ``ctx`` the current context for work started outside a request (jobs)."""
+    token = _current.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current.reset(token)
+
+
+def _parse_seconds(value: bytes | None) -> float | None:
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    return seconds if seconds >= 0 else None
+
+
+class RequestContextMiddleware:
+    """ASGI middleware that opens a RequestContext for every HTTP request.
+
+    ``identify`` maps the request headers to the tenant the request is for.
+    """
+
+    def __init__(
+        self, app: Any, identify: Callable[[dict[bytes, bytes]], str] | None = None
+    ) -> None:
+        self.app = app
+        self.identify = identify
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        ctx = RequestContext(
+            queue_timeout=_parse_seconds(headers.get(QUEUE_TIMEOUT_HEADER.encode()))
+        )
+        if self.identify is not None:
+            ctx.tenant = self.identify(headers)
+        timeout = _parse_seconds(headers.get(REQUEST_TIMEOUT_HEADER.encode()))
+        if timeout is not None:
+            ctx.deadline = ctx.started + timeout
+        token = _current.set(ctx)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,208 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Awaitable, Callable, TypeVar
+from backend.core import metrics
+
+T = TypeVar("T")
+
+
+class HedgeBudget:
+    """Caps hedges at ``percent`` of primary calls.
+
+    Every primary call earns ``percent / 100`` of a hedge; a hedge spends one.
+    Savings are capped at ``burst`` so a quiet spell can't fund a hedge storm.
+    """
+
+    def __init__(self, percent: float, burst: float = 10.0) -> None:
+        self.ratio = max(0.0, percent) / 100
+        self.burst = burst
+        self.tokens = 0.0
+
+    def earn(self) -> None:
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class Hedger:
+    """Send a duplicate upstream call when the first is slower than usual.
+
+    The hedge delay is the ``percentile`` of recently observed latencies
+    (whole calls, or time to first chunk for streams), never below
+    ``min_delay``. Until ``min_samples`` have been seen nothing is hedged.
+    The first success wins and the other call is cancelled, which closes its
+    upstream connection so the model runner stops generating it.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        budget: HedgeBudget,
+        *,
+        percentile: float,
+        min_delay: float,
+        window: int,
+        min_samples: int,
+        enabled: bool = True,
+    ) -> None:
+        self.kind = kind
+        self.budget = budget
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.enabled = enabled
+        self._latencies: deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.fired = 0
+        self.won = 0
+        self.denied = 0
+
+    def observe(self, latency: float) -> None:
+        self._latencies.append(latency)
+
+    def delay(self) -> float | None:
+        """Seconds to wait before hedging, or None while there is too little history."""
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        rank = min(len(ordered) - 1, int(self.percentile / 100 * len(ordered)))
+        return max(self.min_delay, ordered[rank])
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "calls": self.calls,
+            "delay": self.delay(),
+            "fired": self.fired,
+            "won": self.won,
+            "denied": self.denied,
+        }
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Await ``call()``, hedging it with a second ``call()`` if it runs long."""
+        if not self.enabled:
+            return await call()
+        self.calls += 1
+        self.budget.earn()
+        started: dict[asyncio.Future[Any], float] = {}
+
+        def launch() -> None:
+            started[asyncio.ensure_future(call())] = time.monotonic()
+
+        launch()
+        primary = next(iter(started))
+        pending = set(started)
+        error: BaseException | None = None
+        try:
+            delay = self.delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    pending |= self._hedge(launch, started)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    exc = task.exception()
+                    if exc is None:
+                        now = time.monotonic()
+                        self._won(
+                            task is not primary, now - started[task], now - started[primary]
+                        )
+                        return task.result()
+                    # The other call may still succeed; report the first error otherwise.
+                    error = error or exc
+            assert error is not None
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*started, return_exceptions=True)
+
+    async def stream(
+        self, open_stream: Callable[[], AsyncGenerator[bytes, None]]
+    ) -> AsyncGenerator[bytes, None]:
+        """Relay ``open_stream()``, hedging it if the first chunk is late.
+
+        Only the wait for the first chunk is hedged; after that the winning
+        stream is relayed and the other is closed.
+        """
+        if not self.enabled:
+            async with aclosing(open_stream()) as gen:
+                async for chunk in gen:
+                    yield chunk
+            return
+        self.calls += 1
+        self.budget.earn()
+        streams: dict[asyncio.Future[Any], tuple[AsyncGenerator[bytes, None], float]] = {}
+
+        def launch() -> None:
+            gen = open_stream()
+            streams[asyncio.ensure_future(anext(gen))] = (gen, time.monotonic())
+
+        launch()
+        primary = next(iter(streams))
+        pending = set(streams)
+        winner: AsyncGenerator[bytes, None] | None = None
+        first: bytes | None = None
+        error: BaseException | None = None
+        try:
+            delay = self.delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    pending |= self._hedge(launch, streams)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    exc = task.exception()
+                    if exc is not None and not isinstance(exc, StopAsyncIteration):
+                        error = error or exc
+                        continue
+                    gen, start = streams[task]
+                    winner, first = gen, None if exc is not None else task.result()
+                    now = time.monotonic()
+                    self._won(task is not primary, now - start, now - streams[primary][1])
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*streams, return_exceptions=True)
+            for gen, _ in streams.values():
+                if gen is not winner:
+                    await gen.aclose()
+        if winner is None:
+            assert error is not None
+            raise error
+        async with aclosing(winner) as gen:
+            if first is None:
+                return
+            yield first
+            async for chunk in gen:
+                yield chunk
+
+    def _hedge(self, launch: Callable[[], None], started: dict[Any, Any]) -> set[Any]:
+        if not self.budget.try_spend():
+            self.denied += 1
+            metrics.hedges.inc(self.kind, "denied")
+            return set()
+        before = set(started)
+        launch()
+        self.fired += 1
+        metrics.hedges.inc(self.kind, "fired")
+        return set(started) - before
+
+    def _won(self, hedge: bool, latency: float, primary_elapsed: float) -> None:
+        self.observe(latency)
+        if hedge:
+            # The losing primary took at least this long; leaving it out would drop
+            # the slow tail from the history, so the delay would keep shrinking.
+            self.observe(primary_elapsed)
+            self.won += 1
+            metrics.hedges.inc(self.kind, "won")
+
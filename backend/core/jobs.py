@@ -0,0 +1,256 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+from backend.core.context import ANONYMOUS, BULK, RequestContext, bind_context, current_context
+from backend.core.scheduler import Overloaded
+from backend.core.shared_state import connect
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+# A job kind's runner: takes the job's request, returns (result, headers).
+Runner = Callable[[Any], Awaitable[tuple[Any, dict[str, str]]]]
+
+
+class MemoryJobStore:
+    """Job records in a dict; each expires ``ttl`` seconds after its last update."""
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        # id -> (expires_at, job)
+        self._jobs: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._next_purge = 0.0
+
+    def put(self, job: dict[str, Any]) -> None:
+        now = time.time()
+        self._jobs[job["id"]] = (now + self.ttl, job)
+        if now >= self._next_purge:
+            self.purge(now)
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        entry = self._jobs.get(job_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.time():
+            del self._jobs[job_id]
+            return None
+        return entry[1]
+
+    def purge(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        expired = [k for k, (expires_at, _) in self._jobs.items() if expires_at <= now]
+        for key in expired:
+            del self._jobs[key]
+        self._next_purge = now + min(self.ttl, 60.0)
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+
+class SqliteJobStore:
+    """Job records in sqlite, so any worker process can answer GET /jobs/{id}."""
+
+    def __init__(self, path: str, ttl: float) -> None:
+        self.ttl = ttl
+        self._db = connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs "
+            "(id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.commit()
+        self._next_purge = 0.0
+
+    def put(self, job: dict[str, Any]) -> None:
+        now = time.time()
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?)",
+                (job["id"], json.dumps(job), now + self.ttl),
+            )
+        if now >= self._next_purge:
+            self.purge(now)
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        row = self._db.execute(
+            "SELECT data FROM jobs WHERE id = ? AND expires_at > ?", (job_id, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def purge(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        with self._db:
+            deleted = self._db.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,)).rowcount
+        self._next_purge = now + min(self.ttl, 60.0)
+        return deleted
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+JobStore = MemoryJobStore | SqliteJobStore
+
+
+class JobQueue:
+    """Bounded in-process queue of jobs drained by a fixed pool of worker tasks.
+
+    Jobs run as bulk work with their own deadline, outside any HTTP request;
+    the store holds their status and results for polling.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        runners: dict[str, Runner],
+        *,
+        workers: int,
+        max_pending: int,
+        timeout: float | None,
+        poll_interval: float = 0.5,
+    ) -> None:
+        self.store = store
+        self.runners = runners
+        self.workers = workers
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending
+        # Created by start() so it belongs to the serving event loop.
+        self._queue: asyncio.Queue[tuple[str, Any]] | None = None
+        self._done: dict[str, asyncio.Event] = {}
+        self._tasks: list[asyncio.Task[None]] = []
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def submit(self, kind: str, request: Any) -> dict[str, Any]:
+        """Queue a job and return its record; raises Overloaded when the queue is full."""
+        if kind not in self.runners:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        if self._queue is None:
+            raise Overloaded(503, "Job workers are not running", retry_after=5)
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": QUEUED,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "headers": {},
+            # Quotas and fair queuing apply to the job as to the submitting request.
+            "tenant": current_context().tenant,
+        }
+        try:
+            self._queue.put_nowait((job["id"], request))
+        except asyncio.QueueFull:
+            raise Overloaded(503, "Job queue is full", retry_after=5) from None
+        self.store.put(job)
+        self._done[job["id"]] = asyncio.Event()
+        self.submitted += 1
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> dict[str, Any] | None:
+        """Long-poll: the job once it finishes or ``timeout`` passes (None if unknown).
+
+        Jobs queued by this process wake the waiter directly; others (another
+        worker process sharing a sqlite store) are re-read every poll interval.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.store.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINISHED or remaining <= 0:
+                return job
+            event = self._done.get(job_id)
+            if event is None:
+                await asyncio.sleep(min(remaining, self.poll_interval))
+                continue
+            try:
+                await asyncio.wait_for(event.wait(), remaining)
+            except TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._tasks = [
+                asyncio.create_task(self._work(), name=f"job-worker-{i}")
+                for i in range(self.workers)
+            ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        queue, self._queue = self._queue, None
+        while queue is not None and not queue.empty():
+            job_id, _ = queue.get_nowait()
+            job = self.store.get(job_id)
+            if job is not None:
+                self._fail(job, "Server shut down before the job started")
+        self._done.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "stored": len(self.store),
+        }
+
+    async def _work(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            job_id, request = await queue.get()
+            await self._run(job_id, request)
+
+    async def _run(self, job_id: str, request: Any) -> None:
+        job = self.store.get(job_id)
+        if job is None:  # expired while queued
+            self._finish(job_id)
+            return
+        job = {**job, "status": RUNNING, "started_at": time.time()}
+        self.store.put(job)
+        ctx = RequestContext(priority=BULK, tenant=job.get("tenant") or ANONYMOUS)
+        if self.timeout is not None:
+            ctx.deadline = ctx.started + self.timeout
+        try:
+            with bind_context(ctx):
+                result, headers = await self.runners[job["kind"]](request)
+        except asyncio.CancelledError:
+            self._fail(job, "Server shut down before the job finished")
+            raise
+        except Exception as e:
+            self._fail(job, str(e) or type(e).__name__)
+        else:
+            self.succeeded += 1
+            self.store.put(
+                {
+                    **job,
+                    "status": SUCCEEDED,
+                    "finished_at": time.time(),
+                    "result": result,
+                    "headers": headers,
+                }
+            )
+            self._finish(job_id)
+
+    def _fail(self, job: dict[str, Any], error: str) -> None:
+        self.failed += 1
+        self.store.put({**job, "status": FAILED, "finished_at": time.time(), "error": error})
+        self._finish(job["id"])
+
+    def _finish(self, job_id: str) -> None:
+        event = self._done.pop(job_id, None)
+        if event is not None:
+            event.set()
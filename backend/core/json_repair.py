@@ -0,0 +1,62 @@
+import json
+import re
+from typing import Any, Iterator
+from backend.core.partial_json import IncrementalJSONParser, InvalidJSON
+
+_FENCE = re.compile(r"```[a-zA-Z]*\s*(.*?)(?:```|\Z)", re.DOTALL)
+# Repeating units considered a loop, and how often one must repeat.
+_MIN_PERIOD = 4
+_MAX_PERIOD = 256
+_MIN_REPEATS = 3
+
+
+def strip_fences(text: str) -> str:
+    """Drop a markdown code fence around the document, if there is one."""
+    match = _FENCE.search(text)
+    return match.group(1) if match else text
+
+
+def trim_repeated_tail(text: str) -> str:
+    """Keep one copy of a unit the text ends by repeating ``_MIN_REPEATS``+ times."""
+    n = len(text)
+    for period in range(_MIN_PERIOD, min(_MAX_PERIOD, n // _MIN_REPEATS) + 1):
+        unit = text[n - period :]
+        repeats = 1
+        while text.endswith(unit * (repeats + 1)):
+            repeats += 1
+        if repeats >= _MIN_REPEATS:
+            return text[: n - period * (repeats - 1)]
+    return text
+
+
+def _close(text: str) -> Any | None:
+    """Parse the longest consistent prefix of ``text`` with open containers closed."""
+    parser = IncrementalJSONParser()
+    try:
+        parser.feed(text)
+    except InvalidJSON:
+        pass  # keep what was consistent up to the bad character
+    if parser.complete:
+        return json.loads(parser.text)
+    return parser.snapshot()
+
+
+def repair_candidates(text: str) -> Iterator[Any]:
+    """Progressively more aggressive local repairs of ``text``, cheapest first.
+
+    Yields parsed values: the document with fences and surrounding junk
+    dropped and unbalanced brackets closed, then the same after trimming a
+    looping tail. Callers validate each and keep the first that fits.
+    """
+    body = strip_fences(text)
+    starts = [i for i in (body.find("{"), body.find("[")) if i >= 0]
+    if not starts:
+        return
+    body = body[min(starts) :]
+
+    seen: list[Any] = []
+    for candidate in (body, trim_repeated_tail(body.rstrip())):
+        value = _close(candidate)
+        if value is not None and value not in seen:
+            seen.append(value)
+            yield value
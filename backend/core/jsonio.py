@@ -0,0 +1,26 @@
+import json
+from typing import Any
+
+try:  # in requirements.txt; several times faster for payloads and SSE chunks
+    import orjson
+except ImportError:  # pragma: no cover - safety net for installs without it
+    orjson = None  # type: ignore[assignment]
+
+
+def dumps(obj: Any, *, sort_keys: bool = False) -> bytes:
+    """Compact UTF-8 JSON, via orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+        except orjson.JSONEncodeError:
+            pass  # e.g. an int beyond 64 bits, which the stdlib encoder accepts
+    return json.dumps(
+        obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse JSON text; raises ValueError on malformed input either way."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,14 @@
+import hashlib
+from typing import Any
+from backend.core.jsonio import dumps
+from backend.schemas.chat import LLMRequest
+
+
+def is_deterministic(req: LLMRequest) -> bool:
+    """A request repeats exactly when it is seeded or sampled greedily."""
+    return req.seed is not None or req.temperature == 0
+
+
+def canonical_hash(namespace: str, payload: dict[str, Any]) -> str:
+    """Hash a payload independently of key order and whitespace."""
+    return hashlib.sha256(dumps([namespace, payload], sort_keys=True)).hexdigest()
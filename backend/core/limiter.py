@@ -0,0 +1,120 @@
+import time
+from collections import deque
+from typing import Any
+
+
+class _Signal:
+    """Fast EWMA of a latency plus a slowly drifting baseline (its healthy level)."""
+
+    def __init__(self) -> None:
+        self.short: float | None = None
+        self.baseline: float | None = None
+
+    def update(self, sample: float) -> None:
+        if self.short is None or self.baseline is None:
+            self.short = self.baseline = sample
+            return
+        self.short = 0.8 * self.short + 0.2 * sample
+        # The baseline follows improvements at once and degradations very slowly,
+        # so it can re-learn after a model or host change.
+        self.baseline = min(sample, 0.99 * self.baseline + 0.01 * sample)
+
+    @property
+    def gradient(self) -> float:
+        if not self.short or not self.baseline:
+            return 1.0
+        return self.short / self.baseline
+
+
+class AIMDLimit:
+    """Additive-increase / multiplicative-decrease concurrency limit.
+
+    The limit grows by ~1 per limit's worth of healthy, saturated samples and is
+    cut by ``decrease`` when time-to-first-token or per-token latency drifts more
+    than ``tolerance`` times above its baseline, or when the upstream errors.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int,
+        max_limit: int,
+        tolerance: float = 1.5,
+        decrease: float = 0.7,
+        history: int = 100,
+    ) -> None:
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.decrease = decrease
+        self.ttft = _Signal()
+        self.per_token = _Signal()
+        self.adjustments: deque[dict[str, Any]] = deque(maxlen=history)
+        self.samples = 0
+        # Samples to skip after a cut so the latency EWMA reflects the new limit.
+        self._cooldown = 0
+
+    @property
+    def current(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def gradient(self) -> float:
+        return max(self.ttft.gradient, self.per_token.gradient)
+
+    def observe(
+        self,
+        inflight: int,
+        ttft: float | None = None,
+        per_token: float | None = None,
+        ok: bool = True,
+    ) -> None:
+        """Fold one finished generation into the limit."""
+        self.samples += 1
+        if ttft is not None:
+            self.ttft.update(ttft)
+        if per_token is not None:
+            self.per_token.update(per_token)
+
+        if not ok:
+            self._cut("error")
+            return
+        if self._cooldown > 0:
+            self._cooldown -= 1
+            return
+        if self.gradient > self.tolerance:
+            self._cut("latency")
+        elif inflight >= self.current and self.limit < self.max_limit:
+            # Only grow while the current limit is actually being used.
+            self._set(min(self.max_limit, self.limit + 1.0 / self.limit), "increase")
+
+    def stats(self) -> dict[str, Any]:
+        """Current limit, latency gradient and recent adjustments."""
+        return {
+            "limit": self.current,
+            "gradient": round(self.gradient, 3),
+            "ttft": {"short": self.ttft.short, "baseline": self.ttft.baseline},
+            "per_token": {"short": self.per_token.short, "baseline": self.per_token.baseline},
+            "samples": self.samples,
+            "adjustments": list(self.adjustments),
+        }
+
+    def _cut(self, reason: str) -> None:
+        self._set(max(self.min_limit, self.limit * self.decrease), reason)
+        self._cooldown = self.current
+
+    def _set(self, value: float, reason: str) -> None:
+        before = self.current
+        self.limit = value
+        # Log whole-slot changes only; fractional additive steps would flood it.
+        if self.current != before:
+            self.adjustments.append(
+                {
+                    "time": time.time(),
+                    "from": before,
+                    "to": self.current,
+                    "reason": reason,
+                    "gradient": round(self.gradient, 3),
+                }
+            )
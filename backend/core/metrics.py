@@ -0,0 +1,359 @@
+import math
+import time
+from bisect import bisect_left
+from typing import Any, Callable
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Updates run on the event-loop thread, so plain dict/list increments are safe and
+# cost a hash lookup plus an add; rendering does the formatting work at scrape time.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_GAP_BUCKETS = (0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 200, 500)
+WIDTH_BUCKETS = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+SIMILARITY_BUCKETS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.92, 0.94, 0.96, 0.98, 0.99, 1.0)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def dump(self) -> list[Any]:
+        return [[list(labels), v] for labels, v in self._values.items()]
+
+    def merged(self, dumps: list[Any]) -> "Counter":
+        """A copy holding the sum of ``dump()`` results from several processes."""
+        total = Counter(self.name, self.help_text, self.labelnames)
+        for dump in dumps:
+            for labels, v in dump:
+                total.inc(*labels, amount=v)
+        return total
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_number(v)}"
+            for labels, v in self._values.items()
+        ]
+
+
+class Gauge:
+    """Current value, either set directly or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self, name: str, help_text: str, function: Callable[[], float] | None = None
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.function = function
+        self._value: float = 0
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def value(self) -> float:
+        return self.function() if self.function is not None else self._value
+
+    def dump(self) -> float:
+        return self.value()
+
+    def merged(self, dumps: list[Any]) -> "Gauge":
+        total = Gauge(self.name, self.help_text)
+        total.set(sum(dumps))
+        return total
+
+    def samples(self) -> list[str]:
+        return [f"{self.name} {_number(self.value())}"]
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set; observe is one bisect and two adds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: tuple[float, ...],
+        labelnames: tuple[str, ...] = (),
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.bounds = tuple(buckets) + (math.inf,)
+        # labels -> [per-bucket counts..., sum]; buckets are made cumulative on render.
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.bounds) + 1)
+        series[bisect_left(self.bounds, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def dump(self) -> list[Any]:
+        return [[list(labels), list(series)] for labels, series in self._series.items()]
+
+    def merged(self, dumps: list[Any]) -> "Histogram":
+        total = Histogram(self.name, self.help_text, self.bounds[:-1], self.labelnames)
+        for dump in dumps:
+            for labels, series in dump:
+                into = total._series.setdefault(tuple(labels), [0] * len(series))
+                for i, v in enumerate(series):
+                    into[i] += v
+        return total
+
+    def samples(self) -> list[str]:
+        lines = []
+        for labels, series in self._series.items():
+            cumulative = 0.0
+            for bound, count in zip(self.bounds, series):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} "
+                    f"{_number(int(cumulative))}"
+                )
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_number(float(series[-1]))}")
+            lines.append(f"{self.name}_count{suffix} {_number(int(cumulative))}")
+        return lines
+
+
+class MetricsRegistry:
+    """Every metric the process exports, rendered in Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._metrics: list[Any] = []
+
+    def register(self, metric: Any) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> dict[str, Any]:
+        """Every metric's raw values, JSON-serializable, for merging across processes."""
+        return {metric.name: metric.dump() for metric in self._metrics}
+
+    def render(
+        self,
+        live: list[dict[str, Any]] | None = None,
+        retired: list[dict[str, Any]] | None = None,
+    ) -> str:
+        """Prometheus text for this process, or summed over worker ``snapshot()`` results.
+
+        Counters and histograms include ``retired`` (exited) workers so totals
+        never go backwards; gauges only sum the ``live`` ones.
+        """
+        metrics = self._metrics
+        if live is not None:
+            metrics = [
+                metric.merged(
+                    [s[metric.name] for s in live if metric.name in s]
+                    + [
+                        s[metric.name]
+                        for s in retired or ()
+                        if metric.name in s and metric.kind != "gauge"
+                    ]
+                )
+                for metric in metrics
+            ]
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.register(
+    Counter(
+        "smolchat_http_requests_total",
+        "HTTP requests by route template, method and status.",
+        ("route", "method", "status"),
+    )
+)
+http_duration = registry.register(
+    Histogram(
+        "smolchat_http_request_duration_seconds",
+        "Time from request start until the last response byte, by route template.",
+        LATENCY_BUCKETS,
+        ("route",),
+    )
+)
+upstream_ttft = registry.register(
+    Histogram(
+        "smolchat_upstream_ttft_seconds",
+        "Upstream time to first streamed token, measured from slot admission.",
+        LATENCY_BUCKETS,
+    )
+)
+upstream_inter_token = registry.register(
+    Histogram(
+        "smolchat_upstream_inter_token_seconds",
+        "Mean gap between streamed tokens, one sample per generation.",
+        TOKEN_GAP_BUCKETS,
+    )
+)
+upstream_tokens_per_second = registry.register(
+    Histogram(
+        "smolchat_upstream_tokens_per_second",
+        "Decode throughput after the first token, one sample per streamed generation.",
+        RATE_BUCKETS,
+    )
+)
+upstream_generations = registry.register(
+    Counter(
+        "smolchat_upstream_generations_total",
+        "Upstream generations that held a slot, by outcome.",
+        ("outcome",),
+    )
+)
+usage_tokens = registry.register(
+    Counter(
+        "smolchat_usage_tokens_total",
+        "Tokens reported in upstream usage, by kind (prompt or completion).",
+        ("kind",),
+    )
+)
+fanout_width = registry.register(
+    Histogram("smolchat_fanout_width", "Choices requested per n>1 fan-out.", WIDTH_BUCKETS)
+)
+structured_validations = registry.register(
+    Counter(
+        "smolchat_structured_validations_total",
+        "Structured choices by response_type and outcome (parsed, repaired, "
+        "regenerated, failed, or stream_valid / stream_invalid).",
+        ("response_type", "outcome"),
+    )
+)
+semantic_cache_lookups = registry.register(
+    Counter(
+        "smolchat_semantic_cache_lookups_total",
+        "Semantic cache lookups by result (hit, miss, error).",
+        ("result",),
+    )
+)
+semantic_cache_similarity = registry.register(
+    Histogram(
+        "smolchat_semantic_cache_similarity",
+        "Best cosine similarity found per semantic cache lookup.",
+        SIMILARITY_BUCKETS,
+    )
+)
+hedges = registry.register(
+    Counter(
+        "smolchat_hedges_total",
+        "Hedged upstream calls by kind (call or stream) and outcome (fired, won, denied).",
+        ("kind", "outcome"),
+    )
+)
+breaker_transitions = registry.register(
+    Counter(
+        "smolchat_breaker_transitions_total",
+        "Upstream circuit breaker state changes, by the state entered.",
+        ("state",),
+    )
+)
+tenant_requests = registry.register(
+    Counter(
+        "smolchat_tenant_requests_total",
+        "Generation requests per tenant by quota outcome (admitted, throttled, rejected).",
+        ("tenant", "outcome"),
+    )
+)
+tenant_tokens = registry.register(
+    Counter(
+        "smolchat_tenant_tokens_total",
+        "Tokens charged to each tenant after reconciling with upstream usage.",
+        ("tenant",),
+    )
+)
+upstream_in_flight = registry.register(
+    Gauge("smolchat_upstream_in_flight", "Upstream generations currently holding a slot.")
+)
+upstream_queued = registry.register(
+    Gauge("smolchat_upstream_queued", "Generations waiting for an upstream slot.")
+)
+
+
+def record_usage(usage: Any) -> None:
+    """Count prompt/completion tokens from an upstream ``usage`` object, if present."""
+    if not isinstance(usage, dict):
+        return
+    for kind in ("prompt", "completion"):
+        value = usage.get(f"{kind}_tokens")
+        if isinstance(value, int):
+            usage_tokens.inc(kind, amount=value)
+
+
+class MetricsMiddleware:
+    """Count requests and time them until the response body is fully sent.
+
+    Routes are labelled by their template (``/chat/stream``), never the raw
+    path, so label cardinality stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            http_requests.inc(template, scope["method"], str(status))
+            http_duration.observe(time.perf_counter() - start, template)
@@ -0,0 +1,205 @@
+import json
+import re
+from typing import Any
+
+_NUMBER = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?\Z")
+_NUMBER_CHARS = frozenset("+-0123456789.eE")
+_WHITESPACE = frozenset(" \t\r\n")
+_LITERALS = {"t": "true", "f": "false", "n": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+# Parser states.
+_VALUE = "value"  # a value must come next
+_VALUE_OR_END = "value_or_end"  # just after "[": a value or "]"
+_KEY = "key"  # after "," in an object: a key string must come next
+_KEY_OR_END = "key_or_end"  # just after "{": a key or "}"
+_COLON = "colon"
+_AFTER_VALUE = "after_value"  # "," or the closing bracket of the container
+_STRING = "string"
+_NUMBER_STATE = "number"
+_LITERAL = "literal"
+_DONE = "done"
+
+
+class InvalidJSON(ValueError):
+    """The text seen so far can no longer be completed into valid JSON."""
+
+
+class IncrementalJSONParser:
+    """Push parser that validates a JSON document as it streams in.
+
+    ``feed`` raises :class:`InvalidJSON` as soon as the prefix is unrecoverable,
+    and ``snapshot`` returns the partial document with open strings and
+    containers closed, so callers can show (and check) a growing object.
+    Work per character is O(1); ``snapshot`` is O(length).
+    """
+
+    def __init__(self) -> None:
+        self._chars: list[str] = []
+        self._stack: list[str] = []
+        self._state = _VALUE
+        self._string_is_key = False
+        self._escape = 0  # 1 after "\", 2..5 while reading \uXXXX digits
+        self._literal = ""
+        self._token_start = 0
+        # Longest prefix that is a consistent document once its containers close.
+        self._safe = 0
+        self._safe_stack: list[str] = []
+        self.values_completed = 0
+
+    @property
+    def complete(self) -> bool:
+        """True once the top-level value has been fully read."""
+        return self._state == _DONE
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chars)
+
+    def feed(self, chunk: str) -> None:
+        """Consume more text, raising InvalidJSON on the first impossible character."""
+        for ch in chunk:
+            self._step(ch)
+            self._chars.append(ch)
+
+    def finish(self) -> Any:
+        """Parse the full document, raising InvalidJSON if it is incomplete."""
+        if self._state == _NUMBER_STATE and not self._stack:
+            self._end_number(len(self._chars))
+            self._state = _DONE
+        if self._state != _DONE:
+            raise InvalidJSON("Unexpected end of JSON document")
+        return json.loads(self.text)
+
+    def snapshot(self) -> Any | None:
+        """Best-effort value of the document so far, or None before anything useful."""
+        if self._state == _DONE:
+            return json.loads(self.text)
+        if self._state == _STRING and not self._string_is_key:
+            # A value string in progress: keep what has arrived, minus a dangling escape.
+            end = len(self._chars)
+            if self._escape:
+                end = max(i for i in range(end) if self._chars[i] == "\\")
+            head = "".join(self._chars[:end]) + '"'
+            stack = self._stack
+        else:
+            if not self._safe:
+                return None
+            head = "".join(self._chars[: self._safe])
+            stack = self._safe_stack
+        closers = "".join(_CLOSERS[c] for c in reversed(stack))
+        try:
+            return json.loads(head + closers)
+        except ValueError:
+            return None
+
+    def _mark_safe(self, end: int) -> None:
+        self._safe = end
+        self._safe_stack = list(self._stack)
+
+    def _value_done(self, end: int) -> None:
+        self.values_completed += 1
+        if self._stack:
+            self._state = _AFTER_VALUE
+            self._mark_safe(end)
+        else:
+            self._state = _DONE
+
+    def _end_number(self, end: int) -> None:
+        token = "".join(self._chars[self._token_start : end])
+        if not _NUMBER.match(token):
+            raise InvalidJSON(f"Invalid number {token!r}")
+
+    def _step(self, ch: str) -> None:
+        pos = len(self._chars)
+        state = self._state
+
+        if state == _STRING:
+            if self._escape == 1:
+                if ch == "u":
+                    self._escape = 2
+                elif ch in '"\\/bfnrt':
+                    self._escape = 0
+                else:
+                    raise InvalidJSON(f"Invalid escape \\{ch}")
+            elif self._escape >= 2:
+                if ch not in "0123456789abcdefABCDEF":
+                    raise InvalidJSON("Invalid unicode escape")
+                self._escape = 0 if self._escape == 5 else self._escape + 1
+            elif ch == "\\":
+                self._escape = 1
+            elif ch == '"':
+                if self._string_is_key:
+                    self._state = _COLON
+                else:
+                    self._value_done(pos + 1)
+            elif ord(ch) < 0x20:
+                raise InvalidJSON("Control character in string")
+            return
+
+        if state == _NUMBER_STATE:
+            if ch in _NUMBER_CHARS:
+                return
+            self._end_number(pos)
+            self._value_done(pos)
+            state = self._state  # fall through: ch is a delimiter
+
+        if state == _LITERAL:
+            word = self._literal
+            index = pos - self._token_start
+            if word[index] != ch:
+                raise InvalidJSON(f"Invalid literal, expected {word!r}")
+            if index == len(word) - 1:
+                self._value_done(pos + 1)
+            return
+
+        if ch in _WHITESPACE:
+            return
+
+        if state == _DONE:
+            raise InvalidJSON("Trailing characters after JSON document")
+
+        if state in (_VALUE, _VALUE_OR_END):
+            if state == _VALUE_OR_END and ch == "]":
+                self._close(ch, pos)
+            elif ch in "{[":
+                self._stack.append(ch)
+                self._state = _KEY_OR_END if ch == "{" else _VALUE_OR_END
+                self._mark_safe(pos + 1)
+            elif ch == '"':
+                self._state = _STRING
+                self._string_is_key = False
+            elif ch in "-0123456789":
+                self._state = _NUMBER_STATE
+                self._token_start = pos
+            elif ch in _LITERALS:
+                self._state = _LITERAL
+                self._literal = _LITERALS[ch]
+                self._token_start = pos
+            else:
+                raise InvalidJSON(f"Unexpected {ch!r} where a value was expected")
+        elif state in (_KEY, _KEY_OR_END):
+            if ch == '"':
+                self._state = _STRING
+                self._string_is_key = True
+            elif state == _KEY_OR_END and ch == "}":
+                self._close(ch, pos)
+            else:
+                raise InvalidJSON(f"Unexpected {ch!r} where a key was expected")
+        elif state == _COLON:
+            if ch != ":":
+                raise InvalidJSON(f"Expected ':' but got {ch!r}")
+            self._state = _VALUE
+        elif state == _AFTER_VALUE:
+            if ch == ",":
+                self._state = _KEY if self._stack[-1] == "{" else _VALUE
+            elif ch in "}]":
+                self._close(ch, pos)
+            else:
+                raise InvalidJSON(f"Expected ',' or a closing bracket but got {ch!r}")
+
+    def _close(self, ch: str, pos: int) -> None:
+        if not self._stack or _CLOSERS[self._stack[-1]] != ch:
+            raise InvalidJSON(f"Mismatched {ch!r}")
+        self._stack.pop()
+        self._value_done(pos + 1)
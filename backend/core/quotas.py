@@ -0,0 +1,396 @@
+import asyncio
+import hashlib
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, TypeVar
+from backend.core import metrics
+from backend.core.context import ANONYMOUS, BULK, current_context
+from backend.core.scheduler import Overloaded
+from backend.core.shared_state import connect
+from backend.schemas.chat import LLMRequest
+from backend.settings import settings
+
+QUOTA_DB = "quotas.sqlite3"  # under STATE_DIR, shared by every worker
+# Tenants seen beyond this many are reported (not limited) as "other".
+MAX_TRACKED_TENANTS = 1024
+# In-memory buckets untouched this long are full again and can be dropped.
+IDLE_BUCKET_SECONDS = 600.0
+# Completion budget of a raw chat-completions body that sets no max_tokens.
+DEFAULT_MAX_TOKENS: int = LLMRequest.model_fields.get("max_tokens").default
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Quota:
+    """Per-minute allowances (None = unlimited), fair-queuing weight and priority class.
+
+    A ``bulk`` tenant's generations all queue behind interactive work.
+    """
+
+    requests_per_minute: float | None = None
+    tokens_per_minute: float | None = None
+    weight: float = 1.0
+    bulk: bool = False
+
+
+# One bucket to draw from: (key, amount, refill per second, capacity).
+Demand = tuple[str, float, float, float]
+
+
+def _refill(tokens: float, updated_at: float, rate: float, capacity: float, now: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+
+def _shortfall(demands: list[Demand], levels: list[float]) -> float:
+    """Seconds until every demand fits, or 0.0 if all fit now.
+
+    A demand larger than the whole bucket is let through once the bucket is
+    full, leaving it in debt, rather than being refused forever.
+    """
+    wait = 0.0
+    for (_, amount, rate, capacity), level in zip(demands, levels):
+        need = min(amount, capacity)
+        if level < need:
+            wait = max(wait, (need - level) / rate)
+    return wait
+
+
+class MemoryBucketStore:
+    """Token buckets for one process: key -> (tokens, updated_at)."""
+
+    blocking = False
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._next_prune = 0.0
+
+    def take(self, demands: list[Demand], now: float) -> float:
+        """Draw every demand, or none of them; returns the wait (0.0 = granted)."""
+        if now >= self._next_prune:
+            cutoff = now - IDLE_BUCKET_SECONDS
+            self._buckets = {k: v for k, v in self._buckets.items() if v[1] > cutoff}
+            self._next_prune = now + IDLE_BUCKET_SECONDS
+        levels = [
+            _refill(*self._buckets.get(key, (capacity, now)), rate, capacity, now)
+            for key, _, rate, capacity in demands
+        ]
+        wait = _shortfall(demands, levels)
+        for (key, amount, _, _), level in zip(demands, levels):
+            self._buckets[key] = (level - amount if not wait else level, now)
+        return wait
+
+    def adjust(self, demand: Demand, now: float) -> None:
+        """Return (positive amount) or charge (negative) tokens after the fact."""
+        key, amount, rate, capacity = demand
+        level = _refill(*self._buckets.get(key, (capacity, now)), rate, capacity, now)
+        self._buckets[key] = (min(capacity, level + amount), now)
+
+    def level(self, key: str, rate: float, capacity: float, now: float) -> float:
+        return _refill(*self._buckets.get(key, (capacity, now)), rate, capacity, now)
+
+
+class SqliteBucketStore:
+    """Token buckets in sqlite, so every worker process draws from the same quota.
+
+    Calls block (on another worker's write lock, at worst for sqlite's busy
+    timeout), so TenantQuotas runs them in a thread; the lock keeps this
+    process's threads from interleaving transactions on the one connection.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str) -> None:
+        self._db = connect(path)
+        self._lock = threading.Lock()
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _levels(self, demands: list[Demand], now: float) -> list[float]:
+        levels = []
+        for key, _, rate, capacity in demands:
+            row = self._db.execute(
+                "SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)
+            ).fetchone()
+            levels.append(_refill(*(row or (capacity, now)), rate, capacity, now))
+        return levels
+
+    def take(self, demands: list[Demand], now: float) -> float:
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock first, so read-modify-write is atomic.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                levels = self._levels(demands, now)
+                wait = _shortfall(demands, levels)
+                if not wait:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                        [(d[0], level - d[1], now) for d, level in zip(demands, levels)],
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return wait
+
+    def adjust(self, demand: Demand, now: float) -> None:
+        key, amount, _, capacity = demand
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                level = self._levels([demand], now)[0]
+                self._db.execute(
+                    "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)",
+                    (key, min(capacity, level + amount), now),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def level(self, key: str, rate: float, capacity: float, now: float) -> float:
+        with self._lock:
+            return self._levels([(key, 0.0, rate, capacity)], now)[0]
+
+
+BucketStore = MemoryBucketStore | SqliteBucketStore
+
+
+def tenant_from_headers(
+    headers: dict[bytes, bytes], header: str | None, api_keys: dict[str, str]
+) -> str:
+    """Tenant of a request: a trusted tenant header, else its API key, else anonymous.
+
+    API keys listed in ``api_keys`` map to a tenant name; any other key becomes
+    ``key-`` plus a short hash, so raw keys never show up in stats or metrics.
+    """
+    tenant = headers.get(header.lower().encode()) if header else None
+    if tenant:
+        return tenant.decode("latin-1").strip() or ANONYMOUS
+    auth = headers.get(b"authorization", b"").decode("latin-1")
+    key = auth[7:].strip() if auth[:7].lower() == "bearer " else ""
+    key = key or headers.get(b"x-api-key", b"").decode("latin-1").strip()
+    if not key:
+        return ANONYMOUS
+    if key in api_keys:
+        return api_keys[key]
+    return "key-" + hashlib.sha256(key.encode()).hexdigest()[:12]
+
+
+def _prompt_tokens(texts: list[str]) -> int:
+    """About 4 characters a token, plus a few per message for the chat template."""
+    return sum(len(text) // 4 + 4 for text in texts)
+
+
+def estimate_tokens(req: LLMRequest) -> int:
+    """Worst-case tokens of one generation: prompt plus max_tokens."""
+    return _prompt_tokens([m.content for m in req.messages]) + req.max_tokens
+
+
+def estimate_body_tokens(doc: dict[str, Any]) -> tuple[int, int]:
+    """``(prompt, completion budget)`` of one choice of a raw chat-completions body.
+
+    Without ``max_tokens`` the budget is LLMRequest's default; settling against
+    the upstream ``usage`` corrects it either way.
+    """
+    texts = []
+    for message in doc.get("messages") or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if isinstance(content, list):  # content parts
+            content = "".join(
+                part.get("text") or "" for part in content if isinstance(part, dict)
+            )
+        texts.append(content if isinstance(content, str) else "")
+    budget = doc.get("max_completion_tokens") or doc.get("max_tokens")
+    if not isinstance(budget, int) or budget <= 0:
+        budget = DEFAULT_MAX_TOKENS
+    return _prompt_tokens(texts), budget
+
+
+def usage_tokens(usage: Any) -> int | None:
+    """Total tokens from an upstream ``usage`` object, or None if it has none."""
+    if not isinstance(usage, dict):
+        return None
+    if isinstance(usage.get("total_tokens"), int):
+        return usage["total_tokens"]
+    parts = [usage.get("prompt_tokens"), usage.get("completion_tokens")]
+    return sum(parts) if all(isinstance(p, int) for p in parts) else None
+
+
+class Reservation:
+    """What one admitted request was charged; set ``used`` to reconcile on exit."""
+
+    def __init__(self, tenant: str, estimated: int) -> None:
+        self.tenant = tenant
+        self.estimated = estimated
+        self.used: int | None = None
+
+
+class TenantQuotas:
+    """Per-tenant request and token buckets checked before any upstream work.
+
+    A request is charged one request and its worst-case token count
+    (``per_choice`` times ``n``) at admission; once it finishes, the
+    difference to the tokens actually used is returned to (or taken from) the
+    bucket. A tenant over quota waits up to ``max_wait`` seconds for its
+    buckets to refill, then gets 429 with Retry-After. Buckets hold one
+    minute's allowance.
+    """
+
+    def __init__(
+        self,
+        store: BucketStore,
+        default: Quota,
+        overrides: dict[str, Quota],
+        max_wait: float,
+    ) -> None:
+        self.store = store
+        self.default = default
+        self.overrides = overrides
+        self.max_wait = max_wait
+        self.tenants: dict[str, dict[str, int]] = {}
+
+    def quota(self, tenant: str) -> Quota:
+        return self.overrides.get(tenant, self.default)
+
+    async def _call(self, method: Callable[..., T], *args: Any) -> T:
+        """Run a store method, off the event loop if the store can block."""
+        if self.store.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def _demands(self, tenant: str, requests: float, tokens: float) -> list[Demand]:
+        quota = self.quota(tenant)
+        demands = []
+        if quota.requests_per_minute:
+            rate = quota.requests_per_minute
+            demands.append((f"{tenant}:requests", requests, rate / 60, rate))
+        if quota.tokens_per_minute:
+            rate = quota.tokens_per_minute
+            demands.append((f"{tenant}:tokens", tokens, rate / 60, rate))
+        return demands
+
+    def _stats(self, tenant: str) -> tuple[str, dict[str, int]]:
+        if tenant not in self.tenants and tenant not in self.overrides:
+            if len(self.tenants) >= MAX_TRACKED_TENANTS:
+                tenant = "other"
+        stats = self.tenants.get(tenant)
+        if stats is None:
+            stats = self.tenants[tenant] = dict.fromkeys(
+                ("requests", "throttled", "rejected", "tokens_reserved", "tokens_used"), 0
+            )
+        return tenant, stats
+
+    async def admit(self, per_choice: int, n: int = 1) -> Reservation:
+        """Charge the current tenant for ``n`` generations of up to ``per_choice`` tokens.
+
+        Waits for quota, or raises 429.
+        """
+        ctx = current_context()
+        tenant = ctx.tenant
+        quota = self.quota(tenant)
+        estimated = per_choice * n
+        # The scheduler orders waiting generations by class, then by this share.
+        ctx.weight = quota.weight
+        ctx.cost = per_choice
+        if quota.bulk:
+            ctx.priority = BULK
+        label, stats = self._stats(tenant)
+        demands = self._demands(tenant, 1, estimated)
+        budget = self.max_wait
+        remaining = ctx.remaining()
+        if remaining is not None:
+            budget = min(budget, remaining)
+        waited = False
+        while demands:
+            wait = await self._call(self.store.take, demands, time.time())
+            if not wait:
+                break
+            if wait > budget:
+                stats["rejected"] += 1
+                metrics.tenant_requests.inc(label, "rejected")
+                raise Overloaded(429, "Tenant quota exceeded", wait)
+            waited = True
+            budget -= wait
+            await asyncio.sleep(wait)
+        if waited:
+            stats["throttled"] += 1
+            metrics.tenant_requests.inc(label, "throttled")
+        stats["requests"] += 1
+        stats["tokens_reserved"] += estimated
+        metrics.tenant_requests.inc(label, "admitted")
+        return Reservation(tenant, estimated)
+
+    async def settle(self, reservation: Reservation) -> None:
+        """Reconcile the token bucket with what the request actually used."""
+        used = reservation.estimated if reservation.used is None else reservation.used
+        label, stats = self._stats(reservation.tenant)
+        stats["tokens_used"] += used
+        metrics.tenant_tokens.inc(label, amount=used)
+        for demand in self._demands(reservation.tenant, 0, 0):
+            if demand[0].endswith(":tokens"):
+                key, _, rate, capacity = demand
+                refund = (key, reservation.estimated - used, rate, capacity)
+                await self._call(self.store.adjust, refund, time.time())
+
+    @asynccontextmanager
+    async def reserve(self, per_choice: int, n: int = 1) -> AsyncIterator[Reservation]:
+        """Admit the generations for the block and settle on exit.
+
+        An unset ``used`` keeps the estimate, unless the block failed.
+        """
+        reservation = await self.admit(per_choice, n)
+        try:
+            yield reservation
+        except BaseException:
+            if reservation.used is None:
+                reservation.used = 0  # failed before reporting usage: refund it
+            raise
+        finally:
+            await self.settle(reservation)
+
+    def stats(self) -> dict[str, Any]:
+        now = time.time()
+        tenants = {}
+        for tenant, counts in self.tenants.items():
+            quota = self.quota(tenant)
+            levels = {}
+            for key, _, rate, capacity in self._demands(tenant, 0, 0):
+                levels[key.rsplit(":", 1)[1]] = round(self.store.level(key, rate, capacity, now), 1)
+            tenants[tenant] = {
+                **counts,
+                "weight": quota.weight,
+                "requests_per_minute": quota.requests_per_minute,
+                "tokens_per_minute": quota.tokens_per_minute,
+                "bulk": quota.bulk,
+                "available": levels,
+            }
+        return tenants
+
+
+def identify_tenant(headers: dict[bytes, bytes]) -> str:
+    return tenant_from_headers(headers, settings.TENANT_HEADER, settings.TENANT_API_KEYS)
+
+
+_default_quota = Quota(
+    requests_per_minute=settings.TENANT_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.TENANT_TOKENS_PER_MINUTE,
+    weight=settings.TENANT_WEIGHT,
+)
+tenant_quotas = TenantQuotas(
+    SqliteBucketStore(str(Path(settings.STATE_DIR) / QUOTA_DB))
+    if settings.STATE_DIR
+    else MemoryBucketStore(),
+    _default_quota,
+    {
+        tenant: replace(_default_quota, **overrides)
+        for tenant, overrides in settings.TENANT_QUOTAS.items()
+    },
+    max_wait=settings.TENANT_MAX_WAIT_SECONDS,
+)
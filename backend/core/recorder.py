@@ -0,0 +1,182 @@
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from backend.core.context import current_context
+from backend.settings import settings
+
+SERVER_TIMING_HEADER = b"server-timing"
+
+
+def server_timing(timings: dict[str, float], total: float) -> bytes:
+    """Render phase durations (seconds) as a Server-Timing header value."""
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    parts.append(f"app;dur={total * 1000:.1f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class FlightRecorder:
+    """Fixed-size memory of recent requests plus the slowest ones seen so far."""
+
+    def __init__(self, capacity: int, slowest: int) -> None:
+        self.recent: deque[dict[str, Any]] = deque(maxlen=capacity)
+        self.slowest_size = slowest
+        # Min-heap of (duration, seq, entry): the root is the fastest of the slow set.
+        self._slowest: list[tuple[float, int, dict[str, Any]]] = []
+        self._seq = itertools.count()
+        self.recorded = 0
+
+    def record(self, entry: dict[str, Any]) -> None:
+        self.recorded += 1
+        self.recent.append(entry)
+        item = (entry["duration_ms"], next(self._seq), entry)
+        if len(self._slowest) < self.slowest_size:
+            heapq.heappush(self._slowest, item)
+        elif item[0] > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    def snapshot(self, limit: int | None = None) -> dict[str, Any]:
+        """Newest requests first, and the slowest requests, slowest first."""
+        recent = list(reversed(self.recent))
+        slowest = [e for _, _, e in sorted(self._slowest, key=lambda i: (-i[0], i[1]))]
+        return {
+            "recorded": self.recorded,
+            "recent": recent[:limit] if limit else recent,
+            "slowest": slowest[:limit] if limit else slowest,
+        }
+
+    def clear(self) -> None:
+        self.recent.clear()
+        self._slowest.clear()
+        self.recorded = 0
+
+
+class SamplingProfiler:
+    """Background thread that samples the event-loop thread's stack.
+
+    Samples are kept for ``window`` seconds, so when a slow request finishes
+    the stacks seen during its lifetime can be attached to its record. The
+    loop is shared, so a profile also shows what concurrent requests were
+    doing; idle time shows up as the selector's wait.
+    """
+
+    def __init__(self, interval: float, window: float, top: int = 20) -> None:
+        self.interval = interval
+        self.top = top
+        self._samples: deque[tuple[float, tuple[str, ...]]] = deque(
+            maxlen=max(1, int(window / interval))
+        )
+        self._target: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Start sampling the calling thread (call from the event loop)."""
+        if self._thread is not None:
+            return
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)  # type: ignore[arg-type]
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self._samples.append((time.monotonic(), tuple(reversed(stack))))
+
+    def profile(self, start: float, end: float) -> list[dict[str, Any]]:
+        """Most frequent collapsed stacks sampled between two monotonic timestamps."""
+        counts = Counter(stack for at, stack in list(self._samples) if start <= at <= end)
+        return [
+            {"stack": ";".join(stack), "samples": n} for stack, n in counts.most_common(self.top)
+        ]
+
+
+class FlightRecorderMiddleware:
+    """Return phase timings as Server-Timing and keep a record of every request.
+
+    Must run inside RequestContextMiddleware. Phases that finish after the
+    headers go out (a stream's generation) are not in the header but are in
+    the recorded entry.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        recorder: FlightRecorder,
+        profiler: SamplingProfiler | None = None,
+        profile_threshold: float | None = None,
+    ) -> None:
+        self.app = app
+        self.recorder = recorder
+        self.profiler = profiler
+        self.profile_threshold = profile_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ctx = current_context()
+        wall = time.time()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(ctx.timings, time.monotonic() - ctx.started)
+                message["headers"] = [*message.get("headers", []), (SERVER_TIMING_HEADER, header)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end = time.monotonic()
+            duration = end - ctx.started
+            route = scope.get("route")
+            entry: dict[str, Any] = {
+                "method": scope["method"],
+                "route": getattr(route, "path", None) or "unmatched",
+                "path": scope["path"],
+                "status": status,
+                "started_at": wall,
+                "duration_ms": round(duration * 1000, 1),
+                "priority": ctx.priority,
+                "phases_ms": {k: round(v * 1000, 1) for k, v in ctx.timings.items()},
+            }
+            if (
+                self.profiler is not None
+                and self.profiler.running
+                and self.profile_threshold is not None
+                and duration >= self.profile_threshold
+            ):
+                entry["profile"] = self.profiler.profile(ctx.started, end)
+            self.recorder.record(entry)
+
+
+flight_recorder = FlightRecorder(settings.RECORDER_CAPACITY, settings.RECORDER_SLOWEST)
+profiler = SamplingProfiler(settings.PROFILE_INTERVAL_SECONDS, settings.PROFILE_WINDOW_SECONDS)
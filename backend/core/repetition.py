@@ -0,0 +1,64 @@
+from collections import deque
+
+
+class RepetitionGuard:
+    """Detect degenerate looping in a token stream.
+
+    Every token completes an n-gram of the last ``ngram`` tokens; the guard
+    trips once any n-gram has occurred ``max_repeats`` times within the last
+    ``window`` tokens. Each step is O(1) amortized: one tuple hash, one dict
+    increment and at most one decrement for the n-gram leaving the window.
+    """
+
+    def __init__(self, ngram: int = 8, window: int = 256, max_repeats: int = 4) -> None:
+        self.ngram = ngram
+        self.window = window
+        self.max_repeats = max_repeats
+        self._recent: deque[str] = deque(maxlen=ngram)
+        self._grams: deque[int] = deque()
+        self._counts: dict[int, int] = {}
+        self.tokens = 0
+        self.tripped = False
+
+    def feed(self, token: str) -> bool:
+        """Add one token; return True once the stream is looping."""
+        self.tokens += 1
+        self._recent.append(token)
+        if len(self._recent) < self.ngram:
+            return False
+
+        if len(self._grams) == self.window:
+            old = self._grams.popleft()
+            left = self._counts[old] - 1
+            if left:
+                self._counts[old] = left
+            else:
+                del self._counts[old]
+
+        gram = hash(tuple(self._recent))
+        self._grams.append(gram)
+        count = self._counts.get(gram, 0) + 1
+        self._counts[gram] = count
+
+        if count >= self.max_repeats:
+            self.tripped = True
+        return self.tripped
+
+
+class RepetitionStats:
+    """How often the guard fired and how much generation it cut short."""
+
+    def __init__(self) -> None:
+        self.streams = 0
+        self.tripped = 0
+        self.tokens_saved = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "streams": self.streams,
+            "tripped": self.tripped,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+repetition_stats = RepetitionStats()
@@ -0,0 +1,86 @@
+import asyncio
+import random
+from typing import AsyncGenerator, Awaitable, Callable, TypeVar
+import httpx
+from backend.core.breaker import CircuitOpen
+from backend.core.context import current_context
+
+T = TypeVar("T")
+
+# Worth another try: the upstream was unreachable, restarting or overloaded. A read
+# timeout is not retried, since it has already used up a full timeout.
+_RETRY_STATUSES = {502, 503, 504}
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, CircuitOpen):
+        return False
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in _RETRY_STATUSES
+    return isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError))
+
+
+class RetryPolicy:
+    """Jittered exponential backoff ("full jitter") for calls that produced no output."""
+
+    def __init__(self, attempts: int, base_delay: float, max_delay: float) -> None:
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.gave_up = 0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    async def _pause(self, attempt: int, exc: BaseException) -> None:
+        """Sleep before retry ``attempt`` or re-raise ``exc`` if no retry is allowed."""
+        delay = self.backoff(attempt)
+        remaining = current_context().remaining()
+        if (
+            attempt >= self.attempts
+            or not is_retryable(exc)
+            or (remaining is not None and remaining <= delay)
+        ):
+            if attempt and is_retryable(exc):
+                self.gave_up += 1
+            raise exc
+        self.retries += 1
+        await asyncio.sleep(delay)
+
+    async def call(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Await ``call()``, retrying retryable failures up to ``attempts`` more times."""
+        attempt = 0
+        while True:
+            try:
+                return await call()
+            except Exception as e:
+                await self._pause(attempt, e)
+            attempt += 1
+
+    async def stream(
+        self, open_stream: Callable[[], AsyncGenerator[bytes, None]]
+    ) -> AsyncGenerator[bytes, None]:
+        """Relay ``open_stream()``, reopening it on failures before the first chunk."""
+        attempt = 0
+        while True:
+            gen = open_stream()
+            try:
+                first = await anext(gen)
+            except StopAsyncIteration:
+                return
+            except Exception as e:
+                await gen.aclose()
+                await self._pause(attempt, e)
+                attempt += 1
+                continue
+            break
+        try:
+            yield first
+            async for chunk in gen:
+                yield chunk
+        finally:
+            await gen.aclose()
+
+    def stats(self) -> dict[str, int]:
+        return {"retries": self.retries, "gave_up": self.gave_up}
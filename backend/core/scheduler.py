@@ -0,0 +1,284 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import httpx
+from backend.core import metrics
+from backend.core.context import (
+    BULK,
+    INTERACTIVE,
+    DeadlineExceeded,
+    RequestContext,
+    current_context,
+)
+from backend.core.limiter import AIMDLimit
+from backend.settings import settings
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted; mapped to 429/503 + Retry-After."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def is_upstream_failure(exc: BaseException | None) -> bool:
+    """Errors that signal an overloaded or unhealthy upstream (not caller mistakes)."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TimeoutException, httpx.TransportError))
+
+
+class Slot:
+    """A held upstream slot; callers report token progress for latency tracking."""
+
+    def __init__(self) -> None:
+        self.start = time.monotonic()
+        self.headers_at: float | None = None
+        self.first_token_at: float | None = None
+        self.tokens = 0
+
+    def headers(self) -> None:
+        """Mark the upstream response headers as received (end of the connect phase)."""
+        self.headers_at = time.monotonic()
+
+    def token(self, count: int = 1) -> None:
+        """Record streamed tokens (the first call marks time-to-first-token)."""
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+        self.tokens += count
+
+
+def _record_phases(ctx: RequestContext, held: Slot) -> None:
+    """Split a slot's lifetime into connect / ttft / generate for the flight recorder."""
+    end = time.monotonic()
+    mark = held.start
+    if held.headers_at is not None:
+        ctx.record("connect", held.headers_at - mark)
+        mark = held.headers_at
+    if held.first_token_at is not None:
+        ctx.record("ttft", held.first_token_at - mark)
+        mark = held.first_token_at
+    ctx.record("generate", end - mark)
+
+
+class AdmissionScheduler:
+    """Cap concurrent upstream generations behind a bounded priority queue.
+
+    With a ``limiter`` the cap follows its adaptive limit; otherwise it is fixed.
+    Within a priority class, waiters are served by weighted fair queuing across
+    tenants: each gets a virtual finish time of ``start + cost / weight``, where
+    ``start`` is the later of the current virtual time and the tenant's previous
+    finish. A tenant with a deep backlog therefore can't starve a light one.
+    A single tenant is served in arrival order.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeouts: dict[int, float],
+        limiter: AIMDLimit | None = None,
+    ) -> None:
+        self.fixed_limit = max_concurrency
+        self.limiter = limiter
+        self.max_queue = max_queue
+        self.queue_timeouts = queue_timeouts
+        self.active = 0
+        # Heap of (priority, finish, seq, future); futures cancelled by timeouts stay
+        # in the heap and are skipped when popped, so `waiting` tracks the live count.
+        self._queue: list[tuple[int, float, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        # Fair queuing: virtual time of the last admitted waiter, last finish per tenant.
+        self._vtime = 0.0
+        self._finish: dict[str, float] = {}
+        self.waiting = {INTERACTIVE: 0, BULK: 0}
+        # Smoothed seconds one generation holds a slot; None until observed.
+        self.service_time: float | None = None
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_deadline = 0
+
+    @property
+    def limit(self) -> int:
+        return self.limiter.current if self.limiter is not None else self.fixed_limit
+
+    def estimated_wait(self, priority: int) -> float:
+        """Rough wait for a new arrival: work queued at or above its priority / slots."""
+        if self.service_time is None or self.limit <= 0:
+            return 0.0
+        ahead = sum(n for p, n in self.waiting.items() if p <= priority)
+        return (ahead + 1) * self.service_time / self.limit
+
+    async def acquire(
+        self,
+        priority: int,
+        timeout: float,
+        tenant: str = "",
+        weight: float = 1.0,
+        cost: float = 1.0,
+    ) -> None:
+        """Wait for a free slot, or raise Overloaded if the queue can't take us in time."""
+        if self.active < self.limit and not any(self.waiting.values()):
+            self.active += 1
+            self.admitted += 1
+            return
+
+        if sum(self.waiting.values()) >= self.max_queue:
+            self.rejected_full += 1
+            raise Overloaded(429, "Upstream queue is full", self.estimated_wait(priority))
+        estimate = self.estimated_wait(priority)
+        if estimate > timeout:
+            self.rejected_deadline += 1
+            raise Overloaded(503, "Queue wait would exceed the deadline", estimate)
+
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        finish = self._tag(tenant, weight, cost)
+        heapq.heappush(self._queue, (priority, finish, next(self._seq), fut))
+        self.waiting[priority] += 1
+        try:
+            await asyncio.wait_for(fut, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if fut.done() and not fut.cancelled():
+                # Granted a slot at the same moment we gave up: hand it on.
+                self.release()
+            else:
+                self.waiting[priority] -= 1
+                fut.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected_deadline += 1
+                raise Overloaded(
+                    503, "Timed out waiting for an upstream slot", self.estimated_wait(priority)
+                ) from None
+            raise
+        self.admitted += 1
+
+    def _tag(self, tenant: str, weight: float, cost: float) -> float:
+        finish = max(self._vtime, self._finish.get(tenant, 0.0)) + cost / max(weight, 1e-3)
+        self._finish[tenant] = finish
+        if len(self._finish) > 1024:
+            # Tenants at or behind the virtual time would start from it anyway.
+            self._finish = {t: f for t, f in self._finish.items() if f > self._vtime}
+        return finish
+
+    def release(self, held_for: float | None = None) -> None:
+        """Return a slot, fold its hold time into the estimate, and admit waiters."""
+        self.active -= 1
+        if held_for is not None:
+            self.service_time = (
+                held_for
+                if self.service_time is None
+                else 0.8 * self.service_time + 0.2 * held_for
+            )
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, priority: int | None = None) -> AsyncIterator[Slot]:
+        """Hold one upstream slot for the duration of the block."""
+        ctx = current_context()
+        if priority is None:
+            priority = ctx.priority
+        timeout = self.queue_timeouts[priority]
+        if ctx.queue_timeout is not None:
+            timeout = min(timeout, ctx.queue_timeout)
+        # The queue deadline runs from request arrival, so fan-out siblings share it,
+        # and never outlives the request's own end-to-end deadline.
+        remaining = ctx.started + timeout - time.monotonic()
+        deadline_left = ctx.remaining()
+        if deadline_left is not None:
+            ctx.check_deadline()
+            remaining = min(remaining, deadline_left)
+        remaining = max(0.0, remaining)
+        with ctx.phase("queue"):
+            await self.acquire(priority, remaining, ctx.tenant, ctx.weight, ctx.cost)
+        held = Slot()
+        try:
+            yield held
+        except (asyncio.CancelledError, DeadlineExceeded):
+            # The caller went away or ran out of time; that says nothing about
+            # upstream latency.
+            self.release()
+            raise
+        except BaseException as e:
+            self._observe(held, ok=not is_upstream_failure(e))
+            raise
+        else:
+            self._observe(held, ok=True)
+        finally:
+            _record_phases(ctx, held)
+
+    def _observe(self, held: Slot, ok: bool) -> None:
+        end = time.monotonic()
+        ttft = per_token = None
+        if held.first_token_at is not None:
+            ttft = held.first_token_at - held.start
+            metrics.upstream_ttft.observe(ttft)
+            if held.tokens > 1:
+                decode = end - held.first_token_at
+                per_token = decode / (held.tokens - 1)
+                metrics.upstream_inter_token.observe(per_token)
+                if decode > 0:
+                    metrics.upstream_tokens_per_second.observe((held.tokens - 1) / decode)
+        elif held.tokens:
+            # Non-streamed: only the total is known, spread it over the tokens.
+            per_token = (end - held.start) / held.tokens
+        metrics.upstream_generations.inc("ok" if ok else "error")
+        if self.limiter is not None:
+            # `active` still counts this slot, i.e. the concurrency it ran under.
+            self.limiter.observe(self.active, ttft=ttft, per_token=per_token, ok=ok)
+        self.release(end - held.start)
+
+    def stats(self) -> dict[str, object]:
+        """Snapshot of slot usage, queue depth and rejection counters."""
+        return {
+            "limit": self.limit,
+            "adaptive": self.limiter.stats() if self.limiter is not None else None,
+            "active": self.active,
+            "waiting": {"interactive": self.waiting[INTERACTIVE], "bulk": self.waiting[BULK]},
+            "service_time": self.service_time,
+            "admitted": self.admitted,
+            "rejected_full": self.rejected_full,
+            "rejected_deadline": self.rejected_deadline,
+        }
+
+    def _wake(self) -> None:
+        while self.active < self.limit and self._queue:
+            priority, finish, _, fut = heapq.heappop(self._queue)
+            if fut.done():
+                continue
+            self._vtime = max(self._vtime, finish)
+            self.waiting[priority] -= 1
+            self.active += 1
+            fut.set_result(None)
+
+
+# With several worker processes each gets an equal share of the server-wide caps.
+scheduler = AdmissionScheduler(
+    max_concurrency=settings.per_worker(settings.SCHED_MAX_CONCURRENCY),
+    max_queue=settings.per_worker(settings.SCHED_MAX_QUEUE),
+    queue_timeouts={
+        INTERACTIVE: settings.SCHED_QUEUE_TIMEOUT_INTERACTIVE,
+        BULK: settings.SCHED_QUEUE_TIMEOUT_BULK,
+    },
+    limiter=(
+        AIMDLimit(
+            initial=settings.per_worker(settings.SCHED_INITIAL_CONCURRENCY),
+            min_limit=settings.SCHED_MIN_CONCURRENCY,
+            max_limit=settings.per_worker(settings.SCHED_MAX_CONCURRENCY),
+            tolerance=settings.SCHED_LATENCY_TOLERANCE,
+            decrease=settings.SCHED_DECREASE_FACTOR,
+        )
+        if settings.SCHED_ADAPTIVE
+        else None
+    ),
+)
+
+# Exported gauges read live scheduler state at scrape time.
+metrics.upstream_in_flight.function = lambda: scheduler.active
+metrics.upstream_queued.function = lambda: sum(scheduler.waiting.values())
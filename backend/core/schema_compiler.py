@@ -0,0 +1,152 @@
+import re
+from collections import OrderedDict
+from typing import Any, Literal, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, create_model
+from backend.core.keys import canonical_hash
+
+_SCALARS: dict[str, Any] = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "null": type(None),
+}
+# JSON Schema keyword -> pydantic Field constraint, per type.
+_CONSTRAINTS = {
+    "string": {"minLength": "min_length", "maxLength": "max_length", "pattern": "pattern"},
+    "integer": {"minimum": "ge", "maximum": "le"},
+    "number": {"minimum": "ge", "maximum": "le"},
+    "array": {"minItems": "min_length", "maxItems": "max_length"},
+}
+_MAX_DEPTH = 8
+
+
+class SchemaError(ValueError):
+    """The JSON Schema uses something outside the supported subset."""
+
+
+def _model_name(path: str) -> str:
+    return "".join(part.capitalize() for part in re.split(r"[^0-9a-zA-Z]+", path) if part)
+
+
+def _annotation(schema: Any, path: str, depth: int) -> tuple[Any, dict[str, Any]]:
+    """Python type plus Field constraints for one (sub)schema."""
+    if not isinstance(schema, dict):
+        raise SchemaError(f"{path}: schema must be an object")
+    if depth > _MAX_DEPTH:
+        raise SchemaError(f"{path}: nested deeper than {_MAX_DEPTH} levels")
+
+    if "enum" in schema:
+        values = schema["enum"]
+        if not isinstance(values, list) or not values:
+            raise SchemaError(f"{path}: enum must be a non-empty list")
+        return Literal[tuple(values)], {}
+
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        if not kind:
+            raise SchemaError(f"{path}: type list is empty")
+        members = [_annotation({**schema, "type": k}, path, depth)[0] for k in kind]
+        return Union[tuple(members)], {}
+
+    constraints = {
+        field: schema[keyword]
+        for keyword, field in _CONSTRAINTS.get(kind, {}).items()  # type: ignore[arg-type]
+        if keyword in schema
+    }
+    if kind in _SCALARS:
+        return _SCALARS[kind], constraints
+    if kind == "array":
+        items = schema.get("items", {"type": "string"})
+        item, item_constraints = _annotation(items, f"{path}[]", depth + 1)
+        if item_constraints:
+            raise SchemaError(f"{path}[]: constraints on array items are not supported")
+        return list[item], constraints  # type: ignore[valid-type]
+    if kind == "object":
+        if "properties" not in schema:
+            return dict[str, Any], {}
+        return _object_model(schema, path, depth + 1), {}
+    raise SchemaError(f"{path}: unsupported type {kind!r}")
+
+
+def _object_model(schema: dict[str, Any], path: str, depth: int) -> type[BaseModel]:
+    properties = schema.get("properties")
+    if not isinstance(properties, dict) or not properties:
+        raise SchemaError(f"{path}: properties must be a non-empty object")
+    required = set(schema.get("required", []))
+    unknown = required - properties.keys()
+    if unknown:
+        raise SchemaError(f"{path}: required names unknown properties {sorted(unknown)}")
+
+    fields: dict[str, Any] = {}
+    for i, (key, sub) in enumerate(properties.items()):
+        annotation, constraints = _annotation(sub, f"{path}.{key}", depth)
+        # Keys that aren't identifiers or clash with BaseModel attributes go through an alias.
+        name = key
+        if not key.isidentifier() or key.startswith("_") or hasattr(BaseModel, key):
+            name = f"field_{i}"
+            constraints["alias"] = key
+        if key in required:
+            fields[name] = (annotation, Field(**constraints))
+        else:
+            fields[name] = (Optional[annotation], Field(None, **constraints))
+
+    extra = "forbid" if schema.get("additionalProperties") is False else "ignore"
+    return create_model(  # type: ignore[call-overload,no-any-return]
+        _model_name(path) or "Root",
+        __config__=ConfigDict(extra=extra, populate_by_name=True),
+        **fields,
+    )
+
+
+def compile_schema(schema: dict[str, Any], name: str) -> type[BaseModel]:
+    """Turn a JSON Schema subset into a Pydantic model.
+
+    Supports objects (properties, required, additionalProperties: false),
+    arrays (items, minItems/maxItems), scalars with common bounds, enums and
+    type unions. Anything else raises :class:`SchemaError`.
+    """
+    if not isinstance(schema, dict) or schema.get("type") != "object":
+        raise SchemaError("the top-level schema must have type 'object'")
+    try:
+        return _object_model(schema, name, 0)
+    except SchemaError:
+        raise
+    except Exception as e:  # e.g. a bad regex pattern or unhashable enum value
+        raise SchemaError(str(e)) from e
+
+
+class SchemaCompiler:
+    """Compiled models by schema hash, so identical schemas compile once (LRU-bounded)."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._models: OrderedDict[str, type[BaseModel]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def compile(self, schema: dict[str, Any], name: str) -> tuple[str, type[BaseModel]]:
+        """Return ``(schema_hash, model)``, compiling only on a cache miss."""
+        digest = canonical_hash("schema", schema)
+        model = self._models.get(digest)
+        if model is not None:
+            self.hits += 1
+            self._models.move_to_end(digest)
+            return digest, model
+
+        self.misses += 1
+        model = compile_schema(schema, name)
+        self._models[digest] = model
+        while len(self._models) > self.max_entries:
+            self._models.popitem(last=False)
+            self.evictions += 1
+        return digest, model
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._models),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,228 @@
+import itertools
+import logging
+import re
+import zlib
+from typing import Any, Awaitable, Callable
+from backend.core import jsonio, metrics
+from backend.core.keys import canonical_hash
+
+try:  # in requirements.txt; only the semantic cache needs it
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Maps a batch of texts to one embedding vector each.
+Embedder = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+class HashingEmbedder:
+    """Local bag-of-words embedder (feature hashing); no model or network needed.
+
+    Word order and punctuation don't matter, so it catches reordered paraphrases
+    ("Texas-style chili recipe" vs "chili recipe Texas style") but not synonyms.
+    """
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = dim
+
+    async def __call__(self, texts: list[str]) -> list[list[float]]:
+        out = []
+        for text in texts:
+            vector = [0.0] * self.dim
+            for word in _WORD.findall(text.lower()):
+                h = zlib.crc32(word.encode())
+                vector[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+            out.append(vector)
+        return out
+
+
+def semantic_scope(payload: dict[str, Any]) -> tuple[str, str] | None:
+    """``(scope, text)`` for an upstream payload: the final user message is embedded,
+    and everything else that shapes the answer (response format, system prompt,
+    earlier turns, sampling parameters) must match exactly. None if the last
+    message isn't a user's.
+    """
+    messages = payload.get("messages") or []
+    if not messages or messages[-1].get("role") != "user":
+        return None
+    context = {**payload, "messages": messages[:-1]}
+    return canonical_hash("semantic", context), messages[-1].get("content") or ""
+
+
+class SemanticCache:
+    """Nearest-neighbour response cache over one contiguous matrix of unit vectors.
+
+    Rows from every scope share the matrix; a lookup is one matrix-vector
+    product with rows from other scopes masked out. Entries are evicted least
+    recently used once ``max_entries`` or ``max_bytes`` (vectors plus values)
+    would be exceeded; a scope is forgotten with its last entry. A
+    ``max_entries`` below 1 turns the cache off.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        *,
+        threshold: float,
+        max_entries: int,
+        max_bytes: int,
+        enabled: bool = True,
+    ) -> None:
+        enabled = enabled and max_entries > 0
+        if enabled and np is None:
+            raise RuntimeError("SEMANTIC_CACHE_ENABLED is set but numpy is not installed")
+        self.enabled = enabled
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._scope_ids: dict[str, int] = {}
+        self._scope_names: dict[int, str] = {}  # the reverse, to drop emptied scopes
+        self._next_sid = itertools.count()
+        self._values: list[Any] = []
+        self._vectors: Any = None  # np.ndarray (capacity, dim), float32 unit rows
+        self._scopes: Any = None  # np.ndarray (capacity,), scope id per row
+        self._used: Any = None  # np.ndarray (capacity,), last-use tick; 0 = free row
+        self._sizes: Any = None  # np.ndarray (capacity,), bytes per row
+        self._tick = 0
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.evictions = 0
+
+    @property
+    def entries(self) -> int:
+        return 0 if self._used is None else int(np.count_nonzero(self._used))
+
+    async def embed(self, text: str) -> Any | None:
+        """Unit-length float32 embedding of ``text``, or None if embedding failed."""
+        try:
+            (raw,) = await self.embedder([text])
+        except Exception as e:  # the cache must never fail the request
+            self.errors += 1
+            metrics.semantic_cache_lookups.inc("error")
+            logger.warning("semantic cache embedding failed: %s", e)
+            return None
+        vector = np.asarray(raw, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if not norm:
+            return None
+        return vector / norm
+
+    def lookup(self, scope: str, vector: Any) -> Any | None:
+        """The cached value most similar to ``vector`` within ``scope``, if close enough."""
+        sid = self._scope_ids.get(scope)
+        best = -1.0
+        row = -1
+        vectors = self._vectors
+        if sid is not None and vectors is not None and vector.shape[0] == vectors.shape[1]:
+            sims = vectors @ vector
+            sims[(self._scopes != sid) | (self._used == 0)] = -np.inf
+            row = int(np.argmax(sims))
+            best = float(sims[row])
+        if best >= self.threshold:
+            self.hits += 1
+            self._tick += 1
+            self._used[row] = self._tick
+            metrics.semantic_cache_lookups.inc("hit")
+            metrics.semantic_cache_similarity.observe(best)
+            return self._values[row]
+        self.misses += 1
+        metrics.semantic_cache_lookups.inc("miss")
+        if best > -1.0:
+            metrics.semantic_cache_similarity.observe(max(best, 0.0))
+        return None
+
+    def store(self, scope: str, vector: Any, value: Any) -> None:
+        if self.max_entries < 1:
+            return
+        size = vector.nbytes + len(jsonio.dumps(value))
+        if size > self.max_bytes:
+            return
+        if self._vectors is None or vector.shape[0] != self._vectors.shape[1]:
+            self._reset(vector.shape[0])
+        while self._bytes + size > self.max_bytes or self.entries >= self.max_entries:
+            if not self._evict():
+                break
+
+        free = np.flatnonzero(self._used == 0)
+        if not len(free):
+            self._grow()
+            free = np.flatnonzero(self._used == 0)
+        row = int(free[0])
+        sid = self._scope_ids.get(scope)
+        if sid is None:
+            sid = self._scope_ids[scope] = next(self._next_sid)
+            self._scope_names[sid] = scope
+        self._tick += 1
+        self._vectors[row] = vector
+        self._scopes[row] = sid
+        self._used[row] = self._tick
+        self._sizes[row] = size
+        self._values[row] = value
+        self._bytes += size
+
+    def clear(self) -> None:
+        self._vectors = self._scopes = self._used = self._sizes = None
+        self._values = []
+        self._scope_ids.clear()
+        self._scope_names.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "entries": self.entries,
+            "bytes": self._bytes,
+            "scopes": len(self._scope_ids),
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "evictions": self.evictions,
+            "threshold": self.threshold,
+        }
+
+    def _reset(self, dim: int, capacity: int = 64) -> None:
+        # A new embedding dimension (model change) invalidates every stored vector.
+        capacity = min(capacity, self.max_entries)
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._scopes = np.full(capacity, -1, dtype=np.int64)
+        self._used = np.zeros(capacity, dtype=np.int64)
+        self._sizes = np.zeros(capacity, dtype=np.int64)
+        self._values = [None] * capacity
+        self._scope_ids.clear()
+        self._scope_names.clear()
+        self._bytes = 0
+
+    def _grow(self) -> None:
+        old = len(self._used)
+        new = min(old * 2, self.max_entries)
+        extra = new - old
+        self._vectors = np.concatenate(
+            [self._vectors, np.zeros((extra, self._vectors.shape[1]), dtype=np.float32)]
+        )
+        self._scopes = np.concatenate([self._scopes, np.full(extra, -1, dtype=np.int64)])
+        self._used = np.concatenate([self._used, np.zeros(extra, dtype=np.int64)])
+        self._sizes = np.concatenate([self._sizes, np.zeros(extra, dtype=np.int64)])
+        self._values.extend([None] * extra)
+
+    def _evict(self) -> bool:
+        live = np.flatnonzero(self._used)
+        if not len(live):
+            return False
+        row = int(live[np.argmin(self._used[live])])
+        self._bytes -= int(self._sizes[row])
+        self._used[row] = 0
+        self._sizes[row] = 0
+        self._values[row] = None
+        sid = int(self._scopes[row])
+        self._scopes[row] = -1
+        if not np.any((self._scopes == sid) & (self._used != 0)):
+            del self._scope_ids[self._scope_names.pop(sid)]
+        self.evictions += 1
+        return True
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+from backend.core.metrics import MetricsRegistry
+from backend.settings import settings
+
+SHARED_DB = "shared.sqlite3"  # under STATE_DIR; backend.serve resets it on start
+
+
+def connect(path: str | Path) -> sqlite3.Connection:
+    """A sqlite connection several worker processes can read and write at once."""
+    db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+    # WAL lets readers proceed while another process writes.
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+class SharedState:
+    """State the worker processes of one server share, in a sqlite file under STATE_DIR.
+
+    Each worker publishes its metrics snapshot every ``publish_interval``
+    seconds (and before serving a scrape), so ``/metrics`` on any worker
+    reports totals for the whole server. A worker that has not published for
+    ``stale_after`` seconds is treated as exited: its counters still count,
+    its gauges no longer do.
+    """
+
+    def __init__(self, path: str | Path, publish_interval: float) -> None:
+        self.publish_interval = publish_interval
+        self.stale_after = max(5.0, 3 * publish_interval)
+        # Not the pid: a restarted worker may reuse one, and must not overwrite totals.
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._db = connect(path)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS worker_metrics "
+                "(worker TEXT PRIMARY KEY, updated_at REAL NOT NULL, snapshot TEXT NOT NULL)"
+            )
+        self._task: asyncio.Task[None] | None = None
+
+    def reset(self) -> None:
+        """Forget every worker's metrics, so a new server starts from zero."""
+        with self._db:
+            self._db.execute("DELETE FROM worker_metrics")
+
+    def publish(self, registry: MetricsRegistry, *, retire: bool = False) -> None:
+        # A retired worker's row is stamped 0 so it counts as exited at once.
+        updated_at = 0.0 if retire else time.time()
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO worker_metrics VALUES (?, ?, ?)",
+                (self.worker_id, updated_at, json.dumps(registry.snapshot())),
+            )
+
+    def render_metrics(self, registry: MetricsRegistry) -> str:
+        """Prometheus text summed over every worker, this one up to date."""
+        self.publish(registry)
+        cutoff = time.time() - self.stale_after
+        live: list[dict[str, Any]] = []
+        retired: list[dict[str, Any]] = []
+        for updated_at, snapshot in self._db.execute(
+            "SELECT updated_at, snapshot FROM worker_metrics"
+        ):
+            (live if updated_at >= cutoff else retired).append(json.loads(snapshot))
+        return registry.render(live, retired)
+
+    def workers(self) -> int:
+        """Workers that published recently, this one included."""
+        cutoff = time.time() - self.stale_after
+        return self._db.execute(
+            "SELECT COUNT(*) FROM worker_metrics WHERE updated_at >= ?", (cutoff,)
+        ).fetchone()[0]
+
+    def start(self, registry: MetricsRegistry) -> None:
+        if self._task is None:
+            self.publish(registry)
+            self._task = asyncio.create_task(self._run(registry), name="shared-state")
+
+    async def stop(self, registry: MetricsRegistry) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            # Final counters, kept after this worker exits.
+            self.publish(registry, retire=True)
+
+    async def _run(self, registry: MetricsRegistry) -> None:
+        while True:
+            await asyncio.sleep(self.publish_interval)
+            self.publish(registry)
+
+
+shared_state = (
+    SharedState(Path(settings.STATE_DIR) / SHARED_DB, settings.METRICS_PUBLISH_SECONDS)
+    if settings.STATE_DIR
+    else None
+)
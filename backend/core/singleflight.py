@@ -0,0 +1,132 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with the same key."""
+
+    def __init__(self) -> None:
+        # key -> (task running the call, number of callers waiting on it)
+        self._inflight: dict[str, list[Any]] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` once per key; callers arriving meanwhile await the same result."""
+        entry = self._inflight.get(key)
+        if entry is None:
+            # The call runs in its own task so a leader that goes away (e.g. client
+            # disconnect) doesn't cancel the work other callers are waiting for.
+            task = asyncio.ensure_future(fn())
+            entry = [task, 0]
+            self._inflight[key] = entry
+            task.add_done_callback(lambda _t: self._forget(key, entry))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0])
+        finally:
+            entry[1] -= 1
+            # Nobody is left to receive the result: stop the upstream work.
+            if entry[1] == 0 and not entry[0].done():
+                entry[0].cancel()
+
+    def stats(self) -> dict[str, int]:
+        """Snapshot of leader/coalesced counts and current in-flight keys."""
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+    def _forget(self, key: str, entry: list[Any]) -> None:
+        if self._inflight.get(key) is entry:
+            del self._inflight[key]
+
+
+class _Channel:
+    """Buffered output of one upstream stream plus its live subscribers."""
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self.subscribers = 0
+        self.changed = asyncio.Event()
+        self.task: asyncio.Task[None] | None = None
+
+    def notify(self) -> None:
+        # Wake every waiting subscriber, then arm a fresh event for the next chunk.
+        event, self.changed = self.changed, asyncio.Event()
+        event.set()
+
+
+class StreamBroadcast:
+    """Single-flight for streams: late joiners replay the buffered prefix, then go live."""
+
+    def __init__(self) -> None:
+        self._channels: dict[str, _Channel] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def subscribe(
+        self, key: str, factory: Callable[[], AsyncIterator[bytes]]
+    ) -> AsyncIterator[bytes]:
+        """Yield the chunks of the stream for ``key``, starting it if needed."""
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = _Channel()
+            self._channels[key] = channel
+            channel.task = asyncio.ensure_future(self._pump(key, channel, factory))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        channel.subscribers += 1
+        index = 0
+        try:
+            while True:
+                if index < len(channel.chunks):
+                    yield channel.chunks[index]
+                    index += 1
+                elif channel.done:
+                    if channel.error is not None:
+                        raise channel.error
+                    return
+                else:
+                    await channel.changed.wait()
+        finally:
+            channel.subscribers -= 1
+            if channel.subscribers == 0 and channel.task is not None:
+                channel.task.cancel()
+
+    def stats(self) -> dict[str, int]:
+        """Snapshot of leader/coalesced counts and currently broadcasting streams."""
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "inflight": len(self._channels),
+        }
+
+    async def _pump(
+        self, key: str, channel: _Channel, factory: Callable[[], AsyncIterator[bytes]]
+    ) -> None:
+        try:
+            async for chunk in factory():
+                channel.chunks.append(chunk)
+                channel.notify()
+        except asyncio.CancelledError:
+            channel.error = asyncio.CancelledError()
+            raise
+        except Exception as e:  # surfaced to every subscriber
+            channel.error = e
+        finally:
+            channel.done = True
+            if self._channels.get(key) is channel:
+                del self._channels[key]
+            channel.notify()
@@ -0,0 +1,85 @@
+import asyncio
+from typing import Any, AsyncGenerator, AsyncIterator
+
+
+async def prime_stream(gen: AsyncIterator[bytes]) -> AsyncGenerator[bytes, None]:
+    """Pull the first chunk now so admission/upstream errors become HTTP errors.
+
+    Once a StreamingResponse has sent its headers the status can no longer
+    change, so routers await this before building the response.
+    """
+    try:
+        first = await anext(gen)
+    except StopAsyncIteration:
+        first = None
+
+    async def replay() -> AsyncGenerator[bytes, None]:
+        if first is None:
+            return
+        try:
+            yield first
+            async for chunk in gen:
+                yield chunk
+        finally:
+            aclose = getattr(gen, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    return replay()
+
+
+async def coalesce(
+    gen: AsyncIterator[bytes], interval: float, max_bytes: int
+) -> AsyncGenerator[bytes, None]:
+    """Merge small chunks into writes of up to ``max_bytes`` or ``interval`` seconds.
+
+    The first chunk is sent at once so time-to-first-byte is unchanged; after
+    that a chunk waits at most ``interval`` for company, even if the source
+    goes quiet. ``interval <= 0`` passes chunks through untouched.
+    """
+    if interval <= 0:
+        async for chunk in gen:
+            yield chunk
+        return
+
+    loop = asyncio.get_running_loop()
+    buffer = bytearray()
+    flush_at = 0.0
+    pending: asyncio.Future[Any] | None = None
+    try:
+        try:
+            yield await anext(gen)
+        except StopAsyncIteration:
+            return
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(gen))
+            if buffer:
+                done, _ = await asyncio.wait({pending}, timeout=flush_at - loop.time())
+                if not done:
+                    yield bytes(buffer)
+                    buffer.clear()
+                    continue
+            else:
+                await asyncio.wait({pending})
+            try:
+                chunk = pending.result()
+            except StopAsyncIteration:
+                break
+            finally:
+                pending = None
+            if not buffer:
+                flush_at = loop.time() + interval
+            buffer += chunk
+            if len(buffer) >= max_bytes:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        aclose = getattr(gen, "aclose", None)
+        if aclose is not None:
+            await aclose()
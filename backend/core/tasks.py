@@ -0,0 +1,127 @@
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+from pydantic import BaseModel, TypeAdapter
+from backend.core.shared_state import connect
+from backend.schemas.chat import LLMMessage
+
+
+@dataclass(frozen=True)
+class StructuredTask:
+    """A structured response type with everything per-request work can reuse.
+
+    Schema, system message and validators are built once at registration, so
+    serving a request does no schema generation or prompt formatting.
+    """
+
+    name: str
+    model: type[BaseModel]
+    prompt: str
+    schema: dict[str, Any]
+    system_message: LLMMessage
+    adapter: TypeAdapter[Any]
+    # Per-field validators used to check a partial document while it streams.
+    field_adapters: dict[str, TypeAdapter[Any]] = field(repr=False)
+    # Registered at runtime through POST /structured/types rather than in code.
+    custom: bool = False
+
+    def validate_json(self, text: str | bytes) -> BaseModel:
+        """Parse and validate in one pass (pydantic-core's JSON parser)."""
+        return self.adapter.validate_json(text)
+
+    def validate_python(self, value: Any) -> BaseModel:
+        return self.adapter.validate_python(value)
+
+
+class TaskRegistry:
+    """Structured tasks by ``response_type``, compiled when registered.
+
+    At most ``max_custom`` runtime-registered tasks are kept, evicting the least
+    recently used; built-in tasks are never evicted.
+    """
+
+    def __init__(self, system_prompt: str, max_custom: int | None = None) -> None:
+        self.system_prompt = system_prompt
+        self.max_custom = max_custom
+        self._tasks: dict[str, StructuredTask] = {}
+        self._custom: OrderedDict[str, None] = OrderedDict()  # names, least recent first
+        self.evictions = 0
+
+    def register(
+        self,
+        name: str,
+        model: type[BaseModel],
+        prompt: str,
+        *,
+        schema: dict[str, Any] | None = None,
+        custom: bool = False,
+    ) -> StructuredTask:
+        """Compile and add a task; ``schema`` overrides the one derived from ``model``."""
+        task = StructuredTask(
+            name=name,
+            model=model,
+            prompt=prompt,
+            schema=schema if schema is not None else model.model_json_schema(),
+            system_message=LLMMessage(role="system", content=f"{self.system_prompt}\n{prompt}"),
+            adapter=TypeAdapter(model),
+            # Keyed by the JSON key, which is the alias when a field has one.
+            field_adapters={
+                info.alias or key: TypeAdapter(info.annotation)
+                for key, info in model.model_fields.items()
+            },
+            custom=custom,
+        )
+        self._tasks[name] = task
+        if custom:
+            self._custom[name] = None
+            self._custom.move_to_end(name)
+            while self.max_custom is not None and len(self._custom) > self.max_custom:
+                oldest, _ = self._custom.popitem(last=False)
+                self._tasks.pop(oldest, None)
+                self.evictions += 1
+        return task
+
+    def get(self, name: str | None) -> StructuredTask | None:
+        task = self._tasks.get(name) if name else None
+        if task is not None and task.custom:
+            self._custom.move_to_end(task.name)
+        return task
+
+    def stats(self) -> dict[str, int]:
+        return {"custom": len(self._custom), "evictions": self.evictions}
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._tasks
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tasks)
+
+
+class TaskStore:
+    """Custom task definitions in sqlite, so every worker can load them at startup."""
+
+    def __init__(self, path: str) -> None:
+        self._db = connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS structured_types "
+            "(name TEXT PRIMARY KEY, schema TEXT NOT NULL, prompt TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def save(self, name: str, schema: dict[str, Any], prompt: str) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO structured_types VALUES (?, ?, ?)",
+            (name, json.dumps(schema, separators=(",", ":")), prompt),
+        )
+        self._db.commit()
+
+    def load(self, name: str) -> tuple[dict[str, Any], str] | None:
+        row = self._db.execute(
+            "SELECT schema, prompt FROM structured_types WHERE name = ?", (name,)
+        ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def load_all(self) -> list[tuple[str, dict[str, Any], str]]:
+        rows = self._db.execute("SELECT name, schema, prompt FROM structured_types").fetchall()
+        return [(name, json.loads(schema), prompt) for name, schema, prompt in rows]
@@ -0,0 +1,109 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+from backend.core.context import DeadlineExceeded
+from backend.core.scheduler import is_upstream_failure
+from backend.settings import settings
+
+
+class Endpoint:
+    """One model-runner base URL with passive health and load stats."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip("/")
+        self.inflight = 0
+        self.latency: float | None = None  # EWMA seconds per call
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+    def available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+    def load(self) -> tuple[int, float]:
+        return (self.inflight, self.latency or 0.0)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "url": self.url,
+            "inflight": self.inflight,
+            "latency": self.latency,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejected": not self.available(time.monotonic()),
+            "ejections": self.ejections,
+        }
+
+
+class Balancer:
+    """Power-of-two-choices over least outstanding requests, with passive ejection.
+
+    An endpoint that fails ``eject_after`` times in a row is skipped for
+    ``eject_seconds``; afterwards it is tried again and one success clears it.
+    """
+
+    def __init__(self, urls: list[str], eject_after: int = 3, eject_seconds: float = 30.0) -> None:
+        self.endpoints = [Endpoint(u) for u in urls]
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+
+    def pick(self) -> Endpoint:
+        """Choose the less loaded of two random healthy endpoints."""
+        now = time.monotonic()
+        healthy = [e for e in self.endpoints if e.available(now)]
+        if not healthy:
+            # Everything is ejected: try the one due back soonest rather than fail.
+            return min(self.endpoints, key=lambda e: e.ejected_until)
+        if len(healthy) == 1:
+            return healthy[0]
+        a, b = random.sample(healthy, 2)
+        return a if a.load() <= b.load() else b
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Endpoint]:
+        """Pick an endpoint and count the call against it until the block exits."""
+        endpoint = self.pick()
+        endpoint.inflight += 1
+        start = time.monotonic()
+        try:
+            yield endpoint
+        except (asyncio.CancelledError, DeadlineExceeded):
+            # Cut short on our side (hedge loser, disconnect, deadline): the elapsed
+            # time is not a latency and says nothing about the endpoint's health.
+            raise
+        except BaseException as e:
+            self._report(endpoint, not is_upstream_failure(e), time.monotonic() - start)
+            raise
+        else:
+            self._report(endpoint, True, time.monotonic() - start)
+        finally:
+            endpoint.inflight -= 1
+
+    def stats(self) -> list[dict[str, Any]]:
+        """Per-endpoint in-flight, latency and health counters."""
+        return [e.stats() for e in self.endpoints]
+
+    def _report(self, endpoint: Endpoint, ok: bool, elapsed: float) -> None:
+        endpoint.requests += 1
+        if ok:
+            endpoint.consecutive_failures = 0
+            endpoint.latency = (
+                elapsed if endpoint.latency is None else 0.8 * endpoint.latency + 0.2 * elapsed
+            )
+            return
+        endpoint.failures += 1
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.eject_after:
+            endpoint.ejected_until = time.monotonic() + self.eject_seconds
+            endpoint.ejections += 1
+
+
+balancer = Balancer(
+    settings.upstream_urls,
+    eject_after=settings.UPSTREAM_EJECT_AFTER,
+    eject_seconds=settings.UPSTREAM_EJECT_SECONDS,
+)
@@ -0,0 +1,127 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable
+from backend.core import metrics
+
+# Odd 31-bit stride (golden ratio) so derived seeds don't collide for nearby bases.
+_SEED_STRIDE = 0x9E3779B1
+_SEED_MOD = 2**31
+
+
+def choice_seed(seed: int | None, index: int) -> int | None:
+    """Derive a distinct, reproducible seed per choice; choice 0 keeps the caller's."""
+    if seed is None or index == 0:
+        return seed
+    return (seed + index * _SEED_STRIDE) % _SEED_MOD
+
+
+def choice_payload(payload: dict[str, Any], index: int) -> dict[str, Any]:
+    """The n=1 upstream payload for one fan-out choice."""
+    return {**payload, "n": 1, "seed": choice_seed(payload.get("seed"), index)}
+
+
+def choice_text(response: dict[str, Any]) -> str | None:
+    """Content of the first choice of an upstream response, if any."""
+    try:
+        return response["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+async def iter_choices(
+    n: int, call: Callable[[int], Awaitable[dict[str, Any]]]
+) -> AsyncIterator[tuple[int, dict[str, Any] | BaseException]]:
+    """Run ``call(i)`` for every choice and yield ``(i, result)`` as each finishes.
+
+    Failures are yielded as the exception instead of aborting siblings. Closing
+    the iterator early cancels every generation still running.
+    """
+    tasks = {asyncio.ensure_future(call(i)): i for i in range(n)}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in sorted(done, key=tasks.__getitem__):
+                exc = task.exception()
+                yield tasks[task], exc if exc is not None else task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        # Also reaps finished tasks the caller never got to (it may stop at the first
+        # failure), so their exceptions aren't logged as never retrieved.
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def merge_usage(usages: list[dict[str, Any]]) -> dict[str, int | float]:
+    """Sum numeric usage fields, keeping token counts as integers."""
+    agg: dict[str, int | float] = {}
+    for usage in usages:
+        for k, v in usage.items():
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                agg[k] = agg.get(k, 0) + v
+    return agg
+
+
+def merge_responses(
+    responses: list[dict[str, Any]], dropped: list[dict[str, Any]] | None = None
+) -> dict[str, Any]:
+    """Combine n=1 responses into one n-choice response, reindexing choices.
+
+    ``dropped`` responses (duplicates) contribute usage but no choices, since
+    their tokens were still generated.
+    """
+    base = dict(responses[0])
+    choices = []
+    for resp in responses:
+        for choice in resp.get("choices", []):
+            choices.append({**choice, "index": len(choices)})
+    base["choices"] = choices
+
+    # Best-effort usage aggregation if available.
+    usages = [r.get("usage") for r in responses + (dropped or [])]
+    if all(isinstance(u, dict) for u in usages):
+        base["usage"] = merge_usage(usages)  # type: ignore[arg-type]
+    return base
+
+
+class FanoutStats:
+    """Counters for fan-out width and duplicate suppression."""
+
+    def __init__(self) -> None:
+        self.fanouts = 0
+        self.choices = 0
+        self.duplicates_dropped = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "fanouts": self.fanouts,
+            "choices": self.choices,
+            "duplicates_dropped": self.duplicates_dropped,
+        }
+
+
+fanout_stats = FanoutStats()
+
+
+async def iter_unique(
+    n: int, call: Callable[[int], Awaitable[dict[str, Any]]]
+) -> AsyncIterator[tuple[int, dict[str, Any] | BaseException, bool]]:
+    """Like :func:`iter_choices`, flagging responses whose text was already seen.
+
+    Yields ``(index, result, duplicate)``; callers drop duplicates from the
+    output but still account for their usage.
+    """
+    fanout_stats.fanouts += 1
+    metrics.fanout_width.observe(n)
+    seen: set[str] = set()
+    async for index, result in iter_choices(n, call):
+        duplicate = False
+        if not isinstance(result, BaseException):
+            text = choice_text(result)
+            duplicate = text is not None and text in seen
+            if duplicate:
+                fanout_stats.duplicates_dropped += 1
+            else:
+                fanout_stats.choices += 1
+                if text is not None:
+                    seen.add(text)
+        yield index, result, duplicate
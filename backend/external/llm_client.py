@@ -1,22 +1,185 @@
 import httpx
 import asyncio
-import json
-from typing import Any, AsyncGenerator
+from contextlib import aclosing, asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Coroutine, TypeVar
+from backend.core.breaker import CircuitBreaker
+from backend.core.context import BULK, DeadlineExceeded, current_context
+from backend.core import jsonio, metrics
+from backend.core.hedging import HedgeBudget, Hedger
+from backend.core.keys import canonical_hash, is_deterministic
+from backend.core.quotas import (
+    Reservation,
+    estimate_body_tokens,
+    estimate_tokens,
+    tenant_quotas,
+    usage_tokens,
+)
+from backend.core.repetition import RepetitionGuard, repetition_stats
+from backend.core.retry import RetryPolicy
+from backend.core.scheduler import scheduler
+from backend.core.semantic_cache import HashingEmbedder, SemanticCache, semantic_scope
+from backend.external import fanout
+from backend.external.balancer import balancer
+from backend.core.singleflight import SingleFlight, StreamBroadcast
 from backend.schemas.chat import LLMRequest
 from backend.settings import settings
 
+T = TypeVar("T")
+
 HEADERS = {
     "Content-Type": "application/json",
     "Authorization": f"Bearer {settings.DMR_API_KEY}",
 }
 
+# Process-wide upstream client; opened/closed by the app lifespan (see backend.main).
+_client: httpx.AsyncClient | None = None
 
-async def llm_generate_content(req: LLMRequest) -> dict[str, Any]:
-    """Call the upstream chat-completions API and return its JSON response."""
+# Identical deterministic requests already in flight share one upstream generation.
+upstream_flight = SingleFlight()
+stream_broadcast = StreamBroadcast()
+
+# Slow outliers get a duplicate call; whole calls and time to first token are
+# tracked separately but share one budget.
+hedge_budget = HedgeBudget(settings.HEDGE_BUDGET_PERCENT)
+_hedge_options: dict[str, Any] = dict(
+    percentile=settings.HEDGE_PERCENTILE,
+    min_delay=settings.HEDGE_MIN_DELAY,
+    window=settings.HEDGE_WINDOW,
+    min_samples=settings.HEDGE_MIN_SAMPLES,
+    enabled=settings.HEDGE_ENABLED,
+)
+call_hedger = Hedger("call", hedge_budget, **_hedge_options)
+stream_hedger = Hedger("stream", hedge_budget, **_hedge_options)
+
+# A failing upstream is cut off for a while instead of being waited on; calls that
+# failed before producing anything are retried with backoff first.
+upstream_breaker = CircuitBreaker(
+    window=settings.BREAKER_WINDOW,
+    min_calls=settings.BREAKER_MIN_CALLS,
+    failure_rate=settings.BREAKER_FAILURE_RATE,
+    open_seconds=settings.BREAKER_OPEN_SECONDS,
+    probes=settings.BREAKER_HALF_OPEN_PROBES,
+    enabled=settings.BREAKER_ENABLED,
+)
+retry_policy = RetryPolicy(
+    settings.RETRY_ATTEMPTS, settings.RETRY_BASE_DELAY, settings.RETRY_MAX_DELAY
+)
+
+
+def create_client() -> httpx.AsyncClient:
+    """Build a pooled upstream client from the connection/timeout settings."""
+    limits = httpx.Limits(
+        max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE,
+        keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        settings.UPSTREAM_READ_TIMEOUT,
+        connect=settings.UPSTREAM_CONNECT_TIMEOUT,
+        pool=settings.UPSTREAM_POOL_TIMEOUT,
+    )
+    return httpx.AsyncClient(
+        headers=HEADERS,
+        limits=limits,
+        timeout=timeout,
+        http2=settings.UPSTREAM_HTTP2,
+    )
+
+
+def stream_timeout() -> httpx.Timeout:
+    """Timeouts for streaming calls: same connect/pool, per-chunk read gap."""
+    return httpx.Timeout(
+        settings.UPSTREAM_STREAM_READ_TIMEOUT,
+        connect=settings.UPSTREAM_CONNECT_TIMEOUT,
+        pool=settings.UPSTREAM_POOL_TIMEOUT,
+    )
+
+
+def bounded_timeout(timeout: httpx.Timeout) -> httpx.Timeout:
+    """Clamp ``timeout`` so no single wait outlives the request's deadline."""
+    remaining = current_context().remaining()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+    def clamp(value: float | None) -> float:
+        return remaining if value is None else min(value, remaining)
+
+    return httpx.Timeout(
+        clamp(timeout.read),
+        connect=clamp(timeout.connect),
+        write=clamp(timeout.write),
+        pool=clamp(timeout.pool),
+    )
+
+
+def deadline_passed() -> bool:
+    """True once the request has a deadline and it is over."""
+    remaining = current_context().remaining()
+    return remaining is not None and remaining <= 0
+
+
+@asynccontextmanager
+async def deadline_errors() -> AsyncIterator[None]:
+    """Turn an httpx timeout clamped by ``bounded_timeout`` into DeadlineExceeded.
+
+    Entered inside the breaker, slot and lease, so a caller's short deadline is
+    not counted as a slow or failing upstream.
+    """
+    try:
+        yield
+    except httpx.TimeoutException:
+        if not deadline_passed():
+            raise
+        raise DeadlineExceeded("Request deadline exceeded") from None
+
+
+async def within_deadline(work: Coroutine[Any, Any, T]) -> T:
+    """Await ``work`` under the request's end-to-end deadline, fan-out included."""
+    ctx = current_context()
+    remaining = ctx.remaining()
+    if remaining is None:
+        return await work
+    try:
+        ctx.check_deadline()
+        async with asyncio.timeout(remaining):
+            return await work
+    except TimeoutError:
+        raise DeadlineExceeded("Request deadline exceeded") from None
+    finally:
+        work.close()  # no-op once awaited; avoids a never-awaited warning
+
+
+async def startup() -> None:
+    """Open the shared upstream client."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+
+
+async def shutdown() -> None:
+    """Close the shared upstream client and release pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily outside of the app lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+def build_payload(req: LLMRequest, *, stream: bool = False) -> dict[str, Any]:
+    """Translate an LLMRequest into an upstream chat-completions payload."""
     payload = {
         "model": settings.MODEL_ID,
-        # Convert Pydantic message objects to plain dicts for JSON serialization.
-        "messages": [m.model_dump() for m in req.messages],
+        # Plain dicts straight from the fields; model_dump() per message is far slower.
+        "messages": [{"role": m.role, "content": m.content} for m in req.messages],
         "seed": req.seed,
         "temperature": req.temperature,
         "max_tokens": req.max_tokens,
@@ -24,8 +187,8 @@ async def llm_generate_content(req: LLMRequest) -> dict[str, Any]:
         "presence_penalty": req.presence_penalty,
         "frequency_penalty": req.frequency_penalty,
         "stop": req.stop,  # list[str] or None
-        "n": req.n,
-        "stream": req.stream,
+        "n": 1 if stream else req.n,
+        "stream": stream,
         "top_k": req.top_k,
         "min_p": req.min_p,
         "typical_p": req.typical_p,
@@ -48,98 +211,509 @@ async def llm_generate_content(req: LLMRequest) -> dict[str, Any]:
                 "strict": True,
             },
         }
+    return payload
+
+
+async def llm_generate_content(req: LLMRequest) -> dict[str, Any]:
+    """Call the upstream chat-completions API and return its JSON response.
+
+    The request is first charged to its tenant's quota (see backend.core.quotas).
+    With the semantic cache enabled, a close paraphrase of an earlier final user
+    message (same scope) is answered from the cache instead.
+    """
+    async with tenant_quotas.reserve(estimate_tokens(req), req.n) as reservation:
+        data = await _generate_cached(req)
+        reservation.used = usage_tokens(data.get("usage"))
+    return data
+
+
+async def _generate_cached(req: LLMRequest) -> dict[str, Any]:
+    payload = build_payload(req)
+    # Structured results are cached by their router, and only once they validate.
+    cacheable = semantic_cache.enabled and req.response_schema is None
+    scoped = semantic_scope(payload) if cacheable else None
+    if scoped is None:
+        return await _generate_content(payload, req)
+
+    scope, text = scoped
+    ctx = current_context()
+    with ctx.phase("embed"):
+        vector = await semantic_cache.embed(text)
+    if vector is not None:
+        cached = semantic_cache.lookup(scope, vector)
+        if cached is not None:
+            return cached
+    data = await _generate_content(payload, req)
+    if vector is not None:
+        semantic_cache.store(scope, vector, data)
+    return data
+
+
+async def llm_embed(texts: list[str]) -> list[list[float]]:
+    """Embed ``texts`` with the upstream embeddings API (OpenAI-compatible)."""
+    client = get_client()
+    body = {"model": settings.SEMANTIC_CACHE_EMBED_MODEL or settings.MODEL_ID, "input": texts}
+    async with balancer.lease() as endpoint, deadline_errors():
+        r = await client.post(
+            f"{endpoint.url}/embeddings",
+            content=jsonio.dumps(body),
+            timeout=bounded_timeout(client.timeout),
+        )
+        r.raise_for_status()
+        data = jsonio.loads(r.content)["data"]
+    return [item["embedding"] for item in sorted(data, key=lambda d: d.get("index", 0))]
+
+
+semantic_cache = SemanticCache(
+    HashingEmbedder() if settings.SEMANTIC_CACHE_EMBEDDER == "hashing" else llm_embed,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    max_bytes=settings.SEMANTIC_CACHE_MAX_BYTES,
+    enabled=settings.SEMANTIC_CACHE_ENABLED,
+)
+
 
-    url = f"{settings.DMR_BASE_URL}/chat/completions"
+async def _generate_content(payload: dict[str, Any], req: LLMRequest) -> dict[str, Any]:
+    if not is_deterministic(req):
+        work = _generate(payload)
+    else:
+        work = upstream_flight.do(
+            canonical_hash("generate", payload), lambda: _generate(payload)
+        )
+    return await within_deadline(work)
 
+
+async def _generate(payload: dict[str, Any]) -> dict[str, Any]:
+    """Send a non-streaming payload upstream, fanning out when n > 1."""
     # Docker Model Runner chat completions does not accept n > 1.
     # Normalize to n=1 and, if multiple results are desired, issue that many
-    # parallel single-result calls and merge responses.
-    # Normalize to n=1; if caller requested n>1, fan out parallel calls and merge.
+    # parallel single-result calls (each with its own derived seed) and merge.
     target_n = max(1, int(payload.get("n") or 1))
-    payload_single = {**payload, "n": 1}
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        if target_n == 1:
-            r = await client.post(url, headers=HEADERS, json=payload_single)
-            r.raise_for_status()
-            return r.json()
-
-        async def one_call():
-            resp = await client.post(url, headers=HEADERS, json=payload_single)
-            resp.raise_for_status()
-            return resp.json()
-
-        responses = await asyncio.gather(*[one_call() for _ in range(target_n)])
-
-        # Base the combined response on the first, then merge choices and (if present) usage.
-        base = responses[0]
-        combined_choices = []
-        for resp in responses:
-            combined_choices.extend(resp.get("choices", []))
-        base["choices"] = combined_choices
-
-        # Best-effort usage aggregation if available.
-        if all("usage" in r for r in responses):
-            usage_keys = set().union(
-                *[
-                    r["usage"].keys()
-                    for r in responses
-                    if isinstance(r.get("usage"), dict)
-                ]
-            )
-            # Treat all usage values as floats to avoid type ambiguity.
-            agg: dict[str, float] = {k: 0.0 for k in usage_keys}
-            for r in responses:
-                for k, v in (r.get("usage") or {}).items():
-                    if isinstance(v, (int, float)):
-                        agg[k] = agg.get(k, 0.0) + float(v)
-            base["usage"] = agg
-
-        return base
+    client = get_client()
+    if target_n == 1:
+        single = {**payload, "n": 1}
+        return await call_hedger.run(lambda: _post_completion(client, single))
 
+    # Fan-out sub-calls each take a slot as bulk work and are balanced separately,
+    # so they spread across upstream endpoints.
+    results: list[tuple[int, dict[str, Any]]] = []
+    duplicates: list[dict[str, Any]] = []
+    async with aclosing(
+        fanout.iter_unique(
+            target_n,
+            lambda i: _post_completion(client, fanout.choice_payload(payload, i), BULK),
+        )
+    ) as choices:
+        async for index, result, duplicate in choices:
+            if isinstance(result, BaseException):
+                raise result
+            if duplicate:
+                duplicates.append(result)
+            else:
+                results.append((index, result))
 
-async def llm_generate_content_stream(req: LLMRequest) -> AsyncGenerator[bytes, None]:
-    """Stream partial response chunks from the upstream chat-completions API."""
-    payload = {
-        "model": settings.MODEL_ID,
-        "messages": [m.model_dump() for m in req.messages],
-        "seed": req.seed,
-        "temperature": req.temperature,
-        "max_tokens": req.max_tokens,
-        "top_p": req.top_p,
-        "presence_penalty": req.presence_penalty,
-        "frequency_penalty": req.frequency_penalty,
-        "stop": req.stop,  # list[str] or None
-        "n": 1,
-        "stream": True,
-        "top_k": req.top_k,
-        "min_p": req.min_p,
-        "typical_p": req.typical_p,
-        "tfs_z": req.tfs_z,
-        "repeat_penalty": req.repeat_penalty,
-        "repeat_last_n": req.repeat_last_n,
-        "mirostat_mode": req.mirostat_mode,
-        "mirostat_tau": req.mirostat_tau,
-        "mirostat_eta": req.mirostat_eta,
+    results.sort(key=lambda item: item[0])
+    return fanout.merge_responses([r for _, r in results], duplicates)
+
+
+async def _post_completion(
+    client: httpx.AsyncClient,
+    payload: dict[str, Any],
+    priority: int | None = None,
+) -> dict[str, Any]:
+    """POST one n=1 completion, retrying transient upstream failures."""
+    return await retry_policy.call(lambda: _post_completion_once(client, payload, priority))
+
+
+async def _post_completion_once(
+    client: httpx.AsyncClient,
+    payload: dict[str, Any],
+    priority: int | None,
+) -> dict[str, Any]:
+    """POST one n=1 completion while holding an admission slot."""
+    if settings.REPETITION_GUARD:
+        # Stream internally so a looping generation can be cut off mid-way.
+        return await _collect_stream(payload, priority)
+
+    async with (
+        upstream_breaker.guard(),
+        scheduler.slot(priority) as held,
+        balancer.lease() as endpoint,
+        deadline_errors(),
+    ):
+        r = await client.post(
+            f"{endpoint.url}/chat/completions",
+            content=jsonio.dumps(payload),
+            timeout=bounded_timeout(client.timeout),
+        )
+        r.raise_for_status()
+        data = jsonio.loads(r.content)
+        # Completion size lets the adaptive limiter derive per-token latency.
+        usage = data.get("usage") if isinstance(data, dict) else None
+        metrics.record_usage(usage)
+        if isinstance(usage, dict) and isinstance(usage.get("completion_tokens"), int):
+            held.tokens = usage["completion_tokens"]
+    return data
+
+
+class StreamSummary:
+    """What an upstream stream reported besides content: ids, finish reason, usage."""
+
+    def __init__(self) -> None:
+        self.meta: dict[str, Any] = {}
+        self.finish_reason: str | None = None
+        self.usage: dict[str, Any] | None = None
+        self.tokens = 0
+
+
+async def _collect_stream(payload: dict[str, Any], priority: int | None) -> dict[str, Any]:
+    """Run a completion as a stream and assemble a regular chat.completion response."""
+    summary = StreamSummary()
+    pieces = [
+        piece.decode("utf-8")
+        async for piece in _stream({**payload, "stream": True}, priority, summary)
+    ]
+    usage = summary.usage
+    if usage is None:
+        usage = {"completion_tokens": summary.tokens}
+    return {
+        "id": summary.meta.get("id"),
+        "object": "chat.completion",
+        "created": summary.meta.get("created"),
+        "model": summary.meta.get("model", payload.get("model")),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(pieces)},
+                "finish_reason": summary.finish_reason,
+            }
+        ],
+        "usage": usage,
     }
 
-    url = f"{settings.DMR_BASE_URL}/chat/completions"
+
+async def llm_generate_content_fanout_stream(req: LLMRequest) -> AsyncGenerator[bytes, None]:
+    """Stream an n>1 fan-out as NDJSON, one line per choice as soon as it finishes.
+
+    Each line carries the choice ``index``; a final line reports the merged
+    usage. Closing the stream (client disconnect) cancels unfinished choices.
+    """
+    async with (
+        tenant_quotas.reserve(estimate_tokens(req), req.n) as reservation,
+        aclosing(_fanout_stream(req, reservation)) as lines,
+    ):
+        async for line in lines:
+            yield line
+
+
+async def _fanout_stream(req: LLMRequest, reservation: Reservation) -> AsyncGenerator[bytes, None]:
+    payload = build_payload(req)
+    client = get_client()
+    usages: list[dict[str, Any]] = []
+    sent = 0
+    async with aclosing(
+        fanout.iter_unique(
+            max(1, req.n),
+            lambda i: _post_completion(client, fanout.choice_payload(payload, i), BULK),
+        )
+    ) as choices:
+        async for index, result, duplicate in choices:
+            if isinstance(result, BaseException):
+                error = str(result) or type(result).__name__
+                yield jsonio.dumps({"index": index, "error": error}) + b"\n"
+                continue
+            if isinstance(result.get("usage"), dict):
+                usages.append(result["usage"])
+            if duplicate:
+                continue
+            choice = (result.get("choices") or [{}])[0]
+            line = {
+                "index": index,
+                "content": fanout.choice_text(result),
+                "finish_reason": choice.get("finish_reason"),
+            }
+            sent += 1
+            yield jsonio.dumps(line) + b"\n"
+    summary = {"done": True, "choices": sent, "usage": fanout.merge_usage(usages)}
+    reservation.used = usage_tokens(summary["usage"])
+    yield jsonio.dumps(summary) + b"\n"
+
+
+async def llm_generate_content_stream(req: LLMRequest) -> AsyncGenerator[bytes, None]:
+    """Stream partial response chunks from the upstream chat-completions API.
+
+    The stream is charged to its tenant's quota before it opens.
+    """
+    payload = build_payload(req, stream=True)
+
+    def open_stream() -> AsyncGenerator[bytes, None]:
+        return stream_hedger.stream(lambda: retry_policy.stream(lambda: _stream(payload)))
+
+    async with tenant_quotas.reserve(estimate_tokens(req)) as reservation:
+        if not is_deterministic(req):
+            source = open_stream()
+        else:
+            # Late joiners of an identical stream get the buffered prefix, then live tokens.
+            source = stream_broadcast.subscribe(canonical_hash("stream", payload), open_stream)
+        # Streamed pieces are about a token each; the prompt is only estimated.
+        reservation.used = estimate_tokens(req) - req.max_tokens
+        async for piece in source:
+            reservation.used += 1
+            yield piece
+
+
+async def _stream(
+    payload: dict[str, Any],
+    priority: int | None = None,
+    summary: StreamSummary | None = None,
+) -> AsyncGenerator[bytes, None]:
+    """Open one upstream SSE stream and yield its content deltas as bytes.
+
+    With the repetition guard on, a looping generation is closed early and
+    reported with ``finish_reason="repetition"``. If the request deadline
+    passes mid-stream the stream ends with ``finish_reason="deadline"``;
+    before the first token it raises DeadlineExceeded instead.
+    """
+    if summary is None:
+        summary = StreamSummary()
+    guard = None
+    if settings.REPETITION_GUARD:
+        guard = RepetitionGuard(
+            ngram=settings.REPETITION_NGRAM,
+            window=settings.REPETITION_WINDOW,
+            max_repeats=settings.REPETITION_MAX_REPEATS,
+        )
+        repetition_stats.streams += 1
+    # Ask for a final usage chunk so token counts survive streaming.
+    payload = {**payload, "stream_options": {"include_usage": True}}
+
     # Open streaming POST to DMR and iterate SSE-style lines prefixed with "data:".
-    async with httpx.AsyncClient(timeout=None) as client:
-        async with client.stream("POST", url, headers=HEADERS, json=payload) as r:
+    client = get_client()
+    ctx = current_context()
+    async with (
+        upstream_breaker.guard(),
+        scheduler.slot(priority) as held,
+        balancer.lease() as endpoint,
+        deadline_errors(),
+        client.stream(
+            "POST",
+            f"{endpoint.url}/chat/completions",
+            content=jsonio.dumps(payload),
+            timeout=bounded_timeout(stream_timeout()),
+        ) as r,
+    ):
+        held.headers()
+        r.raise_for_status()
+        if r.headers.get("content-type", "").startswith("application/json"):
+            # Some servers ignore "stream" and answer with one JSON document.
+            obj = jsonio.loads(await r.aread())
+            _summarize(summary, obj)
+            choice = (obj.get("choices") or [{}])[0]
+            piece = (choice.get("message") or {}).get("content")
+            summary.finish_reason = choice.get("finish_reason")
+            if piece:
+                held.token()
+                summary.tokens += 1
+                yield piece.encode("utf-8")
+            return
+
+        lines = r.aiter_lines()
+        while True:
+            try:
+                line = await anext(lines)
+            except StopAsyncIteration:
+                break
+            except httpx.TimeoutException:
+                # A read clamped by the deadline timed out: that's the deadline, not
+                # a stalled upstream.
+                if not deadline_passed():
+                    raise
+                if not summary.tokens:
+                    raise DeadlineExceeded("Request deadline exceeded") from None
+                summary.finish_reason = "deadline"
+                break
+            # Server-sent event framing: lines start with "data:"; [DONE] marks end.
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()  # strip "data:"
+            if data == "[DONE]":
+                break
+            try:
+                obj = jsonio.loads(data)
+            except ValueError:
+                continue
+            _summarize(summary, obj)
+            choice = (obj.get("choices") or [{}])[0]
+            if choice.get("finish_reason"):
+                summary.finish_reason = choice["finish_reason"]
+            piece = (choice.get("delta") or {}).get("content")
+            if not piece:
+                continue
+            held.token()
+            summary.tokens += 1
+            yield piece.encode("utf-8")
+            if guard is not None and guard.feed(piece):
+                # Leaving the block closes the upstream response, which stops generation.
+                summary.finish_reason = "repetition"
+                repetition_stats.tripped += 1
+                repetition_stats.tokens_saved += max(
+                    0, int(payload.get("max_tokens") or 0) - summary.tokens
+                )
+                break
+            remaining = ctx.remaining()
+            if remaining is not None and remaining <= 0:
+                summary.finish_reason = "deadline"
+                break
+
+
+async def llm_passthrough(body: bytes, doc: dict[str, Any]) -> bytes:
+    """POST a client's chat-completions body upstream unchanged and return the raw reply.
+
+    ``doc`` is the parsed body; the call is charged to the tenant's quota from its
+    ``messages``, ``max_tokens`` and ``n``. Upstream error statuses surface as
+    httpx.HTTPStatusError with the body read.
+    """
+    prompt, budget = estimate_body_tokens(doc)
+    async with tenant_quotas.reserve(prompt + budget, _choices(doc)) as reservation:
+        return await within_deadline(
+            retry_policy.call(lambda: _passthrough_once(body, reservation))
+        )
+
+
+def _choices(doc: dict[str, Any]) -> int:
+    n = doc.get("n")
+    return n if isinstance(n, int) and n > 1 else 1
+
+
+async def _passthrough_once(body: bytes, reservation: Reservation) -> bytes:
+    client = get_client()
+    async with (
+        upstream_breaker.guard(),
+        scheduler.slot() as held,
+        balancer.lease() as endpoint,
+        deadline_errors(),
+    ):
+        r = await client.post(
+            f"{endpoint.url}/chat/completions",
+            content=body,
+            timeout=bounded_timeout(client.timeout),
+        )
+        r.raise_for_status()
+        usage = _frame_usage(r.content)
+        metrics.record_usage(usage)
+        reservation.used = usage_tokens(usage)
+        if isinstance(usage, dict) and isinstance(usage.get("completion_tokens"), int):
+            held.tokens = usage["completion_tokens"]
+    return r.content
+
+
+async def llm_passthrough_stream(body: bytes, doc: dict[str, Any]) -> AsyncGenerator[bytes, None]:
+    """Relay an upstream SSE stream byte for byte.
+
+    Frames are not decoded: tokens are counted from frame separators for the
+    latency metrics, and only a frame mentioning ``usage`` is parsed. If the
+    request deadline passes mid-stream, a final ``finish_reason: "deadline"``
+    frame and ``[DONE]`` are sent once the current frame is complete. The
+    tenant is charged as for ``llm_passthrough``, settled from the usage frame
+    if the client asked for one, else from the frame count.
+    """
+    prompt, budget = estimate_body_tokens(doc)
+    async with (
+        tenant_quotas.reserve(prompt + budget, _choices(doc)) as reservation,
+        aclosing(retry_policy.stream(lambda: _passthrough_stream(body, reservation))) as relay,
+    ):
+        # A frame is about a token; the prompt is only estimated.
+        reservation.used = prompt
+        async for chunk in relay:
+            reservation.used += chunk.count(b"\n\n")
+            yield chunk
+
+
+async def _passthrough_stream(
+    body: bytes, reservation: Reservation
+) -> AsyncGenerator[bytes, None]:
+    client = get_client()
+    ctx = current_context()
+    sent = 0
+    tail = b""  # the end of the stream so far, enough to hold the usage frame
+    async with (
+        upstream_breaker.guard(),
+        scheduler.slot() as held,
+        balancer.lease() as endpoint,
+        deadline_errors(),
+        client.stream(
+            "POST",
+            f"{endpoint.url}/chat/completions",
+            content=body,
+            timeout=bounded_timeout(stream_timeout()),
+        ) as r,
+    ):
+        held.headers()
+        if r.is_error:
+            await r.aread()
             r.raise_for_status()
-            async for line in r.aiter_lines():
-                # Server-sent event framing: lines start with "data:"; [DONE] marks end.
-                if not line or not line.startswith("data:"):
-                    continue
-                data = line[5:].strip()  # strip "data:"
-                if data == "[DONE]":
-                    break
-                try:
-                    obj = json.loads(data)
-                    delta = (obj.get("choices") or [{}])[0].get("delta") or {}
-                    piece = delta.get("content")
-                    if piece:
-                        yield piece.encode("utf-8")
-                except Exception:
-                    continue
+        # aiter_bytes, not aiter_raw: it undoes any Content-Encoding, which the
+        # relayed response does not carry, and is otherwise a straight pass-through.
+        chunks = r.aiter_bytes()
+        while True:
+            try:
+                chunk = await anext(chunks)
+            except StopAsyncIteration:
+                break
+            except httpx.TimeoutException:
+                if not deadline_passed():
+                    raise
+                if not sent:
+                    raise DeadlineExceeded("Request deadline exceeded") from None
+                if tail.endswith(b"\n\n"):
+                    yield _DEADLINE_FRAME
+                break
+            frames = chunk.count(b"\n\n")
+            if frames:
+                held.token(frames)
+            sent += len(chunk)
+            tail = (tail + chunk)[-_TAIL_BYTES:]
+            yield chunk
+            remaining = ctx.remaining()
+            if remaining is not None and remaining <= 0 and tail.endswith(b"\n\n"):
+                if not tail.endswith(b"[DONE]\n\n"):
+                    yield _DEADLINE_FRAME
+                break
+        # With include_usage the last frame before [DONE] carries the usage.
+        for frame in reversed(tail.split(b"\n\n")):
+            usage = _frame_usage(frame.removeprefix(b"data:"))
+            if usage is not None:
+                metrics.record_usage(usage)
+                reservation.used = usage_tokens(usage) or reservation.used
+                if isinstance(usage.get("completion_tokens"), int):
+                    held.tokens = usage["completion_tokens"]
+                break
+
+
+_TAIL_BYTES = 4096
+_DEADLINE_FRAME = (
+    b'data: {"object":"chat.completion.chunk","choices":'
+    b'[{"index":0,"delta":{},"finish_reason":"deadline"}]}\n\ndata: [DONE]\n\n'
+)
+
+
+def _frame_usage(raw: bytes) -> dict[str, Any] | None:
+    """``usage`` from one JSON document, or None if absent or not JSON."""
+    if b'"usage"' not in raw:
+        return None
+    try:
+        usage = jsonio.loads(raw).get("usage")
+    except (ValueError, AttributeError):
+        return None
+    return usage if isinstance(usage, dict) else None
+
+
+def _summarize(summary: StreamSummary, obj: dict[str, Any]) -> None:
+    """Fold response ids and usage from one upstream chunk into ``summary``."""
+    if not summary.meta:
+        summary.meta = {k: obj[k] for k in ("id", "created", "model") if k in obj}
+    if isinstance(obj.get("usage"), dict):
+        # With include_usage the upstream sends usage once, on the final chunk.
+        summary.usage = obj["usage"]
+        metrics.record_usage(summary.usage)
@@ -0,0 +1,66 @@
+import asyncio
+import time
+from typing import Any
+import httpx
+from backend.external import llm_client
+from backend.external.balancer import balancer
+from backend.settings import settings
+
+
+class UpstreamProbe:
+    """Active health: periodically GET ``/models`` on every upstream endpoint.
+
+    Results feed /readyz and /healthz only; routing still relies on the
+    balancer's passive ejection and the circuit breaker.
+    """
+
+    def __init__(self, interval: float, timeout: float) -> None:
+        self.interval = interval
+        self.timeout = timeout
+        self.results: dict[str, dict[str, Any]] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    async def check(self) -> None:
+        """Probe every endpoint once, concurrently."""
+        await asyncio.gather(*(self._check(e.url) for e in balancer.endpoints))
+
+    async def _check(self, url: str) -> None:
+        start = time.monotonic()
+        result: dict[str, Any] = {"url": url, "ok": False, "status": None, "error": None}
+        try:
+            r = await llm_client.get_client().get(f"{url}/models", timeout=self.timeout)
+            result["status"] = r.status_code
+            result["ok"] = r.is_success
+        except httpx.HTTPError as e:
+            result["error"] = type(e).__name__
+        result["latency_ms"] = round((time.monotonic() - start) * 1000, 1)
+        result["checked_at"] = time.time()
+        self.results[url] = result
+
+    def healthy(self) -> bool:
+        """False only once every endpoint has been probed and none answered."""
+        probed = [self.results.get(e.url) for e in balancer.endpoints]
+        if any(r is None for r in probed):
+            return True
+        return any(r["ok"] for r in probed if r is not None)
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="upstream-probe")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> list[dict[str, Any]]:
+        return list(self.results.values())
+
+
+upstream_probe = UpstreamProbe(settings.PROBE_INTERVAL_SECONDS, settings.PROBE_TIMEOUT_SECONDS)
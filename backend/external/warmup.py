@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from typing import Any
+import httpx
+from backend.core import jsonio
+from backend.core.scheduler import scheduler
+from backend.external import llm_client
+from backend.external.balancer import balancer
+from backend.settings import settings
+
+logger = logging.getLogger(__name__)
+
+WARMUP_USER_MESSAGE = {"role": "user", "content": "Hi"}
+
+
+class Warmer:
+    """Load the model on every endpoint at startup, then keep it loaded while idle.
+
+    Warm-up sends one tiny generation per endpoint to load the model, then one
+    per system prompt so the runner's prompt cache already holds those
+    prefixes. It retries every ``retry_seconds`` until one endpoint answers.
+    Afterwards, whenever a ``keep_warm_seconds`` interval passes with no
+    admitted generation, each endpoint is pinged so the runner does not unload
+    an idle model. The pings bypass admission, caches and the breaker.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float,
+        retry_seconds: float,
+        keep_warm_seconds: float,
+        max_tokens: int = 1,
+        enabled: bool = True,
+    ) -> None:
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self.keep_warm_seconds = keep_warm_seconds
+        self.max_tokens = max_tokens
+        self.enabled = enabled
+        # True from start() until warm-up succeeds; readiness waits on it.
+        self.warming = False
+        self.warmed_at: float | None = None
+        self.warmup_seconds: float | None = None
+        self.attempts = 0
+        self.pings = 0
+        self.ping_failures = 0
+        self._prompts: list[str] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def payload(self, system_prompt: str | None = None) -> dict[str, Any]:
+        messages = [WARMUP_USER_MESSAGE]
+        if system_prompt is not None:
+            messages = [{"role": "system", "content": system_prompt}, *messages]
+        return {
+            "model": settings.MODEL_ID,
+            "messages": messages,
+            "max_tokens": self.max_tokens,
+            "temperature": 0,
+            "stream": False,
+        }
+
+    async def _post(self, url: str, payload: dict[str, Any]) -> None:
+        timeout = httpx.Timeout(self.timeout, connect=settings.UPSTREAM_CONNECT_TIMEOUT)
+        r = await llm_client.get_client().post(
+            f"{url}/chat/completions", content=jsonio.dumps(payload), timeout=timeout
+        )
+        r.raise_for_status()
+
+    async def _warm_endpoint(self, url: str) -> None:
+        # Load the model first; the prefixes only help once it is resident.
+        await self._post(url, self.payload())
+        for prompt in self._prompts:
+            await self._post(url, self.payload(prompt))
+
+    async def warm(self) -> bool:
+        """One warm-up pass over every endpoint; True if at least one is warm."""
+        self.attempts += 1
+        urls = [e.url for e in balancer.endpoints]
+        results = await asyncio.gather(
+            *(self._warm_endpoint(url) for url in urls), return_exceptions=True
+        )
+        for url, result in zip(urls, results):
+            if isinstance(result, BaseException):
+                logger.warning("warm-up of %s failed: %r", url, result)
+        return any(not isinstance(result, BaseException) for result in results)
+
+    async def ping(self) -> None:
+        """Minimal generation on every endpoint so an idle model stays loaded."""
+        urls = [e.url for e in balancer.endpoints]
+        results = await asyncio.gather(
+            *(self._post(url, self.payload()) for url in urls), return_exceptions=True
+        )
+        self.pings += len(urls)
+        self.ping_failures += sum(isinstance(r, BaseException) for r in results)
+
+    def start(self, prompts: list[str]) -> None:
+        """Begin warm-up in the background with these system prompts to prime."""
+        if not self.enabled or self._task is not None:
+            return
+        self._prompts = list(dict.fromkeys(prompts))
+        self.warming = True
+        self._task = asyncio.create_task(self._run(), name="model-warmup")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.warming = False
+
+    async def _run(self) -> None:
+        start = time.monotonic()
+        while not await self.warm():
+            await asyncio.sleep(self.retry_seconds)
+        self.warming = False
+        self.warmed_at = time.time()
+        self.warmup_seconds = round(time.monotonic() - start, 3)
+        if self.keep_warm_seconds <= 0:
+            return
+        seen = scheduler.admitted
+        while True:
+            await asyncio.sleep(self.keep_warm_seconds)
+            if scheduler.admitted == seen:
+                await self.ping()
+            seen = scheduler.admitted
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "warming": self.warming,
+            "warmed_at": self.warmed_at,
+            "warmup_seconds": self.warmup_seconds,
+            "attempts": self.attempts,
+            "pings": self.pings,
+            "ping_failures": self.ping_failures,
+        }
+
+
+warmer = Warmer(
+    timeout=settings.WARMUP_TIMEOUT_SECONDS,
+    retry_seconds=settings.WARMUP_RETRY_SECONDS,
+    keep_warm_seconds=settings.KEEP_WARM_INTERVAL_SECONDS,
+    max_tokens=settings.WARMUP_MAX_TOKENS,
+    enabled=settings.WARMUP_ENABLED,
+)
@@ -1,8 +1,84 @@
-from fastapi import FastAPI
-from backend.routers import chat, structured, health
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from backend.core.cancellation import ClientDisconnected
+from backend.core.context import DeadlineExceeded, RequestContextMiddleware
+from backend.core.metrics import MetricsMiddleware, registry
+from backend.core.quotas import identify_tenant
+from backend.core.recorder import FlightRecorderMiddleware, flight_recorder, profiler
+from backend.core.scheduler import Overloaded
+from backend.core.shared_state import shared_state
+from backend.external import llm_client
+from backend.external.probe import upstream_probe
+from backend.external.warmup import warmer
+from backend.settings import settings
+from backend.routers import chat, structured, health, debug, metrics, openai_compat, jobs
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Own process-wide resources: the upstream client, custom types, workers, probes, warm-up."""
+    await llm_client.startup()
+    structured.load_registered_types()
+    # In the background: /readyz stays 503 until the model is loaded.
+    warmer.start(structured.system_prompts())
+    jobs.job_queue.start()
+    upstream_probe.start()
+    if shared_state is not None:
+        shared_state.start(registry)
+    if settings.PROFILE_SLOW_REQUEST_SECONDS is not None:
+        profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        if shared_state is not None:
+            await shared_state.stop(registry)
+        await upstream_probe.stop()
+        await warmer.stop()
+        await jobs.job_queue.stop()
+        await llm_client.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+# Innermost first: the recorder needs the request context opened around it.
+app.add_middleware(
+    FlightRecorderMiddleware,
+    recorder=flight_recorder,
+    profiler=profiler,
+    profile_threshold=settings.PROFILE_SLOW_REQUEST_SECONDS,
+)
+app.add_middleware(RequestContextMiddleware, identify=identify_tenant)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(_request: Request, exc: Overloaded) -> JSONResponse:
+    """Shed load immediately instead of letting requests pile up."""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_handler(_request: Request, exc: DeadlineExceeded) -> JSONResponse:
+    """The caller's X-Request-Timeout budget ran out before a response was ready."""
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+@app.exception_handler(ClientDisconnected)
+async def disconnected_handler(_request: Request, exc: ClientDisconnected) -> JSONResponse:
+    """Nobody is listening; 499 only shows up in access logs."""
+    return JSONResponse(status_code=499, content={"detail": str(exc)})
 
-app = FastAPI()
 
 app.include_router(chat.router)
 app.include_router(structured.router)
 app.include_router(health.router)
+app.include_router(debug.router)
+app.include_router(metrics.router)
+app.include_router(openai_compat.router)
+app.include_router(jobs.router)
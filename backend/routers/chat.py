@@ -1,37 +1,83 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse
+from backend.core.cache import CACHE_HEADER, cache_key_for, response_cache
+from backend.core.cancellation import cancel_on_disconnect, until_disconnect
+from backend.core.streaming import coalesce, prime_stream
 from backend.schemas.chat import LLMRequest
+from backend.settings import settings
 from backend.external.llm_client import (
     llm_generate_content,
+    llm_generate_content_fanout_stream,
     llm_generate_content_stream,
 )
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 
-@router.post("")
-async def chat(req: LLMRequest) -> str | dict:
+@router.post("", response_model=None)
+async def chat(
+    req: LLMRequest, request: Request, response: Response
+) -> str | dict | StreamingResponse:
     """Proxy a chat request to the configured LLM and return results."""
     # Ensure structured-output fields aren't forwarded
     clean = req.model_copy(update={"response_type": None, "response_schema": None})
-    data = await llm_generate_content(clean)
+
+    # stream=true with n>1 sends each choice as NDJSON the moment it finishes.
+    if clean.stream and clean.n > 1:
+        stream = await prime_stream(
+            cancel_on_disconnect(request, llm_generate_content_fanout_stream(clean))
+        )
+        return StreamingResponse(stream, media_type="application/x-ndjson")
+
+    result, headers = await run_chat(clean, request)
+    response.headers.update(headers)
+    return result
+
+
+async def run_chat(
+    clean: LLMRequest, request: Request | None = None
+) -> tuple[str | dict[str, object], dict[str, str]]:
+    """Answer a non-streaming chat request; returns the result and response headers.
+
+    Shared by POST /chat and background jobs (which pass no request).
+    """
+    # Deterministic requests are answered from the response cache when possible.
+    key = cache_key_for("chat", clean)
+    if key is not None:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached, {CACHE_HEADER: "HIT"}
+    headers = {CACHE_HEADER: "MISS" if key is not None else "BYPASS"}
+
+    # A client that gives up mid-generation cancels the upstream calls too.
+    data = await until_disconnect(request, llm_generate_content(clean))
 
     try:
         choices = data["choices"]
     except Exception:
         raise HTTPException(status_code=502, detail="LLM response missing choices")
 
-    # Single choice returns a string; multiple choices return answers + raw upstream data.
+    # n=1 returns a string; n>1 returns answers + raw upstream data, even when the
+    # fan-out dropped duplicate choices down to a single answer.
     texts = [c["message"]["content"] for c in choices]
-    return texts[0] if len(texts) == 1 else {"answers": texts, "raw": data}
+    result = texts[0] if clean.n == 1 else {"answers": texts, "raw": data}
+
+    if key is not None:
+        response_cache.set(key, result)
+    return result, headers
 
 
 @router.post("/stream")
-async def chat_stream(req: LLMRequest) -> StreamingResponse:
+async def chat_stream(req: LLMRequest, request: Request) -> StreamingResponse:
     """Proxy a chat request to the configured LLM and stream the response."""
     # Ensure structured-output fields aren't forwarded
     clean = req.model_copy(update={"response_type": None, "response_schema": None})
 
-    return StreamingResponse(
-        llm_generate_content_stream(clean), media_type="text/plain"
+    # Admission happens on the first chunk, so a 429/503 is still possible here.
+    source = coalesce(
+        llm_generate_content_stream(clean),
+        settings.STREAM_FLUSH_INTERVAL,
+        settings.STREAM_FLUSH_BYTES,
     )
+    stream = await prime_stream(cancel_on_disconnect(request, source))
+    return StreamingResponse(stream, media_type="text/plain")
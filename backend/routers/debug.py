@@ -0,0 +1,60 @@
+from fastapi.routing import APIRouter
+from backend.core.cache import response_cache
+from backend.core.cancellation import disconnect_stats
+from backend.core.quotas import tenant_quotas
+from backend.core.recorder import flight_recorder
+from backend.core.repetition import repetition_stats
+from backend.core.scheduler import scheduler
+from backend.core.shared_state import shared_state
+from backend.settings import settings
+from backend.external import llm_client
+from backend.external.balancer import balancer
+from backend.external.fanout import fanout_stats
+from backend.routers.jobs import job_queue
+from backend.routers.structured import (
+    RECOVERY_STATS,
+    RESPONSE_TYPES,
+    STREAM_STATS,
+    schema_compiler,
+)
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/stats")
+async def stats() -> dict[str, object]:
+    """Return live counters from the caching, coalescing, admission and balancing layers."""
+    return {
+        "cache": response_cache.stats(),
+        "singleflight": llm_client.upstream_flight.stats(),
+        "stream_broadcast": llm_client.stream_broadcast.stats(),
+        "scheduler": scheduler.stats(),
+        "workers": {
+            "configured": settings.WORKERS,
+            "live": shared_state.workers() if shared_state is not None else 1,
+        },
+        "upstreams": balancer.stats(),
+        "fanout": fanout_stats.stats(),
+        "structured_stream": dict(STREAM_STATS),
+        "structured_recovery": dict(RECOVERY_STATS),
+        "schema_compiler": schema_compiler.stats(),
+        "structured_types": RESPONSE_TYPES.stats(),
+        "repetition_guard": repetition_stats.stats(),
+        "disconnects": disconnect_stats.stats(),
+        "semantic_cache": llm_client.semantic_cache.stats(),
+        "jobs": job_queue.stats(),
+        "hedging": {
+            "budget": round(llm_client.hedge_budget.tokens, 2),
+            "call": llm_client.call_hedger.stats(),
+            "stream": llm_client.stream_hedger.stats(),
+        },
+        "breaker": llm_client.upstream_breaker.stats(),
+        "retries": llm_client.retry_policy.stats(),
+        "tenants": tenant_quotas.stats(),
+    }
+
+
+@router.get("/requests")
+async def requests(limit: int | None = None) -> dict[str, object]:
+    """Recent and slowest requests with per-phase timings (and profiles, if enabled)."""
+    return flight_recorder.snapshot(limit)
@@ -1,4 +1,10 @@
+from typing import Any
+from fastapi import Response
 from fastapi.routing import APIRouter
+from backend.core.breaker import OPEN
+from backend.external import llm_client
+from backend.external.probe import upstream_probe
+from backend.external.warmup import warmer
 from backend.settings import settings
 
 router = APIRouter()
@@ -6,7 +12,28 @@ router = APIRouter()
 MODEL_ID = settings.MODEL_ID
 
 
+def readiness() -> dict[str, Any]:
+    """Whether requests can be served now: warmed up, breaker not open, an upstream answers."""
+    breaker = llm_client.upstream_breaker.stats()
+    upstream_ok = upstream_probe.healthy()
+    return {
+        "ready": not warmer.warming and breaker["state"] != OPEN and upstream_ok,
+        "warmup": warmer.stats(),
+        "breaker": breaker,
+        "upstreams": upstream_probe.stats(),
+    }
+
+
 @router.get("/healthz")
 async def healthz() -> dict[str, object]:
-    """Return service liveness and the configured model identifier."""
-    return {"ok": True, "model": MODEL_ID}
+    """Return service liveness, the configured model identifier and upstream readiness."""
+    return {"ok": True, "model": MODEL_ID, **readiness()}
+
+
+@router.get("/readyz")
+async def readyz(response: Response) -> dict[str, object]:
+    """200 while the upstream looks usable, 503 otherwise (for load balancer checks)."""
+    status = readiness()
+    if not status["ready"]:
+        response.status_code = 503
+    return status
@@ -0,0 +1,58 @@
+from typing import Any
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from backend.core.jobs import JobQueue, MemoryJobStore, SqliteJobStore
+from backend.routers.chat import run_chat
+from backend.routers.structured import _prepare, run_structured
+from backend.schemas.chat import LLMRequest
+from backend.schemas.jobs import JobInfo, JobRequest
+from backend.settings import settings
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+async def _run_chat(req: LLMRequest) -> tuple[Any, dict[str, str]]:
+    clean = req.model_copy(update={"response_type": None, "response_schema": None})
+    return await run_chat(clean)
+
+
+async def _run_structured(req: LLMRequest) -> tuple[Any, dict[str, str]]:
+    task, clean = _prepare(req)
+    result, headers = await run_structured(task, clean)
+    # Stored results must be plain JSON (the sqlite store serializes them).
+    return jsonable_encoder(result, by_alias=True), headers
+
+
+job_store = (
+    SqliteJobStore(settings.JOBS_STORE_PATH, settings.JOBS_TTL_SECONDS)
+    if settings.JOBS_STORE_PATH
+    else MemoryJobStore(settings.JOBS_TTL_SECONDS)
+)
+job_queue = JobQueue(
+    job_store,
+    {"chat": _run_chat, "structured": _run_structured},
+    workers=settings.JOBS_WORKERS,
+    max_pending=settings.JOBS_MAX_PENDING,
+    timeout=settings.JOBS_TIMEOUT_SECONDS,
+)
+
+
+@router.post("", status_code=202)
+async def submit_job(body: JobRequest, response: Response) -> JobInfo:
+    """Queue a /chat or /structured request and return its job id at once."""
+    req = body.request.model_copy(update={"stream": False})
+    if body.kind == "structured":
+        _prepare(req)  # reject an unknown response_type now, not when the job runs
+    job = job_queue.submit(body.kind, req)
+    response.headers["Location"] = f"{router.prefix}/{job['id']}"
+    return JobInfo(**job)
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, wait: float = 0.0) -> JobInfo:
+    """Job status and, once finished, its result; ``wait`` long-polls up to that many seconds."""
+    timeout = min(max(wait, 0.0), settings.JOBS_MAX_WAIT_SECONDS)
+    job = await job_queue.wait(job_id, timeout)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return JobInfo(**job)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Response
+from backend.core.metrics import CONTENT_TYPE, registry
+from backend.core.shared_state import shared_state
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics")
+async def metrics() -> Response:
+    """Expose counters and latency histograms in Prometheus text format.
+
+    Under multi-worker serving the totals cover every worker, not just this one.
+    """
+    if shared_state is not None:
+        return Response(content=shared_state.render_metrics(registry), media_type=CONTENT_TYPE)
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,62 @@
+import httpx
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from backend.core import jsonio
+from backend.core.cancellation import cancel_on_disconnect, until_disconnect
+from backend.core.context import DeadlineExceeded
+from backend.core.streaming import coalesce, prime_stream
+from backend.external.llm_client import llm_passthrough, llm_passthrough_stream
+from backend.settings import settings
+
+router = APIRouter(prefix="/v1", tags=["openai"])
+
+
+def _error(status_code: int, message: str, kind: str) -> Response:
+    """An error in the OpenAI shape, for failures that have no upstream document."""
+    doc = {"error": {"message": message, "type": kind, "code": None}}
+    return Response(jsonio.dumps(doc), status_code=status_code, media_type="application/json")
+
+
+@router.post("/chat/completions")
+async def chat_completions(request: Request) -> Response:
+    """OpenAI-compatible chat completions, relayed to the model runner as-is.
+
+    The body is only parsed to read ``stream``, fill in ``model`` if it is
+    missing and estimate the tenant's token charge; SSE frames are forwarded
+    without decoding, so ``finish_reason``, role deltas and ``usage`` reach the
+    client exactly as the upstream sent them.
+    """
+    body = await request.body()
+    try:
+        doc = jsonio.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Request body must be JSON")
+    if not isinstance(doc, dict) or not isinstance(doc.get("messages"), list):
+        raise HTTPException(status_code=422, detail="'messages' must be a list")
+    if not doc.get("model"):
+        body = jsonio.dumps({**doc, "model": settings.MODEL_ID})
+
+    try:
+        if doc.get("stream"):
+            # Admission and upstream status errors surface before the headers go out.
+            source = coalesce(
+                llm_passthrough_stream(body, doc),
+                settings.STREAM_FLUSH_INTERVAL,
+                settings.STREAM_FLUSH_BYTES,
+            )
+            stream = await prime_stream(cancel_on_disconnect(request, source))
+            return StreamingResponse(stream, media_type="text/event-stream")
+        content = await until_disconnect(request, llm_passthrough(body, doc))
+    except httpx.HTTPStatusError as e:
+        # Relay the upstream's own error document (OpenAI error shape) and status.
+        return Response(
+            e.response.content,
+            status_code=e.response.status_code,
+            media_type=e.response.headers.get("content-type", "application/json"),
+        )
+    except (DeadlineExceeded, httpx.TimeoutException) as e:
+        # Ours (X-Request-Timeout) or the upstream's read timeout: nothing came back in time.
+        return _error(504, str(e) or "Upstream timed out", "timeout")
+    except httpx.TransportError as e:
+        return _error(502, f"Upstream unreachable: {e}", "upstream_error")
+    return Response(content, media_type="application/json")
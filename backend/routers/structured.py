@@ -1,66 +1,377 @@
-import json
-from fastapi import APIRouter, HTTPException
-from backend.schemas.chat import LLMMessage, LLMRequest
-from backend.schemas.structured import Recipe, Event
-from backend.external.llm_client import llm_generate_content
+import hmac
+from contextlib import aclosing
+from typing import Any, AsyncGenerator
+import httpx
+from fastapi import APIRouter, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, ValidationError
+from backend.core import metrics
+from backend.core.cache import CACHE_HEADER, cache_key_for, response_cache
+from backend.core.cancellation import cancel_on_disconnect, until_disconnect
+from backend.core.context import BULK, DeadlineExceeded, current_context
+from backend.core.json_repair import repair_candidates
+from backend.core.jsonio import dumps
+from backend.core.partial_json import IncrementalJSONParser, InvalidJSON
+from backend.core.scheduler import Overloaded
+from backend.core.schema_compiler import SchemaCompiler, SchemaError
+from backend.core.tasks import StructuredTask, TaskRegistry, TaskStore
+from backend.core.streaming import prime_stream
+from backend.schemas.chat import LLMRequest
+from backend.schemas.structured import (
+    Event,
+    Recipe,
+    StructuredTypeInfo,
+    StructuredTypeRequest,
+)
+from backend.external.llm_client import llm_generate_content, llm_generate_content_stream
+from backend.settings import settings
 
 router = APIRouter(prefix="/structured", tags=["structured"])
 
-# Registry of structured tasks: map response_type -> (Pydantic model, task prompt).
-RESPONSE_TYPES = {
-    "recipe": (Recipe, "You should give the requested recipe and ingredients."),
-    "event": (
-        Event,
-        "You should extract the event name, date, and the names of the people involved.",
-    ),
-}
-
 SYSTEM_PROMPT = """
 You are a JSON generator. Respond with VALID JSON ONLY.
 Do NOT include backticks, comments, HTML tags, markdown, or any extra text.
 """
 
+# Registry of structured tasks: response_type -> compiled task (model, prompt, schema).
+# Custom types are evicted in step with the compiler cache, so neither grows unbounded.
+RESPONSE_TYPES = TaskRegistry(SYSTEM_PROMPT, max_custom=settings.STRUCTURED_SCHEMA_CACHE_SIZE)
+RESPONSE_TYPES.register(
+    "recipe", Recipe, "You should give the requested recipe and ingredients."
+)
+RESPONSE_TYPES.register(
+    "event",
+    Event,
+    "You should extract the event name, date, and the names of the people involved.",
+)
+
+# Runtime-registered types: compiled once per distinct schema, persisted if configured.
+schema_compiler = SchemaCompiler(settings.STRUCTURED_SCHEMA_CACHE_SIZE)
+type_store = TaskStore(settings.STRUCTURED_TYPES_PATH) if settings.STRUCTURED_TYPES_PATH else None
+# Custom types seen beyond this many are reported in metrics as "other".
+MAX_LABELLED_TYPES = 64
+_labelled_types: set[str] = set()
+
+# Outcomes of /structured/stream generations, to see how much compute early abort saves.
+STREAM_STATS = {
+    "streams": 0,
+    "completed": 0,
+    "aborted_invalid_json": 0,
+    "aborted_schema": 0,
+    "tokens_saved": 0,
+}
+
+# How /structured choices were obtained: per-choice provenance, in choice order.
+PROVENANCE_HEADER = "X-Structured-Provenance"
+RECOVERY_STATS = {
+    "parsed": 0,
+    "repaired": 0,
+    "regenerated": 0,
+    "failed": 0,
+    "regeneration_calls": 0,
+}
+
+
+def register_type(name: str, schema: dict[str, Any], prompt: str) -> tuple[str, StructuredTask]:
+    """Compile ``schema`` (or reuse its compiled model) and register it as a custom task."""
+    digest, model = schema_compiler.compile(schema, name)
+    return digest, RESPONSE_TYPES.register(name, model, prompt, schema=schema, custom=True)
+
+
+def load_registered_types() -> int:
+    """Compile every persisted custom type; run at startup, off the request path."""
+    if type_store is None:
+        return 0
+    loaded = 0
+    for name, schema, prompt in type_store.load_all():
+        try:
+            register_type(name, schema, prompt)
+        except SchemaError:
+            continue  # stored by a newer version with a wider schema subset
+        loaded += 1
+    return loaded
+
+
+def type_label(task: StructuredTask) -> str:
+    """The ``response_type`` metric label: bounded, since anyone may register types."""
+    if not task.custom or task.name in _labelled_types:
+        return task.name
+    if len(_labelled_types) >= MAX_LABELLED_TYPES:
+        return "other"
+    _labelled_types.add(task.name)
+    return task.name
+
+
+def system_prompts() -> list[str]:
+    """The system message of every registered task, for warming the prompt cache."""
+    return [RESPONSE_TYPES.get(name).system_message.content for name in RESPONSE_TYPES]
+
+
+def _resolve(name: str | None) -> StructuredTask | None:
+    task = RESPONSE_TYPES.get(name)
+    if task is None and name and type_store is not None:
+        # Registered by another worker since this one started.
+        stored = type_store.load(name)
+        if stored is not None:
+            try:
+                _, task = register_type(name, *stored)
+            except SchemaError:
+                return None
+    return task
+
+
+def _prepare(req: LLMRequest) -> tuple[StructuredTask, LLMRequest]:
+    """Resolve the task and build the upstream request with its system prompt and schema."""
+    task = _resolve(req.response_type)
+    if task is None:
+        raise HTTPException(status_code=400, detail="Unknown response_type")
+
+    # Both come precompiled; this is a shallow copy, not a re-validation.
+    all_messages = [task.system_message, *req.messages]
+    clean = req.model_copy(update={"messages": all_messages, "response_schema": task.schema})
+    return task, clean
+
+
+@router.post("/types", status_code=201)
+async def register_structured_type(
+    body: StructuredTypeRequest, x_admin_key: str | None = Header(default=None)
+) -> StructuredTypeInfo:
+    """Register (or replace) a custom response_type from a JSON Schema and task prompt."""
+    admin_key = settings.STRUCTURED_TYPES_ADMIN_KEY
+    if admin_key is not None:
+        if not hmac.compare_digest((x_admin_key or "").encode(), admin_key.encode()):
+            raise HTTPException(status_code=401, detail="Registering types requires X-Admin-Key")
+    elif not settings.STRUCTURED_TYPES_OPEN:
+        raise HTTPException(status_code=403, detail="Registering types is disabled")
+    existing = RESPONSE_TYPES.get(body.name)
+    if existing is not None and not existing.custom:
+        raise HTTPException(status_code=409, detail="Built-in response_type cannot be replaced")
+    try:
+        digest, task = register_type(body.name, body.json_schema, body.prompt)
+    except SchemaError as e:
+        raise HTTPException(status_code=422, detail=f"Unsupported schema: {e}")
+    if type_store is not None:
+        type_store.save(body.name, body.json_schema, body.prompt)
+    return StructuredTypeInfo(name=task.name, schema_hash=digest, fields=list(task.field_adapters))
+
+
+@router.get("/types")
+async def list_structured_types() -> list[str]:
+    """Names of every response_type /structured accepts."""
+    return list(RESPONSE_TYPES)
+
 
 @router.post("")
-async def get_structured_response(req: LLMRequest) -> list[object] | dict[str, object]:
+async def get_structured_response(
+    req: LLMRequest, request: Request, response: Response
+) -> list[object] | dict[str, object]:
     """Run a structured LLM task and return validated objects or an error."""
-    if not req.response_type or req.response_type not in RESPONSE_TYPES:
-        raise HTTPException(status_code=400, detail="Unknown response_type")
+    task, clean = _prepare(req)
+    # Structured extraction is batch work; interactive chat goes first.
+    current_context().priority = BULK
+    result, headers = await run_structured(task, clean, request)
+    response.headers.update(headers)
+    return result
 
-    model_cls, task_prompt = RESPONSE_TYPES[req.response_type]
-    schema = model_cls.model_json_schema()
 
-    system_message = LLMMessage(
-        role="system", content=f"{SYSTEM_PROMPT}\n{task_prompt}"
-    )
-    all_messages = [system_message] + req.messages
+async def run_structured(
+    task: StructuredTask, clean: LLMRequest, request: Request | None = None
+) -> tuple[list[object] | dict[str, object], dict[str, str]]:
+    """Run a prepared structured task; returns the result and response headers.
 
-    clean = req.model_copy(update={"messages": all_messages, "response_schema": schema})
-    data = await llm_generate_content(clean)
+    Shared by POST /structured and background jobs (which pass no request).
+    """
+    # Cached entries hold already-validated objects, so a hit skips parsing too.
+    key = cache_key_for("structured", clean)
+    if key is not None:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached, {CACHE_HEADER: "HIT"}
+    headers = {CACHE_HEADER: "MISS" if key is not None else "BYPASS"}
+
+    data = await until_disconnect(request, llm_generate_content(clean))
 
-    responses: list[object] = []
     try:
-        texts = data["choices"]
-        for text in texts:
-            try:
-                parsed = json.loads(text["message"]["content"])
-                obj = model_cls.model_validate(parsed)
-                responses.append(obj)
-            except Exception as e:
-                responses.append(
-                    {
-                        "error": f"Invalid structured JSON: {str(e)}. See Tips for help",
-                        "raw_output": text,
-                    }
-                )
-
-    except Exception as e:
-        return {
+        choices = data["choices"]
+        outcomes = [_parse_choice(task, choice) for choice in choices]
+    except (KeyError, TypeError) as e:
+        error = {
             "error": (
                 "Invalid model response. Response does not contain 'choices': "
                 f"{str(e)}"
             ),
             "raw_output": data,
         }
-    else:
-        return responses
+        return error, headers
+
+    await _regenerate_failed(request, task, clean, outcomes)
+
+    responses: list[object] = []
+    provenance: list[str] = []
+    for choice, (obj, how, error) in zip(choices, outcomes):
+        RECOVERY_STATS[how] += 1
+        metrics.structured_validations.inc(type_label(task), how)
+        provenance.append(how)
+        if obj is not None:
+            responses.append(obj)
+        else:
+            responses.append(
+                {
+                    "error": f"Invalid structured JSON: {error}. See Tips for help",
+                    "raw_output": choice,
+                }
+            )
+    headers[PROVENANCE_HEADER] = ",".join(provenance)
+
+    # Only fully valid results are worth replaying.
+    if key is not None and all(isinstance(r, task.model) for r in responses):
+        response_cache.set(key, [r.model_dump(mode="json", by_alias=True) for r in responses])
+    return responses, headers
+
+
+Outcome = tuple[BaseModel | None, str, str | None]
+
+
+def _parse_choice(task: StructuredTask, choice: dict[str, Any]) -> Outcome:
+    """Validate one choice as-is, falling back to cheap local JSON repair."""
+    with current_context().phase("validate"):
+        content = None
+        try:
+            content = choice["message"]["content"]
+            return task.validate_json(content), "parsed", None
+        except Exception as e:
+            error = str(e)
+        if isinstance(content, str):
+            for value in repair_candidates(content):
+                try:
+                    return task.validate_python(value), "repaired", None
+                except ValidationError:
+                    continue
+        return None, "failed", error
+
+
+async def _regenerate_failed(
+    request: Request | None, task: StructuredTask, clean: LLMRequest, outcomes: list[Outcome]
+) -> None:
+    """Regenerate only the choices repair couldn't save, within a bounded budget.
+
+    Each attempt asks for just the failed choices with a higher frequency_penalty,
+    which breaks the loops that usually produce truncated JSON.
+    """
+    for attempt in range(1, settings.STRUCTURED_REGEN_ATTEMPTS + 1):
+        failed = [i for i, (obj, _, _) in enumerate(outcomes) if obj is None]
+        if not failed:
+            return
+        penalty = clean.frequency_penalty + attempt * settings.STRUCTURED_REGEN_PENALTY_STEP
+        retry = clean.model_copy(
+            update={"n": len(failed), "frequency_penalty": min(2.0, penalty)}
+        )
+        RECOVERY_STATS["regeneration_calls"] += 1
+        try:
+            data = await until_disconnect(request, llm_generate_content(retry))
+            choices = data["choices"]
+        except (Overloaded, DeadlineExceeded, httpx.HTTPError, KeyError, TypeError):
+            # Keep what we already have rather than failing the whole request.
+            return
+        for i, choice in zip(failed, choices):
+            obj, _, error = _parse_choice(task, choice)
+            if obj is not None:
+                outcomes[i] = (obj, "regenerated", None)
+            else:
+                outcomes[i] = (None, "failed", error)
+
+
+def _partial_error(task: StructuredTask, partial: Any) -> str | None:
+    """Why a partial document can never validate against the task's model, or None."""
+    if not isinstance(partial, dict):
+        return f"Expected a JSON object, got {type(partial).__name__}"
+    adapters = task.field_adapters
+    for name, value in partial.items():
+        adapter = adapters.get(name)
+        # Nested objects may still be missing required keys; only check leaves.
+        if adapter is None or isinstance(value, dict):
+            continue
+        try:
+            adapter.validate_python(value)
+        except ValidationError as e:
+            return f"Field {name!r} does not match the schema: {e.errors()[0]['msg']}"
+    return None
+
+
+def _event(obj: dict[str, Any]) -> bytes:
+    return dumps(obj) + b"\n"
+
+
+async def _structured_events(
+    task: StructuredTask, clean: LLMRequest
+) -> AsyncGenerator[bytes, None]:
+    """Parse upstream tokens as they arrive and emit NDJSON events.
+
+    Emits ``{"partial": ...}`` each time another value of the document
+    completes, then ``{"object": ...}`` or ``{"error": ..., "aborted": ...}``.
+    The upstream stream is closed as soon as the output can no longer become
+    a valid object, and as soon as the document is complete.
+    """
+    STREAM_STATS["streams"] += 1
+    parser = IncrementalJSONParser()
+    completed_values = 0
+    tokens = 0
+    error: str | None = None
+    reason = ""
+
+    async with aclosing(llm_generate_content_stream(clean)) as upstream:
+        async for piece in upstream:
+            tokens += 1
+            try:
+                parser.feed(piece.decode("utf-8"))
+            except InvalidJSON as e:
+                error, reason = f"Invalid structured JSON: {e}", "aborted_invalid_json"
+                break
+            if parser.values_completed == completed_values:
+                continue
+            completed_values = parser.values_completed
+            partial = parser.snapshot()
+            if partial is None:
+                continue
+            error = _partial_error(task, partial)
+            if error is not None:
+                reason = "aborted_schema"
+                break
+            if parser.complete:
+                break
+            yield _event({"partial": partial})
+
+    if error is None:
+        try:
+            obj = task.validate_python(parser.finish())
+        except (InvalidJSON, ValidationError) as e:
+            error = f"Invalid structured JSON: {e}"
+        else:
+            STREAM_STATS["completed"] += 1
+            metrics.structured_validations.inc(type_label(task), "stream_valid")
+            yield _event({"object": obj.model_dump(mode="json", by_alias=True)})
+            return
+
+    metrics.structured_validations.inc(type_label(task), "stream_invalid")
+    aborted = bool(reason)
+    if aborted:
+        STREAM_STATS[reason] += 1
+        STREAM_STATS["tokens_saved"] += max(0, clean.max_tokens - tokens)
+    yield _event(
+        {
+            "error": f"{error}. See Tips for help",
+            "raw_output": parser.text,
+            "aborted": aborted,
+        }
+    )
+
+
+@router.post("/stream")
+async def get_structured_stream(req: LLMRequest, request: Request) -> StreamingResponse:
+    """Stream a structured task as NDJSON partial objects, aborting invalid output early."""
+    task, clean = _prepare(req)
+    # Someone is watching this render, so it keeps interactive priority.
+    stream = await prime_stream(
+        cancel_on_disconnect(request, _structured_events(task, clean))
+    )
+    return StreamingResponse(stream, media_type="application/x-ndjson")
@@ -0,0 +1,22 @@
+from typing import Any, Literal
+from pydantic import BaseModel
+from backend.schemas.chat import LLMRequest
+
+
+class JobRequest(BaseModel):
+    kind: Literal["chat", "structured"]
+    request: LLMRequest
+
+
+class JobInfo(BaseModel):
+    id: str
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    created_at: float
+    tenant: str | None = None
+    started_at: float | None = None
+    finished_at: float | None = None
+    # Exactly what POST /chat or POST /structured would have returned.
+    result: Any = None
+    error: str | None = None
+    headers: dict[str, str] = {}
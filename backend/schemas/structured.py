@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from typing import Any
+from pydantic import BaseModel, Field
 
 
 class Recipe(BaseModel):
@@ -10,3 +11,15 @@ class Event(BaseModel):
     event_name: str
     event_date: str
     participants: list[str]
+
+
+class StructuredTypeRequest(BaseModel):
+    name: str = Field(pattern=r"^[a-z][a-z0-9_]{0,63}$")
+    json_schema: dict[str, Any]
+    prompt: str = Field(min_length=1, max_length=4000)
+
+
+class StructuredTypeInfo(BaseModel):
+    name: str
+    schema_hash: str
+    fields: list[str]
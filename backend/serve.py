@@ -0,0 +1,91 @@
+"""Production entry point: serve the backend from several worker processes.
+
+Usage::
+
+    python -m backend.serve --workers 4 --host 0.0.0.0 --port 8000
+
+Each worker is a full copy of ``backend.main:app`` behind one listening
+socket. What has to be global lives in sqlite files under ``STATE_DIR``
+(a fresh temporary directory unless set): metrics, the response cache, job
+records, custom structured types and tenant quota buckets. Upstream
+concurrency caps are split between the workers (see ``Settings.per_worker``),
+so their sum stays within ``SCHED_MAX_CONCURRENCY``.
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+from pathlib import Path
+import uvicorn
+
+logger = logging.getLogger("backend.serve")
+
+# Stores that default to the shared state directory unless configured explicitly.
+SHARED_PATHS = {
+    "CACHE_SQLITE_PATH": "response_cache.sqlite3",
+    "JOBS_STORE_PATH": "jobs.sqlite3",
+    "STRUCTURED_TYPES_PATH": "structured_types.sqlite3",
+}
+
+
+def prepare_environment(workers: int, state_dir: str | None = None) -> Path:
+    """Set the variables every worker reads at import; returns the state directory."""
+    state = Path(state_dir or os.environ.get("STATE_DIR") or tempfile.mkdtemp(prefix="smolchat-"))
+    state.mkdir(parents=True, exist_ok=True)
+    # Nothing from backend is imported yet: settings must see these variables.
+    os.environ["WORKERS"] = str(workers)
+    os.environ["STATE_DIR"] = str(state)
+    for name, filename in SHARED_PATHS.items():
+        os.environ.setdefault(name, str(state / filename))
+
+    from backend.core.shared_state import shared_state  # noqa: PLC0415 (after the env is set)
+
+    # Metrics restart from zero with the server; the other stores persist.
+    assert shared_state is not None
+    shared_state.reset()
+    return state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("WEB_CONCURRENCY") or os.cpu_count() or 1),
+        help="worker processes (default: WEB_CONCURRENCY or the CPU count)",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--state-dir", help="shared sqlite state (default: STATE_DIR or a temp dir)"
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper())
+    state = prepare_environment(args.workers, args.state_dir)
+
+    from backend.settings import get_settings  # noqa: PLC0415 (after the env is set)
+
+    settings = get_settings()
+    if args.workers > settings.SCHED_MAX_CONCURRENCY:
+        logger.warning(
+            "%d workers but SCHED_MAX_CONCURRENCY=%d: each worker still gets one slot",
+            args.workers,
+            settings.SCHED_MAX_CONCURRENCY,
+        )
+    logger.info("serving with %d workers, shared state in %s", args.workers, state)
+    uvicorn.run(
+        "backend.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+    )
+
+
+if __name__ == "__main__":
+    main()
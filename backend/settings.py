@@ -7,9 +7,170 @@ class Settings(BaseSettings):
     DMR_API_KEY: str
     MODEL_ID: str
     API_BASE_URL: str | None = None
+    # Optional comma-separated list of model-runner base URLs to balance across.
+    DMR_BASE_URLS: str | None = None
+
+    # Shared upstream HTTP client (connection pool and timeouts, in seconds).
+    UPSTREAM_MAX_CONNECTIONS: int = 100
+    UPSTREAM_MAX_KEEPALIVE: int = 20
+    UPSTREAM_KEEPALIVE_EXPIRY: float = 30.0
+    UPSTREAM_HTTP2: bool = False  # requires the optional `h2` package
+    UPSTREAM_CONNECT_TIMEOUT: float = 5.0
+    UPSTREAM_READ_TIMEOUT: float = 60.0
+    UPSTREAM_POOL_TIMEOUT: float = 10.0
+    # Max gap between streamed chunks; None waits indefinitely.
+    UPSTREAM_STREAM_READ_TIMEOUT: float | None = 120.0
+    # Passive health: eject an endpoint after N consecutive failures, for S seconds.
+    UPSTREAM_EJECT_AFTER: int = 3
+    UPSTREAM_EJECT_SECONDS: float = 30.0
+
+    # Cut generations that loop: an n-gram of REPETITION_NGRAM streamed tokens seen
+    # REPETITION_MAX_REPEATS times within the last REPETITION_WINDOW tokens.
+    REPETITION_GUARD: bool = True
+    REPETITION_NGRAM: int = 8
+    REPETITION_WINDOW: int = 256
+    REPETITION_MAX_REPEATS: int = 4
+
+    # Opt-in hedging: when an upstream call (or a stream's first token) takes longer than
+    # the HEDGE_PERCENTILE of the last HEDGE_WINDOW latencies, send a duplicate and keep
+    # whichever answers first. Hedges are capped at HEDGE_BUDGET_PERCENT of calls.
+    HEDGE_ENABLED: bool = False
+    HEDGE_PERCENTILE: float = 95.0
+    HEDGE_MIN_DELAY: float = 0.05
+    HEDGE_BUDGET_PERCENT: float = 5.0
+    HEDGE_WINDOW: int = 512
+    HEDGE_MIN_SAMPLES: int = 20
+
+    # Circuit breaker: once BREAKER_FAILURE_RATE of the last BREAKER_WINDOW upstream calls
+    # (and at least BREAKER_MIN_CALLS) failed, fail fast with 503 for BREAKER_OPEN_SECONDS,
+    # then let BREAKER_HALF_OPEN_PROBES trial calls decide whether to close again.
+    BREAKER_ENABLED: bool = True
+    BREAKER_WINDOW: int = 20
+    BREAKER_MIN_CALLS: int = 5
+    BREAKER_FAILURE_RATE: float = 0.5
+    BREAKER_OPEN_SECONDS: float = 10.0
+    BREAKER_HALF_OPEN_PROBES: int = 1
+    # Calls that fail with 502/503/504 or a connection error before producing any output
+    # are retried up to RETRY_ATTEMPTS times, with jittered exponential backoff.
+    RETRY_ATTEMPTS: int = 2
+    RETRY_BASE_DELAY: float = 0.2
+    RETRY_MAX_DELAY: float = 2.0
+    # Active health: every PROBE_INTERVAL_SECONDS, GET /models on each endpoint for /readyz.
+    # PROBE_INTERVAL_SECONDS=0 disables probing.
+    PROBE_INTERVAL_SECONDS: float = 10.0
+    PROBE_TIMEOUT_SECONDS: float = 2.0
+
+    # Startup warm-up: load the model on every endpoint and prime the prompt cache with
+    # the structured system prompts before /readyz reports ready. Failed passes are
+    # retried every WARMUP_RETRY_SECONDS. Afterwards, when KEEP_WARM_INTERVAL_SECONDS
+    # pass without traffic, a minimal generation keeps the model loaded (0 disables).
+    WARMUP_ENABLED: bool = True
+    WARMUP_TIMEOUT_SECONDS: float = 300.0  # a cold model load can take minutes
+    WARMUP_RETRY_SECONDS: float = 5.0
+    WARMUP_MAX_TOKENS: int = 1
+    KEEP_WARM_INTERVAL_SECONDS: float = 240.0
+
+    # Streamed replies are flushed to the client every STREAM_FLUSH_INTERVAL seconds or
+    # STREAM_FLUSH_BYTES bytes, whichever comes first; the first chunk goes out at once.
+    # STREAM_FLUSH_INTERVAL=0 sends every upstream chunk as its own write.
+    STREAM_FLUSH_INTERVAL: float = 0.03
+    STREAM_FLUSH_BYTES: int = 256
+
+    # /structured recovery: choices that fail validation even after local JSON repair
+    # are regenerated up to N times, raising frequency_penalty by STEP each time.
+    STRUCTURED_REGEN_ATTEMPTS: int = 1
+    STRUCTURED_REGEN_PENALTY_STEP: float = 0.5
+    # Custom types registered via POST /structured/types; set a path to persist them.
+    # Registration is closed by default: set an admin key (sent as X-Admin-Key), or
+    # STRUCTURED_TYPES_OPEN=true to let any client register and replace types.
+    STRUCTURED_TYPES_PATH: str | None = None
+    STRUCTURED_TYPES_ADMIN_KEY: str | None = None
+    STRUCTURED_TYPES_OPEN: bool = False
+    # Compiled validators kept by schema hash, and custom types kept (least recently used).
+    STRUCTURED_SCHEMA_CACHE_SIZE: int = 256
+
+    # Exact-match cache for deterministic (seeded or temperature=0) requests.
+    CACHE_ENABLED: bool = True
+    CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    CACHE_TTL_SECONDS: float = 3600.0
+    CACHE_SQLITE_PATH: str | None = None  # set to persist entries across restarts
+
+    # Opt-in semantic cache: reuse an answer when the final user message
+    # embeds within SEMANTIC_CACHE_THRESHOLD cosine similarity of a cached one.
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 10_000
+    SEMANTIC_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    SEMANTIC_CACHE_EMBEDDER: str = "upstream"  # "upstream" (/embeddings) or "hashing"
+    SEMANTIC_CACHE_EMBED_MODEL: str | None = None  # defaults to MODEL_ID
+
+    # Async jobs (POST /jobs): worker tasks, queue bound, per-job deadline, and how long
+    # records are kept after their last update. Set JOBS_STORE_PATH to keep them in sqlite.
+    JOBS_WORKERS: int = 4
+    JOBS_MAX_PENDING: int = 1000
+    JOBS_TIMEOUT_SECONDS: float | None = 600.0
+    JOBS_TTL_SECONDS: float = 3600.0
+    JOBS_MAX_WAIT_SECONDS: float = 30.0  # cap on GET /jobs/{id}?wait=
+    JOBS_STORE_PATH: str | None = None
+
+    # Admission control in front of the model runner.
+    SCHED_MAX_CONCURRENCY: int = 16  # concurrent upstream generations (ceiling if adaptive)
+    SCHED_MAX_QUEUE: int = 64  # waiting generations before shedding with 429
+    SCHED_QUEUE_TIMEOUT_INTERACTIVE: float = 10.0  # seconds a /chat call may queue
+    SCHED_QUEUE_TIMEOUT_BULK: float = 30.0  # /structured and n>1 fan-outs
+    # AIMD: grow the limit while latency holds, cut it when latency degrades or errors.
+    SCHED_ADAPTIVE: bool = True
+    SCHED_INITIAL_CONCURRENCY: int = 4
+    SCHED_MIN_CONCURRENCY: int = 1
+    SCHED_LATENCY_TOLERANCE: float = 1.5  # latency / baseline ratio that triggers a cut
+    SCHED_DECREASE_FACTOR: float = 0.7
+
+    # Per-tenant quotas in front of generation. A tenant is the TENANT_HEADER value if
+    # set (only for a trusted gateway), else the API key (Bearer or X-API-Key; name keys
+    # in TENANT_API_KEYS, e.g. {"sk-123": "batch"}), else "anonymous". Each tenant may
+    # use TENANT_REQUESTS_PER_MINUTE requests and TENANT_TOKENS_PER_MINUTE tokens
+    # (None = unlimited), waiting up to TENANT_MAX_WAIT_SECONDS before a 429. Waiting
+    # generations are served in proportion to TENANT_WEIGHT. TENANT_QUOTAS overrides
+    # these per tenant, e.g. {"batch": {"tokens_per_minute": 20000, "weight": 0.25}};
+    # "bulk": true also queues all of a tenant's generations behind interactive work.
+    TENANT_HEADER: str | None = None
+    TENANT_API_KEYS: dict[str, str] = {}
+    TENANT_REQUESTS_PER_MINUTE: float | None = None
+    TENANT_TOKENS_PER_MINUTE: float | None = None
+    TENANT_WEIGHT: float = 1.0
+    TENANT_QUOTAS: dict[str, dict[str, float | bool]] = {}
+    TENANT_MAX_WAIT_SECONDS: float = 2.0
+
+    # Multi-worker serving (python -m backend.serve --workers N) sets these: WORKERS
+    # splits the SCHED_* caps between processes so their sum stays within the upstream
+    # limits, and STATE_DIR holds the sqlite state they share (metrics, caches, jobs).
+    WORKERS: int = 1
+    STATE_DIR: str | None = None
+    METRICS_PUBLISH_SECONDS: float = 1.0
+
+    # Flight recorder behind /debug/requests: recent requests and the slowest ones.
+    RECORDER_CAPACITY: int = 256
+    RECORDER_SLOWEST: int = 32
+    # Opt-in: attach a sampled stack profile to requests slower than this (seconds).
+    PROFILE_SLOW_REQUEST_SECONDS: float | None = None
+    PROFILE_INTERVAL_SECONDS: float = 0.005
+    PROFILE_WINDOW_SECONDS: float = 60.0  # how long samples are kept
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
+    @property
+    def upstream_urls(self) -> list[str]:
+        """Model-runner base URLs: DMR_BASE_URLS if set, else DMR_BASE_URL."""
+        if self.DMR_BASE_URLS:
+            urls = [u.strip() for u in self.DMR_BASE_URLS.split(",") if u.strip()]
+            if urls:
+                return urls
+        return [self.DMR_BASE_URL]
+
+    def per_worker(self, total: int) -> int:
+        """This process's share of a server-wide limit (at least 1)."""
+        return max(1, total // max(1, self.WORKERS))
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -0,0 +1,92 @@
+"""Compare a fresh httpx client per call against the shared pooled client.
+
+Usage: ``python -m benchmarks.bench_client_pool [--requests 2000] [--concurrency 32]``
+
+Both modes post the same payload to a local stub upstream; the "per-request"
+mode reproduces the old ``async with httpx.AsyncClient()`` per call behaviour.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+PORT = 18801
+os.environ.setdefault("DMR_BASE_URL", f"http://127.0.0.1:{PORT}")
+os.environ.setdefault("DMR_API_KEY", "bench")
+os.environ.setdefault("MODEL_ID", "ai/bench:latest")
+
+# pylint: disable=wrong-import-position
+from backend.external import llm_client  # noqa: E402
+from backend.schemas.chat import LLMRequest  # noqa: E402
+from benchmarks.stub_upstream import StubUpstream, serve_in_thread  # noqa: E402
+
+REQ = LLMRequest.model_validate({"messages": [{"role": "user", "content": "Hi"}]})
+
+
+async def per_request_call() -> None:
+    payload = llm_client.build_payload(REQ)
+    url = f"{llm_client.settings.DMR_BASE_URL}/chat/completions"
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        r = await client.post(url, headers=llm_client.HEADERS, json=payload)
+        r.raise_for_status()
+        r.json()
+
+
+async def pooled_call() -> None:
+    await llm_client.llm_generate_content(REQ)
+
+
+async def run(call: Callable[[], Awaitable[None]], total: int, concurrency: int) -> dict[str, float]:
+    latencies: list[float] = []
+    remaining = iter(range(total))
+
+    async def worker() -> None:
+        for _ in remaining:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main_async(total: int, concurrency: int) -> None:
+    await llm_client.startup()
+    try:
+        for name, call in (("per-request", per_request_call), ("pooled", pooled_call)):
+            await run(call, min(total, 100), concurrency)  # warm-up
+            res = await run(call, total, concurrency)
+            print(
+                f"{name:12s} {res['rps']:9.1f} req/s  "
+                f"p50 {res['p50_ms']:7.2f} ms  p99 {res['p99_ms']:7.2f} ms"
+            )
+    finally:
+        await llm_client.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    server = serve_in_thread(StubUpstream(), PORT)
+    try:
+        asyncio.run(main_async(args.requests, args.concurrency))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
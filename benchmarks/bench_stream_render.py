@@ -0,0 +1,172 @@
+"""Render calls and CPU for streaming a long reply into the Streamlit chat.
+
+Usage: ``python -m benchmarks.bench_stream_render [--tokens 2000] [--tps 50] [--fps 12]``
+
+A reply of ``--tokens`` pieces arrives at ``--tps`` on a simulated clock, so
+the run takes milliseconds however slow the simulated model is. Both the
+frontend's ``ThrottledText`` and the backend's ``coalesce`` are the shipped
+code; ``coalesce`` runs on an event loop whose clock jumps ahead instead of
+sleeping. Each render
+stands in for ``placeholder.markdown(text)``: Streamlit puts the whole message
+into a protobuf and sends it to the browser on every call. Here that is
+approximated by JSON-encoding the full text. The browser's markdown rendering
+is not measured.
+
+Modes:
+- ``per-piece``: the old loop, one render per piece from ``iter_text()``
+- ``throttled``: ``frontend/throttle.ThrottledText`` at ``--fps``
+- ``+coalesced``: the same, with pieces grouped by
+  ``backend.core.streaming.coalesce`` (``STREAM_FLUSH_INTERVAL`` /
+  ``STREAM_FLUSH_BYTES``)
+"""
+
+import argparse
+import asyncio
+import json
+import selectors
+import sys
+import time
+from pathlib import Path
+from typing import AsyncGenerator, Callable
+
+from backend.core.streaming import coalesce
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "frontend"))
+
+# pylint: disable=wrong-import-position
+from throttle import ThrottledText  # noqa: E402
+
+WORDS = ("the", " quick", " model", " streams", " tokens", " over", " a", " lazy", " socket")
+
+
+def arrivals(tokens: int, tps: float) -> list[tuple[float, str]]:
+    """(arrival time, piece) for each token of the reply."""
+    return [(i / tps, WORDS[i % len(WORDS)]) for i in range(tokens)]
+
+
+class _SkipAheadSelector(selectors.DefaultSelector):
+    """Instead of blocking for ``timeout``, move the loop's clock forward by it."""
+
+    def __init__(self, loop: "VirtualClockLoop") -> None:
+        super().__init__()
+        self.loop = loop
+
+    def select(self, timeout: float | None = None) -> list:
+        if timeout:
+            self.loop.now += timeout
+        return super().select(0)
+
+
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    """An event loop on simulated time: sleeps and timeouts cost no wall time."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        super().__init__(_SkipAheadSelector(self))
+
+    def time(self) -> float:
+        return self.now
+
+
+def coalesced(
+    pieces: list[tuple[float, str]], interval: float, max_bytes: int
+) -> list[tuple[float, str]]:
+    """Group pieces with the backend's own ``coalesce``, timestamped on the simulated clock."""
+
+    async def source() -> AsyncGenerator[bytes, None]:
+        for at, piece in pieces:
+            await asyncio.sleep(at - loop.time())
+            yield piece.encode()
+
+    async def collect() -> list[tuple[float, str]]:
+        return [
+            (loop.time(), chunk.decode())
+            async for chunk in coalesce(source(), interval, max_bytes)
+        ]
+
+    loop = VirtualClockLoop()
+    try:
+        return loop.run_until_complete(collect())
+    finally:
+        loop.close()
+
+
+class Placeholder:
+    """Stand-in for ``st.empty()`` that does the per-call serialization work."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.bytes = 0
+        self.last = ""
+
+    def markdown(self, text: str) -> None:
+        self.calls += 1
+        self.bytes += len(json.dumps({"markdown": {"body": text}}).encode())
+        self.last = text
+
+
+def run(pieces: list[tuple[float, str]], make_sink: Callable) -> dict[str, float]:
+    placeholder = Placeholder()
+    now = [0.0]
+    feed, finish = make_sink(placeholder, lambda: now[0])
+    start = time.process_time()
+    for at, piece in pieces:
+        now[0] = at
+        feed(piece)
+    text = finish()
+    cpu = time.process_time() - start
+    assert placeholder.last == text == "".join(p for _, p in pieces)
+    return {
+        "pieces": len(pieces),
+        "renders": placeholder.calls,
+        "sent_mb": placeholder.bytes / 2**20,
+        "cpu_ms": cpu * 1000,
+    }
+
+
+def per_piece(placeholder: Placeholder, clock: Callable[[], float]):
+    parts: list[str] = []
+
+    def feed(piece: str) -> None:
+        parts.append(piece)
+        placeholder.markdown("".join(parts))
+
+    return feed, lambda: "".join(parts)
+
+
+def throttled(fps: float):
+    def make(placeholder: Placeholder, clock: Callable[[], float]):
+        live = ThrottledText(placeholder.markdown, max_fps=fps, clock=clock)
+        return live.feed, live.finish
+
+    return make
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--tps", type=float, default=50.0, help="simulated decode rate")
+    parser.add_argument("--fps", type=float, default=12.0)
+    parser.add_argument("--flush-interval", type=float, default=0.03)
+    parser.add_argument("--flush-bytes", type=int, default=256)
+    args = parser.parse_args()
+
+    raw = arrivals(args.tokens, args.tps)
+    grouped = coalesced(raw, args.flush_interval, args.flush_bytes)
+    rows = [
+        ("per-piece", run(raw, per_piece)),
+        ("per-piece+coalesced", run(grouped, per_piece)),
+        ("throttled", run(raw, throttled(args.fps))),
+        ("throttled+coalesced", run(grouped, throttled(args.fps))),
+    ]
+    print(f"{args.tokens} tokens at {args.tps:g} tok/s, redraw cap {args.fps:g} fps")
+    print(f"{'mode':22s} {'pieces':>7s} {'renders':>8s} {'sent MB':>8s} {'cpu ms':>8s}")
+    for name, r in rows:
+        print(
+            f"{name:22s} {r['pieces']:7d} {r['renders']:8d} "
+            f"{r['sent_mb']:8.1f} {r['cpu_ms']:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Per-request CPU of the /structured hot path, before and after the task registry.
+
+Usage: ``python -m benchmarks.bench_structured_cpu [--iterations 20000] [--choices 3]``
+
+No network is involved: each iteration prepares the upstream request, builds
+and serializes the payload, hashes the cache key, and validates ``--choices``
+model outputs. The "legacy" mode reproduces the old code path (schema and
+system message rebuilt per call, ``model_dump`` per message, stdlib json,
+``json.loads`` + ``model_validate``).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Callable
+
+os.environ.setdefault("DMR_BASE_URL", "http://127.0.0.1:1")
+os.environ.setdefault("DMR_API_KEY", "bench")
+os.environ.setdefault("MODEL_ID", "ai/bench:latest")
+
+# pylint: disable=wrong-import-position
+from backend.core import jsonio  # noqa: E402
+from backend.core.keys import canonical_hash  # noqa: E402
+from backend.external.llm_client import build_payload  # noqa: E402
+from backend.routers.structured import SYSTEM_PROMPT, _prepare  # noqa: E402
+from backend.schemas.chat import LLMMessage, LLMRequest  # noqa: E402
+from backend.schemas.structured import Recipe  # noqa: E402
+from backend.settings import settings  # noqa: E402
+
+REQ = LLMRequest.model_validate(
+    {
+        "messages": [
+            {"role": "user", "content": "Give me a recipe for a weeknight chili."},
+            {"role": "assistant", "content": "Sure, any dietary restrictions?"},
+            {"role": "user", "content": "No beans, please, and keep it mild."},
+        ],
+        "response_type": "recipe",
+        "seed": 7,
+    }
+)
+OUTPUT = json.dumps(
+    {
+        "recipe_name": "Mild Beanless Chili",
+        "ingredients": ["ground beef", "onion", "tomatoes", "cumin", "paprika", "garlic"],
+    }
+)
+PROMPT = "You should give the requested recipe and ingredients."
+
+
+def legacy(choices: int) -> None:
+    schema = Recipe.model_json_schema()
+    system_message = LLMMessage(role="system", content=f"{SYSTEM_PROMPT}\n{PROMPT}")
+    clean = REQ.model_copy(
+        update={"messages": [system_message] + REQ.messages, "response_schema": schema}
+    )
+    payload = build_payload(clean)
+    payload["messages"] = [m.model_dump() for m in clean.messages]
+    blob = json.dumps(
+        ["structured", payload], sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    hashlib.sha256(blob.encode("utf-8")).hexdigest()
+    json.dumps(payload).encode("utf-8")
+    for _ in range(choices):
+        Recipe.model_validate(json.loads(OUTPUT))
+
+
+def registry(choices: int) -> None:
+    task, clean = _prepare(REQ)
+    payload = build_payload(clean)
+    canonical_hash("structured", payload)
+    jsonio.dumps(payload)
+    for _ in range(choices):
+        task.validate_json(OUTPUT)
+
+
+def measure(fn: Callable[[int], None], iterations: int, choices: int) -> float:
+    """Mean process CPU time per request, in microseconds."""
+    for _ in range(min(iterations, 1000)):  # warm-up
+        fn(choices)
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(choices)
+    return (time.process_time() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--choices", type=int, default=3)
+    args = parser.parse_args()
+
+    encoder = "orjson" if jsonio.orjson is not None else "json"
+    print(f"model {settings.MODEL_ID}, {args.choices} choices/request, encoder {encoder}")
+    results = {}
+    for name, fn in (("legacy", legacy), ("registry", registry)):
+        results[name] = measure(fn, args.iterations, args.choices)
+        print(f"{name:9s} {results[name]:8.1f} us CPU/request")
+    print(f"speedup   {results['legacy'] / results['registry']:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
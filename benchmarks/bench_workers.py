@@ -0,0 +1,145 @@
+"""Throughput of the backend as worker processes are added, against the stub upstream.
+
+Usage: ``python -m benchmarks.bench_workers [--workers 1,2,4] [--scenario structured]``
+
+For each worker count the backend is started through ``backend.serve`` and
+driven closed-loop: ``--concurrency`` clients each send their next request as
+soon as the previous one returns, so throughput is what the backend can
+sustain. The stub runs as its own process with instant answers, so the
+backend's own CPU work (parsing, validation, relaying) is the bottleneck.
+Upstream caps are raised out of the way; they are split between workers.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks.loadgen import ROOT, SCENARIOS, ProcessStats, percentile, start_backend
+
+ENV = {
+    "SCHED_ADAPTIVE": "false",
+    "SCHED_MAX_CONCURRENCY": "256",
+    "SCHED_MAX_QUEUE": "1024",
+    "CACHE_ENABLED": "false",
+    "WARMUP_ENABLED": "false",
+    "PROBE_INTERVAL_SECONDS": "0",
+}
+
+
+async def closed_loop(
+    base_url: str, scenario: dict[str, Any], concurrency: int, duration: float
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    stop_at = time.perf_counter() + duration
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                if scenario["stream"]:
+                    body = scenario["body"]()
+                    async with client.stream("POST", scenario["path"], json=body) as r:
+                        async for _ in r.aiter_bytes():
+                            pass
+                else:
+                    r = await client.post(scenario["path"], json=scenario["body"]())
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            if r.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": {
+            f"p{p}": round((percentile(latencies, p) or 0) * 1000, 2) for p in (50, 95, 99)
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--scenario", default="structured", choices=sorted(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds first")
+    parser.add_argument("--backend-port", type=int, default=18910)
+    parser.add_argument("--stub-port", type=int, default=18911)
+    parser.add_argument("--out", default="benchmarks/results/workers.json")
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.workers.split(",") if n.strip()]
+    scenario = SCENARIOS[args.scenario]
+    # Terminated in the finally block below, after every worker count has run.
+    stub = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "-m", "benchmarks.stub_upstream", "--port", str(args.stub_port)],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{args.backend_port}"
+    results = []
+    try:
+        for workers in counts:
+            backend = start_backend(
+                args.backend_port, f"http://127.0.0.1:{args.stub_port}", ENV, workers
+            )
+            try:
+                asyncio.run(closed_loop(base_url, scenario, args.concurrency, args.warmup))
+                proc = ProcessStats(backend.pid)
+                cpu_before = proc.cpu_seconds() or 0.0
+                result = asyncio.run(
+                    closed_loop(base_url, scenario, args.concurrency, args.duration)
+                )
+                cpu = (proc.cpu_seconds() or 0.0) - cpu_before
+                result.update(workers=workers, backend_cpu_s=round(cpu, 2))
+                results.append(result)
+            finally:
+                backend.terminate()
+                backend.wait(timeout=15)
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+
+    base = results[0]["throughput_rps"] if results else 0
+    print(f"{'workers':>7s} {'rps':>8s} {'scale':>6s} {'p50':>8s} {'p95':>8s} {'cpu_s':>7s}")
+    for r in results:
+        scale = r["throughput_rps"] / base if base else 0
+        print(
+            f"{r['workers']:7d} {r['throughput_rps']:8.1f} {scale:6.2f} "
+            f"{r['latency_ms']['p50']:8.1f} {r['latency_ms']['p95']:8.1f} {r['backend_cpu_s']:7.2f}"
+        )
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {"cpus": os.cpu_count()},
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "results": results,
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
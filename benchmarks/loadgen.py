@@ -0,0 +1,306 @@
+"""Open-loop load generator for the backend, run against the simulated model runner.
+
+Usage::
+
+    python -m benchmarks.loadgen --rate 20 --duration 15 --ttft 0.2 --tps 50 --slots 8
+    python -m benchmarks.loadgen --scenarios chat,structured --out results.json
+
+The script starts the stub upstream in-process (see ``benchmarks.stub_upstream``
+for its knobs) and the backend as a uvicorn subprocess pointed at it. Each
+scenario sends requests at a fixed arrival rate whether or not earlier ones
+have finished, so queueing shows up as latency rather than lower offered load.
+
+Per scenario it reports:
+- throughput and error counts
+- p50/p95/p99 latency
+- time to first byte (TTFT) for streaming scenarios
+- backend CPU seconds and peak RSS, read from /proc, so Linux only
+
+Everything is also written as JSON to ``--out``, so runs can be diffed.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from benchmarks.stub_upstream import add_stub_arguments, serve_in_thread, stub_from_args
+
+ROOT = Path(__file__).resolve().parents[1]
+_serial = itertools.count()
+
+
+def _messages(tag: str) -> list[dict[str, str]]:
+    # A unique prompt per request keeps the response cache and coalescing out of the way.
+    return [{"role": "user", "content": f"{tag} request {next(_serial)}"}]
+
+
+SCENARIOS: dict[str, dict[str, Any]] = {
+    "chat": {"path": "/chat", "stream": False, "body": lambda: {"messages": _messages("chat")}},
+    "chat_stream": {
+        "path": "/chat/stream",
+        "stream": True,
+        "body": lambda: {"messages": _messages("stream")},
+    },
+    "openai_stream": {
+        "path": "/v1/chat/completions",
+        "stream": True,
+        "body": lambda: {"messages": _messages("openai"), "stream": True},
+    },
+    "structured": {
+        "path": "/structured",
+        "stream": False,
+        "body": lambda: {"messages": _messages("recipe"), "response_type": "recipe"},
+    },
+    "fanout": {
+        "path": "/chat",
+        "stream": False,
+        "body": lambda: {"messages": _messages("fanout"), "n": 4},
+    },
+}
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile; None for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class ProcessStats:
+    """CPU time and resident memory of a process and its children, from /proc (Linux only).
+
+    Children matter for ``--workers``: the backend is then a supervisor plus
+    one process per worker.
+    """
+
+    def __init__(self, pid: int) -> None:
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self.page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def pids(self) -> list[int]:
+        found, pending = [], [self.pid]
+        while pending:
+            pid = pending.pop()
+            found.append(pid)
+            for task in Path(f"/proc/{pid}/task").glob("*/children"):
+                try:
+                    pending.extend(int(child) for child in task.read_text(encoding="utf-8").split())
+                except OSError:
+                    continue
+        return found
+
+    def cpu_seconds(self) -> float | None:
+        total = None
+        for pid in self.pids():
+            try:
+                stat = Path(f"/proc/{pid}/stat").read_text(encoding="utf-8")
+            except OSError:
+                continue
+            # utime and stime are fields 14 and 15; index 0 here is field 3 (state).
+            fields = stat.rsplit(")", 1)[1].split()
+            total = (total or 0) + (int(fields[11]) + int(fields[12])) / self.ticks
+        return total
+
+    def rss_bytes(self) -> int | None:
+        total = None
+        for pid in self.pids():
+            try:
+                pages = int(Path(f"/proc/{pid}/statm").read_text(encoding="utf-8").split()[1])
+            except OSError:
+                continue
+            total = (total or 0) + pages * self.page
+        return total
+
+
+async def one_request(
+    client: httpx.AsyncClient, scenario: dict[str, Any], samples: dict[str, list[Any]]
+) -> None:
+    start = time.perf_counter()
+    try:
+        if scenario["stream"]:
+            async with client.stream("POST", scenario["path"], json=scenario["body"]()) as r:
+                first = None
+                async for _ in r.aiter_bytes():
+                    if first is None:
+                        first = time.perf_counter() - start
+                status = r.status_code
+            if first is not None:
+                samples["ttft"].append(first)
+        else:
+            r = await client.post(scenario["path"], json=scenario["body"]())
+            status = r.status_code
+    except httpx.HTTPError as e:
+        samples["errors"].append(type(e).__name__)
+        return
+    if status == 200:
+        samples["latency"].append(time.perf_counter() - start)
+    else:
+        samples["errors"].append(str(status))
+
+
+async def run_scenario(
+    base_url: str, name: str, rate: float, duration: float, proc: ProcessStats | None
+) -> dict[str, Any]:
+    scenario = SCENARIOS[name]
+    samples: dict[str, list[Any]] = {"latency": [], "ttft": [], "errors": []}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=256)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        cpu_before = proc.cpu_seconds() if proc else None
+        rss_peak = 0
+        tasks = []
+        start = time.perf_counter()
+        total = int(rate * duration)
+        for i in range(total):
+            # Fixed arrival schedule: fall behind and the next requests go out at once.
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(one_request(client, scenario, samples)))
+            if proc and i % max(1, int(rate)) == 0:
+                rss_peak = max(rss_peak, proc.rss_bytes() or 0)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        cpu_after = proc.cpu_seconds() if proc else None
+        if proc:
+            rss_peak = max(rss_peak, proc.rss_bytes() or 0)
+
+    latency, ttft = samples["latency"], samples["ttft"]
+    cpu = None if cpu_before is None or cpu_after is None else cpu_after - cpu_before
+
+    def ms(value: float | None) -> float | None:
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "scenario": name,
+        "offered_rps": rate,
+        "sent": total,
+        "ok": len(latency),
+        "errors": len(samples["errors"]),
+        "error_kinds": sorted(set(samples["errors"])),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latency) / elapsed, 2) if elapsed else None,
+        "latency_ms": {f"p{p}": ms(percentile(latency, p)) for p in (50, 95, 99)},
+        "ttft_ms": {f"p{p}": ms(percentile(ttft, p)) for p in (50, 95, 99)} if ttft else None,
+        "backend_cpu_s": None if cpu is None else round(cpu, 3),
+        "backend_cpu_pct": None if cpu is None else round(100 * cpu / elapsed, 1),
+        "backend_rss_mb": round(rss_peak / 2**20, 1) if rss_peak else None,
+    }
+
+
+def start_backend(
+    port: int, upstream_url: str, env_overrides: dict[str, str], workers: int = 1
+) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DMR_BASE_URL": upstream_url,
+        "DMR_API_KEY": "bench",
+        "MODEL_ID": "ai/bench:latest",
+        **env_overrides,
+    }
+    if workers > 1:
+        command = ["backend.serve", "--workers", str(workers)]
+    else:
+        command = ["uvicorn", "backend.main:app"]
+    # The caller owns the process and terminates it once the scenario is done.
+    proc = subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "-m", *command, "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/healthz", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("backend did not start")
+
+
+def print_table(results: list[dict[str, Any]]) -> None:
+    print(f"{'scenario':12s} {'rps':>7s} {'ok':>6s} {'err':>5s} {'p50':>8s} {'p95':>8s} "
+          f"{'p99':>8s} {'ttft50':>8s} {'cpu%':>6s} {'rssMB':>6s}")
+    for r in results:
+        ttft = (r["ttft_ms"] or {}).get("p50")
+        cells = [r["latency_ms"]["p50"], r["latency_ms"]["p95"], r["latency_ms"]["p99"], ttft]
+        print(
+            f"{r['scenario']:12s} {r['throughput_rps'] or 0:7.1f} {r['ok']:6d} {r['errors']:5d} "
+            + " ".join(f"{c:8.1f}" if c is not None else f"{'-':>8s}" for c in cells)
+            + f" {r['backend_cpu_pct'] or 0:6.1f} {r['backend_rss_mb'] or 0:6.1f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--rate", type=float, default=10.0, help="arrivals per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--backend-port", type=int, default=18900)
+    parser.add_argument("--stub-port", type=int, default=18901)
+    parser.add_argument("--backend-url", help="use a running backend instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="backend worker processes")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra backend settings, e.g. --env SCHED_ADAPTIVE=false")
+    parser.add_argument("--out", default="benchmarks/results/loadgen.json")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = set(names) - SCENARIOS.keys()
+    if unknown:
+        parser.error(f"unknown scenarios: {sorted(unknown)}")
+
+    stub = stub_from_args(args)
+    stub_server = serve_in_thread(stub, args.stub_port)
+    backend = None
+    try:
+        if args.backend_url:
+            base_url, proc = args.backend_url, None
+        else:
+            overrides = dict(item.split("=", 1) for item in args.env)
+            upstream_url = f"http://127.0.0.1:{args.stub_port}"
+            backend = start_backend(args.backend_port, upstream_url, overrides, args.workers)
+            base_url, proc = f"http://127.0.0.1:{args.backend_port}", ProcessStats(backend.pid)
+        results = [
+            asyncio.run(run_scenario(base_url, name, args.rate, args.duration, proc))
+            for name in names
+        ]
+    finally:
+        if backend is not None:
+            backend.terminate()
+            backend.wait(timeout=10)
+        stub_server.should_exit = True
+
+    print_table(results)
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "host": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count()},
+        "config": {k: v for k, v in vars(args).items() if k != "out"},
+        "stub": {"requests": stub.requests, "errors": stub.errors},
+        "results": results,
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Stand-in for the Docker Model Runner chat-completions API.
+
+Run it standalone with ``python -m benchmarks.stub_upstream --port 8001 --ttft 0.2 --tps 40``,
+or start it in-process with :func:`serve_in_thread` from a benchmark script.
+
+It simulates a model runner closely enough to load-test the backend:
+- time-to-first-token and a decode rate in tokens/sec
+- a fixed number of generation slots (extra requests wait, as in llama.cpp)
+- an error rate
+- occasional stalls (a request stuck behind a long generation)
+- SSE streaming with ``stream_options.include_usage``
+- ``n`` choices per request
+- ``response_format`` JSON schemas, answered with a conforming document
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+from typing import Any
+
+import uvicorn
+
+COMPLETION = {
+    "id": "stub",
+    "object": "chat.completion",
+    "model": "stub",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "Hello from the stub."},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 8, "completion_tokens": 5, "total_tokens": 13},
+}
+
+WORDS = ("the", "quick", "model", "streams", "tokens", "over", "a", "lazy", "socket")
+
+
+def sample_document(schema: dict[str, Any], serial: int) -> Any:
+    """A small value that satisfies ``schema`` (the subset /structured sends)."""
+    if "enum" in schema:
+        return schema["enum"][serial % len(schema["enum"])]
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        props = schema.get("properties", {})
+        return {key: sample_document(sub, serial) for key, sub in props.items()}
+    if kind == "array":
+        return [sample_document(schema.get("items", {}), serial + i) for i in range(2)]
+    if kind == "integer":
+        return serial
+    if kind == "number":
+        return serial / 2
+    if kind == "boolean":
+        return serial % 2 == 0
+    if kind == "null":
+        return None
+    return f"{WORDS[serial % len(WORDS)]} {serial}"
+
+
+def _tokens(text: str, size: int = 4) -> list[str]:
+    """Split text into roughly token-sized pieces."""
+    return [text[i : i + size] for i in range(0, len(text), size)] or [""]
+
+
+class StubUpstream:
+    """ASGI app answering POST */chat/completions like a (slow) model runner.
+
+    ``tokens_per_sec=0`` emits every token at once. ``slots=0`` means
+    unlimited concurrency.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttft: float = 0.0,
+        tokens_per_sec: float = 0.0,
+        tokens: int = 32,
+        slots: int = 0,
+        error_rate: float = 0.0,
+        stall_rate: float = 0.0,
+        stall: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        self.ttft = ttft
+        self.tokens_per_sec = tokens_per_sec
+        self.tokens = tokens
+        self.slots = slots
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.rng = random.Random(seed)
+        self._serial = itertools.count()
+        self._slots: asyncio.Semaphore | None = None
+        self.requests = 0
+        self.errors = 0
+
+    def _content(self, payload: dict[str, Any], serial: int) -> str:
+        fmt = payload.get("response_format") or {}
+        schema = (fmt.get("json_schema") or {}).get("schema")
+        if isinstance(schema, dict):
+            return json.dumps(sample_document(schema, serial))
+        count = min(self.tokens, int(payload.get("max_tokens") or self.tokens))
+        # Distinct per generation so fan-out dedup never collapses choices.
+        return f"[{serial}] " + " ".join(WORDS[(serial + i) % len(WORDS)] for i in range(count))
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            return
+        chunks = []
+        more = True
+        while more:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more = message.get("more_body", False)
+        raw = b"".join(chunks)
+
+        self.requests += 1
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            await _respond(send, 503, b'{"error": "stub overloaded"}')
+            return
+        payload = json.loads(raw or b"{}")
+        if self.slots and self._slots is None:
+            self._slots = asyncio.Semaphore(self.slots)
+        if self._slots is not None:
+            async with self._slots:
+                await self._generate(payload, send)
+        else:
+            await self._generate(payload, send)
+
+    async def _generate(self, payload: dict[str, Any], send: Any) -> None:
+        n = int(payload.get("n") or 1)
+        contents = [self._content(payload, next(self._serial)) for _ in range(n)]
+        pieces = [_tokens(c) for c in contents]
+        completion_tokens = sum(len(p) for p in pieces)
+        usage = {
+            "prompt_tokens": 8,
+            "completion_tokens": completion_tokens,
+            "total_tokens": 8 + completion_tokens,
+        }
+        gap = 1 / self.tokens_per_sec if self.tokens_per_sec else 0.0
+        ttft = self.ttft
+        if self.stall_rate and self.rng.random() < self.stall_rate:
+            ttft += self.stall
+        if ttft:
+            await asyncio.sleep(ttft)
+
+        if not payload.get("stream"):
+            longest = max(len(p) for p in pieces)
+            if gap:
+                await asyncio.sleep(gap * (longest - 1))
+            body = {
+                **COMPLETION,
+                "choices": [
+                    {
+                        "index": i,
+                        "message": {"role": "assistant", "content": c},
+                        "finish_reason": "stop",
+                    }
+                    for i, c in enumerate(contents)
+                ],
+                "usage": usage,
+            }
+            await _respond(send, 200, json.dumps(body).encode())
+            return
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/event-stream")],
+            }
+        )
+        for step, piece in enumerate(pieces[0]):
+            if step and gap:
+                await asyncio.sleep(gap)
+            delta = {"index": 0, "delta": {"content": piece}}
+            await _sse(send, {"id": "stub", "choices": [delta]})
+        await _sse(send, {"id": "stub", "choices": [{"index": 0, "finish_reason": "stop"}]})
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            await _sse(send, {"id": "stub", "choices": [], "usage": usage})
+        await send({"type": "http.response.body", "body": b"data: [DONE]\n\n"})
+
+
+async def _respond(send: Any, status: int, body: bytes) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _sse(send: Any, obj: dict[str, Any]) -> None:
+    data = b"data: " + json.dumps(obj).encode() + b"\n\n"
+    await send({"type": "http.response.body", "body": data, "more_body": True})
+
+
+def serve_in_thread(app: Any, port: int) -> uvicorn.Server:
+    """Start a uvicorn server for ``app`` on a daemon thread and wait until it is up."""
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    """Stub knobs shared by the standalone server and the load generator."""
+    parser.add_argument("--ttft", type=float, default=0.0, help="seconds to first token")
+    parser.add_argument("--tps", type=float, default=0.0, help="decode tokens/sec (0 = instant)")
+    parser.add_argument("--tokens", type=int, default=32, help="words per plain-text completion")
+    parser.add_argument("--slots", type=int, default=0, help="concurrent generations (0 = no cap)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered with 503")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="fraction that stall")
+    parser.add_argument("--stall", type=float, default=1.0, help="extra seconds a stall adds")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def stub_from_args(args: argparse.Namespace) -> StubUpstream:
+    return StubUpstream(
+        ttft=args.ttft,
+        tokens_per_sec=args.tps,
+        tokens=args.tokens,
+        slots=args.slots,
+        error_rate=args.error_rate,
+        stall_rate=args.stall_rate,
+        stall=args.stall,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8001)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(stub_from_args(args), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import json
 import httpx
 import streamlit as st
 from typing import Any, cast
+from jobs import POLL_SECONDS, poll_job, submit_job
+from throttle import ThrottledText
 from ui_defaults import DV, API_BASE_URL, MODEL_NAME
 
 st.set_page_config(f"{MODEL_NAME} Chat", layout="centered")
@@ -154,10 +156,6 @@ if prompt:
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    with st.chat_message("assistant"):
-        placeholder = st.empty()
-        placeholder.markdown("_thinking…_")
-
     settings: dict[str, Any] = {k: st.session_state[k] for k in DV.keys()}
     payload = {"messages": st.session_state.history} | settings
 
@@ -168,41 +166,65 @@ if prompt:
     payload["stop"] = None if not s else [w.strip() for w in s.split(",") if w.strip()]
 
     if st.session_state.stream:
+        with st.chat_message("assistant"):
+            placeholder = st.empty()
+            placeholder.markdown("_thinking…_")
         url = f"{API_BASE_URL}/chat/stream"
-        running_text = ""
+        live = ThrottledText(placeholder.markdown)
         try:
             with httpx.stream("POST", url, json=payload, timeout=None) as r:
                 r.raise_for_status()
-                # Stream tokens and update the placeholder for a live typing effect.
+                # Live typing effect at a capped frame rate; the final text is always drawn.
                 for piece in r.iter_text():
-                    running_text += piece
-                    placeholder.markdown(running_text)
+                    live.feed(piece)
             st.session_state.history.append(
-                {"role": "assistant", "content": running_text}
+                {"role": "assistant", "content": live.finish()}
             )
         except Exception as e:
+            live.finish()  # show whatever arrived before the error
             st.error(f"Streaming error: {e}")
     else:
-        url = f"{API_BASE_URL}/chat"
+        # Queue the request as a job and poll it (see _poll_chat_job) instead of
+        # holding this script run on one long HTTP call; n=10 can take a while.
         try:
-            with httpx.Client(timeout=60.0) as client:
-                r = client.post(url=url, json=payload)
-                r.raise_for_status()
-                data = r.json()
+            st.session_state.chat_job = submit_job("chat", payload)
         except Exception as e:
-            placeholder.markdown(f"Error: {e}")
+            with st.chat_message("assistant"):
+                st.markdown(f"Error: {e}")
             st.session_state.history.append(
                 {"role": "assistant", "content": f"Error: {e}"}
             )
-        else:
-            if isinstance(data, dict) and "answers" in data:
-                # Persist candidates and render a chooser after this block
-                st.session_state.pending_answers = data["answers"]
-                placeholder.markdown("Please make a selection")
-            else:
-                text = data if isinstance(data, str) else json.dumps(data)
-                placeholder.markdown(text)
-                st.session_state.history.append({"role": "assistant", "content": text})
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _poll_chat_job() -> None:
+    """Re-check the pending chat job each tick; file its answer and rerun when done."""
+    try:
+        job = poll_job(st.session_state.chat_job)
+    except Exception as e:
+        job = {"status": "failed", "error": str(e)}
+    if job["status"] in ("queued", "running"):
+        with st.chat_message("assistant"):
+            st.markdown("_thinking…_")
+        return
+
+    st.session_state.chat_job = None
+    data = job.get("result")
+    if job["status"] == "failed":
+        st.session_state.history.append(
+            {"role": "assistant", "content": f"Error: {job['error']}"}
+        )
+    elif isinstance(data, dict) and "answers" in data:
+        # Persist candidates; the chooser below renders them
+        st.session_state.pending_answers = data["answers"]
+    else:
+        text = data if isinstance(data, str) else json.dumps(data)
+        st.session_state.history.append({"role": "assistant", "content": text})
+    st.rerun()
+
+
+if st.session_state.get("chat_job"):
+    _poll_chat_job()
 
 # Render pending multi-answer chooser outside of the prompt block so it persists across reruns
 if st.session_state.pending_answers:
@@ -0,0 +1,23 @@
+from typing import Any
+import httpx
+from ui_defaults import API_BASE_URL
+
+# How often a page re-checks a pending job. Each check is a short request, so a
+# slow generation no longer pins a script run (and its thread) for up to 60s.
+POLL_SECONDS = 1.0
+
+
+def submit_job(kind: str, payload: dict[str, Any]) -> str:
+    """Queue a /chat or /structured request on the backend and return the job id."""
+    with httpx.Client(timeout=10.0) as client:
+        r = client.post(f"{API_BASE_URL}/jobs", json={"kind": kind, "request": payload})
+        r.raise_for_status()
+        return r.json()["id"]
+
+
+def poll_job(job_id: str) -> dict[str, Any]:
+    """Current job record; ``status`` is queued, running, succeeded or failed."""
+    with httpx.Client(timeout=10.0) as client:
+        r = client.get(f"{API_BASE_URL}/jobs/{job_id}")
+        r.raise_for_status()
+        return r.json()
@@ -1,8 +1,8 @@
+from typing import Any
 import streamlit as st
-import httpx
+from jobs import POLL_SECONDS, poll_job, submit_job
 from ui_defaults import (
     DV,
-    API_BASE_URL,
     MODEL_NAME,
     RECIPE_EXAMPLE,
     RECIPE_MD,
@@ -155,19 +155,48 @@ if submitted:
             None if not s else [w.strip() for w in s.split(",") if w.strip()]
         )
 
-        url = f"{API_BASE_URL}/structured"
+        # Queue the request as a job and poll it, rather than holding this script
+        # run (and its thread) on one long HTTP call.
+        st.session_state.structured_result = None
         try:
-            with httpx.Client(timeout=60.0) as client:
-                r = client.post(url=url, json=payload)
-                r.raise_for_status()
-                data = r.json()
-                if isinstance(data, dict) and data.get("error"):
-                    st.error(f"{data['error']}. See Tips above for help.")
-                    st.write(data["raw_output"])
-                else:
-                    st.success("Success")
-                    for idx, returned_json in enumerate(data):
-                        st.markdown(f"### Response {idx+1}")
-                        st.json(returned_json)
+            st.session_state.structured_job = submit_job("structured", payload)
         except Exception as e:
             st.error(f"Error: {e}")
+
+
+def _show_result(job: dict[str, Any]) -> None:
+    if job["status"] == "failed":
+        st.error(f"Error: {job['error']}")
+        return
+    data = job["result"]
+    if isinstance(data, dict) and data.get("error"):
+        st.error(f"{data['error']}. See Tips above for help.")
+        st.write(data["raw_output"])
+    else:
+        st.success("Success")
+        for idx, returned_json in enumerate(data):
+            st.markdown(f"### Response {idx+1}")
+            st.json(returned_json)
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _poll_pending_job() -> None:
+    """Re-check the pending job each tick; rerun the page once it has finished."""
+    try:
+        job = poll_job(st.session_state.structured_job)
+    except Exception as e:
+        st.session_state.structured_job = None
+        st.error(f"Error: {e}")
+        return
+    if job["status"] in ("queued", "running"):
+        st.info(f"Generating… ({job['status']})")
+        return
+    st.session_state.structured_job = None
+    st.session_state.structured_result = job
+    st.rerun()
+
+
+if st.session_state.get("structured_job"):
+    _poll_pending_job()
+elif st.session_state.get("structured_result"):
+    _show_result(st.session_state.structured_result)
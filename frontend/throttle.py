@@ -0,0 +1,52 @@
+import time
+from typing import Callable
+
+# Redraws per second while a reply streams in. Each redraw re-sends the whole
+# message, so drawing per piece makes a reply cost O(n^2) in its length.
+MAX_FPS = 12.0
+
+
+class ThrottledText:
+    """Accumulate streamed text and redraw it at most ``max_fps`` times a second."""
+
+    def __init__(
+        self,
+        render: Callable[[str], object],
+        max_fps: float = MAX_FPS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.render = render
+        self.period = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.clock = clock
+        self.parts: list[str] = []
+        self.renders = 0
+        self._last = float("-inf")
+        self._dirty = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def feed(self, piece: str) -> None:
+        """Add a piece; redraw only if the last frame is at least one period old."""
+        if not piece:
+            return
+        self.parts.append(piece)
+        self._dirty = True
+        now = self.clock()
+        if now - self._last >= self.period:
+            self._draw(now)
+
+    def finish(self) -> str:
+        """Draw the final text (if not already on screen) and return it."""
+        if self._dirty:
+            self._draw(self.clock())
+        return self.text
+
+    def _draw(self, now: float) -> None:
+        text = self.text
+        self.parts = [text]
+        self.render(text)
+        self.renders += 1
+        self._last = now
+        self._dirty = False
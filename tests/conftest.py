@@ -17,6 +17,9 @@ def set_env(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setenv("DMR_API_KEY", "test-key")
     monkeypatch.setenv("MODEL_ID", "ai/test-model:latest")
     # API_BASE_URL is optional for backend
+    # No background upstream traffic from the lifespan; tests count upstream calls.
+    monkeypatch.setenv("WARMUP_ENABLED", "false")
+    monkeypatch.setenv("PROBE_INTERVAL_SECONDS", "0")
 
 
 @pytest.fixture()
@@ -0,0 +1,93 @@
+import asyncio
+from collections import Counter
+import httpx
+import pytest
+
+
+def test_fanout_spreads_across_endpoints(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.external import llm_client
+    from backend.external.balancer import Balancer
+    from backend.schemas.chat import LLMRequest
+
+    hosts: Counter[str] = Counter()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        hosts[request.url.host] += 1
+        content = f"x{sum(hosts.values())}"
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    monkeypatch.setattr(llm_client, "balancer", Balancer(["http://a:1", "http://b:1"]))
+
+    req = LLMRequest.model_validate({"messages": [{"role": "user", "content": "Hi"}], "n": 4})
+    data = asyncio.run(llm_client.llm_generate_content(req))
+
+    assert len(data["choices"]) == 4
+    assert hosts == {"a": 2, "b": 2}
+
+
+def test_failing_endpoint_is_ejected_then_readmitted(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.external import balancer as balancer_module
+
+    now = [100.0]
+    monkeypatch.setattr(balancer_module.time, "monotonic", lambda: now[0])
+    lb = balancer_module.Balancer(["http://a", "http://b"], eject_after=2, eject_seconds=10)
+    bad = lb.endpoints[0]
+
+    async def fail_on(endpoint_url: str) -> None:
+        for _ in range(20):
+            try:
+                async with lb.lease() as ep:
+                    if ep.url == endpoint_url:
+                        raise httpx.ConnectError("down")
+            except httpx.ConnectError:
+                pass
+
+    asyncio.run(fail_on(bad.url))
+    assert bad.ejections == 1
+    assert bad.stats()["ejected"] is True
+    assert all(lb.pick() is lb.endpoints[1] for _ in range(10))
+
+    now[0] += 11
+    assert bad.available(now[0])
+    assert {lb.pick().url for _ in range(50)} == {"http://a", "http://b"}
+
+
+def test_upstream_urls_setting() -> None:
+    from backend.settings import Settings
+
+    single = Settings(DMR_BASE_URL="http://one", DMR_API_KEY="k", MODEL_ID="m")
+    many = Settings(
+        DMR_BASE_URL="http://one", DMR_API_KEY="k", MODEL_ID="m",
+        DMR_BASE_URLS="http://a/v1, http://b/v1",
+    )
+    assert single.upstream_urls == ["http://one"]
+    assert many.upstream_urls == ["http://a/v1", "http://b/v1"]
+
+
+def test_cancelled_calls_are_not_reported() -> None:
+    from backend.external.balancer import Balancer
+
+    lb = Balancer(["http://a"], eject_after=2)
+    endpoint = lb.endpoints[0]
+    endpoint.consecutive_failures = 1
+
+    async def cancelled() -> None:
+        async with lb.lease():
+            await asyncio.sleep(1)
+
+    async def run() -> None:
+        task = asyncio.create_task(cancelled())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert endpoint.requests == 0
+    assert endpoint.latency is None
+    assert endpoint.consecutive_failures == 1
+    assert endpoint.inflight == 0
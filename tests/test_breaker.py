@@ -0,0 +1,112 @@
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+BODY = {"messages": [{"role": "user", "content": "Hi"}]}
+REPLY = {"id": "c1", "choices": [{"index": 0, "message": {"content": "hi"}}]}
+
+
+def _breaker(**overrides):  # noqa: ANN202 (test helper)
+    from backend.core.breaker import CircuitBreaker
+
+    options = dict(window=10, min_calls=4, failure_rate=0.5, open_seconds=60.0)
+    return CircuitBreaker(**{**options, **overrides})
+
+
+def _upstream(monkeypatch: pytest.MonkeyPatch, handler) -> None:  # noqa: ANN001
+    from backend.core.context import BULK, INTERACTIVE
+    from backend.core.retry import RetryPolicy
+    from backend.core.scheduler import AdmissionScheduler
+    from backend.external import llm_client
+    from backend.external.balancer import Balancer
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(llm_client, "_client", httpx.AsyncClient(transport=transport))
+    # Keep the failures below from cutting the shared limiter or ejecting the endpoint.
+    scheduler = AdmissionScheduler(4, 8, {INTERACTIVE: 5, BULK: 5})
+    monkeypatch.setattr(llm_client, "scheduler", scheduler)
+    monkeypatch.setattr(llm_client, "balancer", Balancer(["http://upstream"]))
+    monkeypatch.setattr(llm_client, "upstream_breaker", _breaker())
+    monkeypatch.setattr(llm_client, "retry_policy", RetryPolicy(2, 0.001, 0.001))
+
+
+def test_breaker_opens_then_recovers_through_half_open() -> None:
+    from backend.core.breaker import CLOSED, HALF_OPEN, OPEN, CircuitOpen
+
+    breaker = _breaker(open_seconds=0.05)
+    for failed in (False, True, False, True):
+        breaker.record(failed)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+    time.sleep(0.06)
+    assert breaker.before_call() is True  # the half-open trial
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()  # only one trial at a time
+    breaker.record(False, trial=True)
+    assert breaker.state == CLOSED
+    assert breaker.stats()["rejected"] == 2
+
+
+def test_guard_counts_only_upstream_failures() -> None:
+    breaker = _breaker(min_calls=1)
+    request = httpx.Request("POST", "http://upstream/chat/completions")
+
+    async def fail(exc: BaseException) -> None:
+        async with breaker.guard():
+            raise exc
+
+    bad_request = httpx.HTTPStatusError("400", request=request, response=httpx.Response(400))
+    for exc in (bad_request, ValueError("local bug")):
+        with pytest.raises(type(exc)):
+            asyncio.run(fail(exc))
+    assert breaker.state == "closed"
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(fail(httpx.ConnectError("refused")))
+    assert breaker.state == "open"
+
+
+def test_transient_503_is_retried(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(1)
+        if len(calls) == 1:
+            return httpx.Response(503, json={"error": "loading"})
+        return httpx.Response(200, json=REPLY)
+
+    _upstream(monkeypatch, handler)
+    res = client.post("/v1/chat/completions", json=BODY)
+    assert res.status_code == 200
+    assert len(calls) == 2
+
+
+def test_open_circuit_fails_fast_and_readyz_reports_it(
+    monkeypatch: pytest.MonkeyPatch, client: TestClient
+) -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(1)
+        return httpx.Response(500, json={"error": "boom"})
+
+    _upstream(monkeypatch, handler)
+    assert client.get("/readyz").status_code == 200
+    for _ in range(4):
+        assert client.post("/v1/chat/completions", json=BODY).status_code == 500
+    assert len(calls) == 4  # a plain 500 is not retried
+
+    res = client.post("/v1/chat/completions", json=BODY)
+    assert res.status_code == 503
+    assert "Retry-After" in res.headers
+    assert len(calls) == 4  # refused without calling upstream
+
+    ready = client.get("/readyz")
+    assert ready.status_code == 503
+    assert ready.json()["breaker"]["state"] == "open"
+    health = client.get("/healthz").json()
+    assert health["ok"] is True and health["ready"] is False
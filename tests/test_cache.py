@@ -0,0 +1,112 @@
+from typing import Any
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+
+def test_lru_respects_byte_budget() -> None:
+    from backend.core.cache import ResponseCache
+
+    cache = ResponseCache(max_bytes=30, ttl=60)
+    cache.set("a", "x" * 10)
+    cache.set("b", "y" * 10)
+    assert cache.get("a") == "x" * 10  # a is now most recently used
+    cache.set("c", "z" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] <= 30
+
+
+def test_entries_expire(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.core import cache as cache_module
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    cache = cache_module.ResponseCache(max_bytes=1024, ttl=5)
+    cache.set("k", {"v": 1})
+    assert cache.get("k") == {"v": 1}
+    now[0] += 6
+    assert cache.get("k") is None
+
+
+def test_sqlite_tier_survives_restart(tmp_path: Any) -> None:
+    from backend.core.cache import ResponseCache
+
+    path = str(tmp_path / "cache.db")
+    ResponseCache(max_bytes=1024, ttl=60, sqlite_path=path).set("k", ["a", "b"])
+    reopened = ResponseCache(max_bytes=1024, ttl=60, sqlite_path=path)
+    assert reopened.get("k") == ["a", "b"]
+    assert reopened.stats()["disk_hits"] == 1
+
+
+def test_key_ignores_nondeterministic_requests() -> None:
+    from backend.core.cache import cache_key_for
+    from backend.schemas.chat import LLMRequest
+
+    messages = [{"role": "user", "content": "Hi"}]
+    sampled = LLMRequest.model_validate({"messages": messages})
+    seeded = LLMRequest.model_validate({"messages": messages, "seed": 7})
+    greedy = LLMRequest.model_validate({"messages": messages, "temperature": 0})
+    assert cache_key_for("chat", sampled) is None
+    assert cache_key_for("chat", seeded) == cache_key_for("chat", seeded.model_copy())
+    assert cache_key_for("chat", seeded) != cache_key_for("chat", greedy)
+
+
+def test_hashing_accepts_ints_beyond_64_bits() -> None:
+    from backend.core import jsonio
+    from backend.core.keys import canonical_hash
+
+    schema = {"type": "integer", "maximum": 10**20}
+    assert jsonio.dumps(schema) == b'{"type":"integer","maximum":100000000000000000000}'
+    assert canonical_hash("schema", schema) != canonical_hash("schema", {"maximum": 1})
+
+
+def test_chat_seeded_request_hits_cache(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    import backend.routers.chat as chat_router
+    from backend.core.cache import response_cache
+
+    response_cache.clear()
+    calls = []
+
+    async def fake_generate(req: Any) -> dict[str, Any]:  # noqa: ANN401 (test helper)
+        calls.append(req)
+        return {"choices": [{"message": {"content": "hello"}}]}
+
+    monkeypatch.setattr(chat_router, "llm_generate_content", fake_generate)
+
+    payload = {"messages": [{"role": "user", "content": "Hi"}], "seed": 42}
+    first = client.post("/chat", json=payload)
+    second = client.post("/chat", json=payload)
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == "hello"
+    assert len(calls) == 1
+
+    unseeded = client.post("/chat", json={"messages": payload["messages"]})
+    assert unseeded.headers["X-Cache"] == "BYPASS"
+
+
+def test_structured_hit_skips_generation(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    import backend.routers.structured as structured_router
+    from backend.core.cache import response_cache
+
+    response_cache.clear()
+    calls = []
+    content = json.dumps({"recipe_name": "Chili", "ingredients": ["beans"]})
+
+    async def fake_generate(req: Any) -> dict[str, Any]:  # noqa: ANN401 (test helper)
+        calls.append(req)
+        return {"choices": [{"message": {"content": content}}]}
+
+    monkeypatch.setattr(structured_router, "llm_generate_content", fake_generate)
+
+    req = {
+        "messages": [{"role": "user", "content": "Give recipe"}],
+        "response_type": "recipe",
+        "temperature": 0,
+    }
+    first = client.post("/structured", json=req).json()
+    second = client.post("/structured", json=req)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.json() == first
+    assert len(calls) == 1
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, AsyncGenerator, Iterator
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+class _FakeRequest:
+    """Just enough of a Starlette request: ``receive`` reports a disconnect after a delay."""
+
+    def __init__(self, disconnect_after: float) -> None:
+        self.disconnect_after = disconnect_after
+
+    async def receive(self) -> dict[str, Any]:
+        await asyncio.sleep(self.disconnect_after)
+        return {"type": "http.disconnect"}
+
+
+@contextmanager
+def _slow_upstream(ttft: float) -> Iterator[str]:
+    """A real HTTP upstream that waits ``ttft`` seconds before answering.
+
+    MockTransport ignores httpx timeouts, so deadline handling needs a socket.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802 (http.server API)
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(ttft)
+            try:
+                if body.get("stream"):
+                    chunk = {"choices": [{"index": 0, "delta": {"content": "hi"}}]}
+                    reply = f"data: {json.dumps(chunk)}\n\ndata: [DONE]\n\n".encode()
+                    kind = "text/event-stream"
+                else:
+                    chunk = {"choices": [{"index": 0, "message": {"content": "hi"}}]}
+                    reply, kind = json.dumps(chunk).encode(), "application/json"
+                self.send_response(200)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(reply)))
+                self.end_headers()
+                self.wfile.write(reply)
+            except OSError:
+                pass  # the client gave up first
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _real_upstream(monkeypatch: pytest.MonkeyPatch, url: str) -> Any:
+    """Point llm_client at ``url`` with fresh breaker, limiter and balancer state."""
+    from backend.core.breaker import CircuitBreaker
+    from backend.core.context import BULK, INTERACTIVE
+    from backend.core.limiter import AIMDLimit
+    from backend.core.scheduler import AdmissionScheduler
+    from backend.external import llm_client
+    from backend.external.balancer import Balancer
+
+    limiter = AIMDLimit(initial=4, min_limit=1, max_limit=8)
+    scheduler = AdmissionScheduler(4, 8, {INTERACTIVE: 5, BULK: 5}, limiter=limiter)
+    monkeypatch.setattr(llm_client, "scheduler", scheduler)
+    monkeypatch.setattr(llm_client, "balancer", Balancer([url], eject_after=2))
+    breaker = CircuitBreaker(window=10, min_calls=2, failure_rate=0.5, open_seconds=60.0)
+    monkeypatch.setattr(llm_client, "upstream_breaker", breaker)
+    monkeypatch.setattr(llm_client, "_client", None)  # a real client, made in the test loop
+    return llm_client
+
+
+def _assert_upstream_untouched(llm_client: Any) -> None:
+    assert llm_client.upstream_breaker.stats()["state"] == "closed"
+    assert llm_client.upstream_breaker.stats()["calls"] == 0
+    assert llm_client.balancer.endpoints[0].failures == 0
+    assert not llm_client.balancer.endpoints[0].stats()["ejected"]
+    assert llm_client.scheduler.limit == 4
+    assert llm_client.scheduler.active == 0
+
+
+def test_short_deadlines_do_not_trip_the_breaker(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    body = {"messages": [{"role": "user", "content": "deadline"}]}
+
+    async def run(url: str) -> list[int]:
+        llm_client = _real_upstream(monkeypatch, url)
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as app:
+            statuses = []
+            for path in ["/chat/stream", "/chat"] * 3:
+                r = await app.post(path, json=body, headers={"X-Request-Timeout": "0.1"})
+                statuses.append(r.status_code)
+            _assert_upstream_untouched(llm_client)
+            # A request without a deadline still gets through.
+            r = await app.post("/chat/stream", json=body)
+            statuses.append(r.status_code)
+        await llm_client.shutdown()
+        return statuses
+
+    with _slow_upstream(0.5) as url:
+        statuses = asyncio.run(run(url))
+    assert statuses == [504] * 6 + [200]
+
+
+def test_request_timeout_header_returns_504(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from backend.external import llm_client
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(5)
+        return httpx.Response(200, json={"choices": []})
+
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    r = client.post(
+        "/chat",
+        json={"messages": [{"role": "user", "content": "deadline"}]},
+        headers={"X-Request-Timeout": "0.1"},
+    )
+    assert r.status_code == 504
+
+
+def test_deadline_bounds_fanout_subcalls(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.core.context import DeadlineExceeded, RequestContext, _current
+    from backend.external import llm_client
+    from backend.schemas.chat import LLMRequest
+
+    cancelled: list[int] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+        return httpx.Response(200, json={"choices": []})
+
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    req = LLMRequest.model_validate(
+        {"messages": [{"role": "user", "content": "Hi"}], "n": 3}
+    )
+
+    async def run() -> float:
+        ctx = RequestContext()
+        ctx.deadline = ctx.started + 0.1
+        _current.set(ctx)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        with pytest.raises(DeadlineExceeded):
+            await llm_client.llm_generate_content(req)
+        return loop.time() - start
+
+    assert asyncio.run(run()) < 1
+    assert len(cancelled) == 3
+
+
+def test_disconnect_closes_upstream_stream() -> None:
+    from backend.core.cancellation import cancel_on_disconnect, disconnect_stats
+
+    closed: list[bool] = []
+
+    async def upstream() -> AsyncGenerator[bytes, None]:
+        try:
+            yield b"first"
+            await asyncio.sleep(5)  # a slow token the client never waits for
+            yield b"second"
+        finally:
+            closed.append(True)
+
+    async def run() -> list[bytes]:
+        received = []
+        async for chunk in cancel_on_disconnect(_FakeRequest(0.05), upstream()):
+            received.append(chunk)
+        return received
+
+    before = disconnect_stats.streams_cancelled
+    assert asyncio.run(asyncio.wait_for(run(), 1)) == [b"first"]
+    assert closed == [True]
+    assert disconnect_stats.streams_cancelled == before + 1
+
+
+def test_disconnect_cancels_pending_request() -> None:
+    from backend.core.cancellation import ClientDisconnected, until_disconnect
+
+    cancelled: list[bool] = []
+
+    async def work() -> str:
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "done"
+
+    async def run() -> None:
+        with pytest.raises(ClientDisconnected):
+            await until_disconnect(_FakeRequest(0.05), work())
+
+    asyncio.run(asyncio.wait_for(run(), 1))
+    assert cancelled == [True]
+
+
+def test_passthrough_deadline_returns_504(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    body = {"messages": [{"role": "user", "content": "deadline"}]}
+
+    async def run(url: str) -> list[int]:
+        llm_client = _real_upstream(monkeypatch, url)
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as app:
+            statuses = []
+            for stream in (False, True, False, True):
+                r = await app.post(
+                    "/v1/chat/completions",
+                    json={**body, "stream": stream},
+                    headers={"X-Request-Timeout": "0.1"},
+                )
+                statuses.append(r.status_code)
+            assert r.json()["error"]["type"] == "timeout"
+            _assert_upstream_untouched(llm_client)
+        await llm_client.shutdown()
+        return statuses
+
+    with _slow_upstream(0.5) as url:
+        assert asyncio.run(run(url)) == [504] * 4
@@ -38,6 +38,23 @@ def test_chat_multiple_answers(monkeypatch: pytest.MonkeyPatch, client: TestClie
     assert "raw" in data
 
 
+def test_chat_n_keeps_answers_shape_when_choices_collapse(
+    monkeypatch: pytest.MonkeyPatch, client: TestClient
+) -> None:
+    import backend.routers.chat as chat_router
+
+    async def fake_generate(req: Any) -> dict[str, Any]:  # noqa: ANN401 (test helper)
+        # Every choice came back identical and the duplicates were dropped.
+        return {"choices": [{"message": {"content": "same"}}]}
+
+    monkeypatch.setattr(chat_router, "llm_generate_content", fake_generate)
+
+    payload = {"messages": [{"role": "user", "content": "Hi"}], "n": 3}
+    res = client.post("/chat", json=payload)
+    assert res.status_code == 200
+    assert res.json()["answers"] == ["same"]
+
+
 def test_chat_stream(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
     import backend.routers.chat as chat_router
 
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from typing import Any
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _install_upstream(monkeypatch: pytest.MonkeyPatch, handler: Any) -> None:
+    from backend.external import llm_client
+
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+
+
+def test_choices_get_distinct_seeds_and_duplicates_are_dropped(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from backend.external import llm_client
+    from backend.external.fanout import choice_seed
+    from backend.schemas.chat import LLMRequest
+
+    seeds: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seed = json.loads(request.content)["seed"]
+        seeds.append(seed)
+        # Two of the five seeds produce the same text.
+        text = "same" if seed in (choice_seed(7, 1), choice_seed(7, 2)) else f"s{seed}"
+        usage = {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13}
+        return httpx.Response(
+            200, json={"choices": [{"message": {"content": text}}], "usage": usage}
+        )
+
+    _install_upstream(monkeypatch, handler)
+    req = LLMRequest.model_validate(
+        {"messages": [{"role": "user", "content": "Hi"}], "n": 5, "seed": 7}
+    )
+    data = asyncio.run(llm_client.llm_generate_content(req))
+
+    assert sorted(seeds) == sorted(choice_seed(7, i) for i in range(5))
+    assert len(set(seeds)) == 5 and 7 in seeds
+    texts = [c["message"]["content"] for c in data["choices"]]
+    assert len(texts) == 4 and texts.count("same") == 1
+    assert [c["index"] for c in data["choices"]] == [0, 1, 2, 3]
+    assert data["usage"] == {"prompt_tokens": 50, "completion_tokens": 15, "total_tokens": 65}
+    assert all(isinstance(v, int) for v in data["usage"].values())
+
+
+def test_closing_iterator_cancels_unfinished_choices() -> None:
+    from backend.external.fanout import iter_choices
+
+    cancelled: list[int] = []
+
+    async def call(i: int) -> dict[str, Any]:
+        try:
+            await asyncio.sleep(0.01 if i == 0 else 10)
+        except asyncio.CancelledError:
+            cancelled.append(i)
+            raise
+        return {"choices": [{"message": {"content": str(i)}}]}
+
+    async def run() -> int:
+        gen = iter_choices(3, call)
+        index, _ = await anext(gen)
+        await gen.aclose()
+        return index
+
+    assert asyncio.run(run()) == 0
+    assert sorted(cancelled) == [1, 2]
+
+
+def test_chat_streams_choices_as_ndjson(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seed = json.loads(request.content)["seed"]
+        # Choice 0 keeps the caller's seed and is made the slowest.
+        await asyncio.sleep(0.05 if seed == 1 else 0.0)
+        return httpx.Response(
+            200,
+            json={
+                "choices": [{"message": {"content": f"c{seed}"}, "finish_reason": "stop"}],
+                "usage": {"completion_tokens": 2},
+            },
+        )
+
+    _install_upstream(monkeypatch, handler)
+    payload = {"messages": [{"role": "user", "content": "Hi"}], "n": 3, "stream": True, "seed": 1}
+    with client.stream("POST", "/chat", json=payload) as res:
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in res.iter_lines() if line]
+
+    assert sorted(line["index"] for line in lines[:-1]) == [0, 1, 2]
+    assert lines[2]["index"] == 0  # sent as finished, not in index order
+    assert all(line["finish_reason"] == "stop" for line in lines[:-1])
+    assert lines[-1] == {"done": True, "choices": 3, "usage": {"completion_tokens": 6}}
@@ -0,0 +1,87 @@
+import asyncio
+from typing import AsyncGenerator
+
+
+def _hedger(percent: float = 100.0):  # noqa: ANN202 (test helper)
+    from backend.core.hedging import HedgeBudget, Hedger
+
+    hedger = Hedger(
+        "call", HedgeBudget(percent), percentile=90, min_delay=0.01, window=100, min_samples=5
+    )
+    for _ in range(10):
+        hedger.observe(0.02)
+    return hedger
+
+
+def test_slow_call_is_hedged_and_loser_cancelled() -> None:
+    hedger = _hedger()
+    calls = []
+    cancelled = []
+
+    async def call() -> str:
+        attempt = len(calls)
+        calls.append(attempt)
+        try:
+            await asyncio.sleep(5 if attempt == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(attempt)
+            raise
+        return f"attempt {attempt}"
+
+    assert asyncio.run(hedger.run(call)) == "attempt 1"
+    assert cancelled == [0]
+    assert hedger.stats()["fired"] == 1 and hedger.stats()["won"] == 1
+    # Both the hedge's latency and the losing primary's time so far are recorded.
+    recent = list(hedger._latencies)[-2:]
+    assert recent[0] < 0.03 <= recent[1]
+
+
+def test_budget_caps_hedges() -> None:
+    hedger = _hedger(percent=0)
+    calls = []
+
+    async def call() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    assert asyncio.run(hedger.run(call)) == 1
+    assert hedger.stats()["fired"] == 0 and hedger.stats()["denied"] == 1
+
+
+def test_failed_primary_falls_back_to_hedge() -> None:
+    hedger = _hedger()
+    calls = []
+
+    async def call() -> str:
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(0.05)
+            raise RuntimeError("boom")
+        await asyncio.sleep(0.1)
+        return "hedge"
+
+    assert asyncio.run(hedger.run(call)) == "hedge"
+
+
+def test_stream_hedges_until_first_chunk() -> None:
+    hedger = _hedger()
+    closed = []
+    opened = []
+
+    async def open_stream() -> AsyncGenerator[bytes, None]:
+        attempt = len(opened)
+        opened.append(attempt)
+        try:
+            await asyncio.sleep(5 if attempt == 0 else 0.01)
+            for piece in (b"a", b"b", b"c"):
+                yield piece
+        finally:
+            closed.append(attempt)
+
+    async def run() -> list[bytes]:
+        return [chunk async for chunk in hedger.stream(open_stream)]
+
+    assert asyncio.run(run()) == [b"a", b"b", b"c"]
+    assert sorted(closed) == [0, 1]
+    assert hedger.stats()["won"] == 1
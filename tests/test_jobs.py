@@ -0,0 +1,79 @@
+import asyncio
+from typing import Any
+import pytest
+from fastapi.testclient import TestClient
+
+
+def test_chat_job_runs_in_background(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    import backend.routers.chat as chat_router
+
+    async def slow_generate(req: Any) -> dict[str, Any]:  # noqa: ANN401 (test helper)
+        await asyncio.sleep(0.2)
+        return {"choices": [{"message": {"content": "a"}}, {"message": {"content": "b"}}]}
+
+    monkeypatch.setattr(chat_router, "llm_generate_content", slow_generate)
+
+    body = {"kind": "chat", "request": {"messages": [{"role": "user", "content": "Hi"}], "n": 2}}
+    with client:
+        res = client.post("/jobs", json=body)
+        assert res.status_code == 202
+        job = res.json()
+        assert job["status"] == "queued"
+        assert res.headers["location"] == f"/jobs/{job['id']}"
+
+        assert client.get(f"/jobs/{job['id']}").json()["status"] in ("queued", "running")
+        done = client.get(f"/jobs/{job['id']}", params={"wait": 5}).json()
+    assert done["status"] == "succeeded"
+    assert done["result"]["answers"] == ["a", "b"]
+    assert done["finished_at"] >= done["started_at"] >= done["created_at"]
+
+
+def test_structured_job_result_and_failures(
+    monkeypatch: pytest.MonkeyPatch, client: TestClient
+) -> None:
+    import backend.routers.chat as chat_router
+    import backend.routers.structured as structured_router
+
+    async def fake_generate(req: Any) -> dict[str, Any]:  # noqa: ANN401 (test helper)
+        content = '{"recipe_name": "Chili", "ingredients": ["beans"]}'
+        return {"choices": [{"message": {"content": content}}]}
+
+    async def broken(req: Any) -> dict[str, Any]:  # noqa: ANN401 (test helper)
+        raise RuntimeError("upstream exploded")
+
+    monkeypatch.setattr(structured_router, "llm_generate_content", fake_generate)
+    monkeypatch.setattr(chat_router, "llm_generate_content", broken)
+
+    messages = [{"role": "user", "content": "Chili"}]
+    with client:
+        unknown = {"kind": "structured", "request": {"messages": messages, "response_type": "x"}}
+        assert client.post("/jobs", json=unknown).status_code == 400
+
+        body = {"kind": "structured", "request": {"messages": messages, "response_type": "recipe"}}
+        job = client.post("/jobs", json=body).json()
+        done = client.get(f"/jobs/{job['id']}", params={"wait": 5}).json()
+        assert done["status"] == "succeeded"
+        assert done["result"] == [{"recipe_name": "Chili", "ingredients": ["beans"]}]
+        assert done["headers"]["X-Structured-Provenance"] == "parsed"
+
+        job = client.post("/jobs", json={"kind": "chat", "request": {"messages": messages}})
+        failed = client.get(f"/jobs/{job.json()['id']}", params={"wait": 5}).json()
+        assert failed["status"] == "failed"
+        assert failed["error"] == "upstream exploded"
+
+        assert client.get("/jobs/nope").status_code == 404
+
+
+def test_sqlite_store_expires_records(monkeypatch: pytest.MonkeyPatch, tmp_path: Any) -> None:
+    from backend.core import jobs
+
+    now = [1000.0]
+    monkeypatch.setattr(jobs.time, "time", lambda: now[0])
+    path = str(tmp_path / "jobs.db")
+    jobs.SqliteJobStore(path, ttl=60).put({"id": "j1", "status": "succeeded", "result": [1]})
+
+    reopened = jobs.SqliteJobStore(path, ttl=60)
+    assert reopened.get("j1") == {"id": "j1", "status": "succeeded", "result": [1]}
+    now[0] += 61
+    assert reopened.get("j1") is None
+    assert reopened.purge() == 1 and len(reopened) == 0
@@ -0,0 +1,15 @@
+def test_repairs_fences_junk_and_open_brackets() -> None:
+    from backend.core.json_repair import repair_candidates
+
+    assert next(repair_candidates('```json\n{"a": 1}\n```')) == {"a": 1}
+    assert next(repair_candidates('Here you go: {"a": 1} Enjoy!')) == {"a": 1}
+    assert next(repair_candidates('{"a": ["x", "y"')) == {"a": ["x", "y"]}
+    assert list(repair_candidates("no json here")) == []
+
+
+def test_trims_looping_tail() -> None:
+    from backend.core.json_repair import repair_candidates, trim_repeated_tail
+
+    assert trim_repeated_tail("abc, and so on, and so on, and so on") == "abc, and so on"
+    candidates = list(repair_candidates('{"a": ["x", "bb", "bb", "bb", "bb", "bb'))
+    assert candidates[-1] == {"a": ["x", "bb"]}
@@ -0,0 +1,52 @@
+import asyncio
+
+
+def test_limit_converges_on_simulated_slow_upstream() -> None:
+    from backend.core.context import BULK, INTERACTIVE
+    from backend.core.limiter import AIMDLimit
+    from backend.core.scheduler import AdmissionScheduler
+
+    capacity = 4  # engine slows down linearly beyond this many concurrent generations
+    limiter = AIMDLimit(initial=1, min_limit=1, max_limit=32)
+    sched = AdmissionScheduler(32, 1000, {INTERACTIVE: 60, BULK: 60}, limiter=limiter)
+    engine = [0]
+    seen_limits: list[int] = []
+
+    async def generation() -> None:
+        async with sched.slot() as held:
+            engine[0] += 1
+            try:
+                await asyncio.sleep(0.004 * max(1.0, engine[0] / capacity))
+                for _ in range(6):
+                    held.token()
+                    await asyncio.sleep(0.002 * max(1.0, engine[0] / capacity))
+            finally:
+                engine[0] -= 1
+        seen_limits.append(limiter.current)
+
+    async def caller() -> None:
+        for _ in range(12):
+            await generation()
+
+    async def run() -> None:
+        await asyncio.gather(*[caller() for _ in range(16)])
+
+    asyncio.run(run())
+
+    tail = seen_limits[len(seen_limits) // 2 :]
+    assert 2 <= sum(tail) / len(tail) <= 2 * capacity
+    reasons = {a["reason"] for a in limiter.adjustments}
+    assert {"increase", "latency"} <= reasons
+    assert sched.active == 0 and sum(sched.waiting.values()) == 0
+
+
+def test_upstream_error_cuts_limit() -> None:
+    from backend.core.limiter import AIMDLimit
+
+    limiter = AIMDLimit(initial=10, min_limit=1, max_limit=32, decrease=0.5)
+    limiter.observe(inflight=10, per_token=0.01, ok=False)
+    assert limiter.current == 5
+    assert limiter.adjustments[-1]["reason"] == "error"
+    for _ in range(10):
+        limiter.observe(inflight=1, ok=False)
+    assert limiter.current == 1
@@ -0,0 +1,72 @@
+import asyncio
+import json
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _completion(content: str) -> dict[str, object]:
+    return {
+        "choices": [{"message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+    }
+
+
+def test_lifespan_owns_shared_client(client: TestClient) -> None:
+    from backend.external import llm_client
+
+    with client:
+        shared = llm_client._client
+        assert shared is not None
+        assert llm_client.get_client() is shared
+    assert llm_client._client is None
+
+
+def test_calls_reuse_shared_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.external import llm_client
+    from backend.schemas.chat import LLMRequest
+
+    seen: list[dict[str, object]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(json.loads(request.content))
+        return httpx.Response(200, json=_completion(f"hi {len(seen)}"))
+
+    shared = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_client, "_client", shared)
+
+    req = LLMRequest.model_validate(
+        {"messages": [{"role": "user", "content": "Hi"}], "n": 3}
+    )
+    data = asyncio.run(llm_client.llm_generate_content(req))
+
+    assert llm_client.get_client() is shared
+    assert len(seen) == 3
+    # Non-streaming calls stream internally so the repetition guard can cut them.
+    assert all(p["n"] == 1 and p["stream"] is True for p in seen)
+    assert sorted(c["message"]["content"] for c in data["choices"]) == ["hi 1", "hi 2", "hi 3"]
+
+
+def test_stream_uses_shared_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.external import llm_client
+    from backend.schemas.chat import LLMRequest
+
+    body = (
+        'data: {"choices":[{"delta":{"content":"Hel"}}]}\n\n'
+        'data: {"choices":[{"delta":{"content":"lo"}}]}\n\n'
+        "data: [DONE]\n\n"
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=body)
+
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    req = LLMRequest.model_validate({"messages": [{"role": "user", "content": "Hi"}]})
+
+    async def collect() -> bytes:
+        return b"".join([p async for p in llm_client.llm_generate_content_stream(req)])
+
+    assert asyncio.run(collect()) == b"Hello"
@@ -0,0 +1,60 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _sample(text: str, prefix: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    from backend.core.metrics import Histogram, MetricsRegistry
+
+    registry = MetricsRegistry()
+    hist = registry.register(Histogram("demo_seconds", "Demo.", (0.1, 1.0), ("route",)))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value, "/x")
+    text = registry.render()
+    assert 'demo_seconds_bucket{route="/x",le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{route="/x",le="1.0"} 3' in text
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 4' in text
+    assert 'demo_seconds_count{route="/x"} 4' in text
+    assert "# TYPE demo_seconds histogram" in text
+
+
+def test_metrics_cover_routes_streams_and_usage(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from backend.external import llm_client
+
+    body = (
+        'data: {"choices":[{"delta":{"content":"Hel"}}]}\n\n'
+        'data: {"choices":[{"delta":{"content":"lo"}}]}\n\n'
+        'data: {"choices":[],"usage":{"prompt_tokens":7,"completion_tokens":2}}\n\n'
+        "data: [DONE]\n\n"
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=body)
+
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+
+    before = client.get("/metrics").text
+    res = client.post("/chat/stream", json={"messages": [{"role": "user", "content": "m"}]})
+    assert res.text == "Hello"
+    after = client.get("/metrics")
+    assert after.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    text = after.text
+    route = 'smolchat_http_requests_total{route="/chat/stream",method="POST",status="200"}'
+    assert _sample(text, route) == _sample(before, route) + 1
+    prompt = 'smolchat_usage_tokens_total{kind="prompt"}'
+    assert _sample(text, prompt) == _sample(before, prompt) + 7
+    ttft = "smolchat_upstream_ttft_seconds_count"
+    assert _sample(text, ttft) == _sample(before, ttft) + 1
+    assert "smolchat_upstream_in_flight 0" in text
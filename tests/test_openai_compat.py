@@ -0,0 +1,100 @@
+import json
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+SSE = (
+    b'data: {"id":"c1","choices":[{"index":0,"delta":{"role":"assistant"}}]}\n\n'
+    b'data: {"id":"c1","choices":[{"index":0,"delta":{"content":"Hel"}}]}\n\n'
+    b'data: {"id":"c1","choices":[{"index":0,"delta":{"content":"lo"}}]}\n\n'
+    b'data: {"id":"c1","choices":[{"index":0,"delta":{},"finish_reason":"stop"}]}\n\n'
+    b'data: {"id":"c1","choices":[],"usage":{"prompt_tokens":4,"completion_tokens":2}}\n\n'
+    b"data: [DONE]\n\n"
+)
+
+
+def _upstream(monkeypatch: pytest.MonkeyPatch, handler) -> None:  # noqa: ANN001
+    from backend.external import llm_client
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(llm_client, "_client", httpx.AsyncClient(transport=transport))
+
+
+def test_stream_is_relayed_byte_for_byte(
+    monkeypatch: pytest.MonkeyPatch, client: TestClient
+) -> None:
+    from backend.core import metrics
+
+    seen: list[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.content)
+        return httpx.Response(200, content=SSE, headers={"content-type": "text/event-stream"})
+
+    _upstream(monkeypatch, handler)
+    before = metrics.usage_tokens.value("completion")
+    body = {
+        "model": "ai/other",
+        "messages": [{"role": "user", "content": "Hi"}],
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+    raw = json.dumps(body).encode()
+    with client.stream("POST", "/v1/chat/completions", content=raw) as res:
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("text/event-stream")
+        assert b"".join(res.iter_bytes()) == SSE
+    assert seen == [raw]  # forwarded unchanged
+    assert metrics.usage_tokens.value("completion") == before + 2
+
+
+def test_non_stream_fills_in_model(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    seen: list[dict] = []
+    reply = {"id": "c2", "choices": [{"index": 0, "message": {"content": "hi"}}]}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(json.loads(request.content))
+        return httpx.Response(200, json=reply)
+
+    _upstream(monkeypatch, handler)
+    res = client.post("/v1/chat/completions", json={"messages": [{"role": "user", "content": "Hi"}]})
+    assert res.status_code == 200
+    assert res.json() == reply
+    assert seen[0]["model"] == "ai/test-model:latest"
+
+
+def test_upstream_error_is_relayed(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    error = {"error": {"message": "bad temperature", "type": "invalid_request_error"}}
+    _upstream(monkeypatch, lambda request: httpx.Response(400, json=error))
+
+    body = {"messages": [{"role": "user", "content": "Hi"}], "stream": True}
+    res = client.post("/v1/chat/completions", json=body)
+    assert res.status_code == 400
+    assert res.json() == error
+    assert client.post("/v1/chat/completions", json={"stream": True}).status_code == 422
+
+
+def test_unreachable_upstream_is_502(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    from backend.core.breaker import CircuitBreaker
+    from backend.core.context import BULK, INTERACTIVE
+    from backend.core.retry import RetryPolicy
+    from backend.core.scheduler import AdmissionScheduler
+    from backend.external import llm_client
+    from backend.external.balancer import Balancer
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("connection refused", request=request)
+
+    _upstream(monkeypatch, handler)
+    # Keep the failure from cutting the shared limiter or ejecting the endpoint.
+    scheduler = AdmissionScheduler(4, 8, {INTERACTIVE: 5, BULK: 5})
+    monkeypatch.setattr(llm_client, "scheduler", scheduler)
+    monkeypatch.setattr(llm_client, "balancer", Balancer(["http://upstream"]))
+    monkeypatch.setattr(llm_client, "retry_policy", RetryPolicy(1, 0.001, 0.001))
+    breaker = CircuitBreaker(window=10, min_calls=4, failure_rate=0.5, open_seconds=60.0)
+    monkeypatch.setattr(llm_client, "upstream_breaker", breaker)
+
+    body = {"messages": [{"role": "user", "content": "Hi"}]}
+    res = client.post("/v1/chat/completions", json=body)
+    assert res.status_code == 502
+    assert res.json()["error"]["type"] == "upstream_error"
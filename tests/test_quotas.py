@@ -0,0 +1,195 @@
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+REPLY = {
+    "id": "c1",
+    "choices": [{"index": 0, "message": {"content": "hi"}}],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+}
+
+
+def _quotas(**quota):  # noqa: ANN202 (test helper)
+    from backend.core.quotas import MemoryBucketStore, Quota, TenantQuotas
+
+    return TenantQuotas(MemoryBucketStore(), Quota(**quota), {}, max_wait=0.0)
+
+
+def _request(content: str = "Hi", max_tokens: int = 100):  # noqa: ANN202 (test helper)
+    from backend.schemas.chat import LLMRequest
+
+    return LLMRequest(messages=[{"role": "user", "content": content}], max_tokens=max_tokens)
+
+
+def test_tenant_from_headers_never_exposes_raw_keys() -> None:
+    from backend.core.quotas import tenant_from_headers
+
+    keys = {"sk-team": "team-a"}
+    assert tenant_from_headers({}, None, keys) == "anonymous"
+    assert tenant_from_headers({b"authorization": b"Bearer sk-team"}, None, keys) == "team-a"
+    hashed = tenant_from_headers({b"x-api-key": b"sk-secret"}, None, keys)
+    assert hashed.startswith("key-") and "secret" not in hashed
+    # The tenant header is only trusted when configured.
+    headers = {b"x-tenant": b"acme", b"x-api-key": b"sk-team"}
+    assert tenant_from_headers(headers, None, keys) == "team-a"
+    assert tenant_from_headers(headers, "X-Tenant", keys) == "acme"
+
+
+def test_tokens_are_reserved_then_refunded() -> None:
+    from backend.core.context import RequestContext, bind_context
+    from backend.core.quotas import estimate_tokens
+    from backend.core.scheduler import Overloaded
+
+    quotas = _quotas(tokens_per_minute=300)
+    req = _request(max_tokens=100)  # estimated at 104 tokens
+
+    async def run() -> None:
+        with bind_context(RequestContext(tenant="acme")):
+            async with quotas.reserve(estimate_tokens(req)) as reservation:
+                assert reservation.estimated == 104
+                reservation.used = 20
+            async with quotas.reserve(estimate_tokens(req)):
+                pass  # no usage reported: the estimate stands
+            async with quotas.reserve(estimate_tokens(req)):
+                pass
+            with pytest.raises(Overloaded) as excinfo:
+                await quotas.admit(estimate_tokens(req))
+            assert excinfo.value.status_code == 429
+            assert excinfo.value.retry_after > 0
+
+    asyncio.run(run())
+    stats = quotas.stats()["acme"]
+    assert stats["requests"] == 3
+    assert stats["rejected"] == 1
+    assert stats["tokens_used"] == 20 + 104 + 104
+
+
+def test_sqlite_buckets_are_drawn_off_the_event_loop(tmp_path) -> None:  # noqa: ANN001
+    import threading
+    from backend.core.context import RequestContext, bind_context
+    from backend.core.quotas import Quota, SqliteBucketStore, TenantQuotas
+
+    class Store(SqliteBucketStore):
+        def take(self, *args):  # noqa: ANN002, ANN202 (test spy)
+            threads.add(threading.get_ident())
+            return super().take(*args)
+
+    threads: set[int] = set()
+    store = Store(str(tmp_path / "quotas.sqlite3"))
+    quotas = TenantQuotas(store, Quota(tokens_per_minute=300), {}, max_wait=0.0)
+
+    async def run() -> None:
+        with bind_context(RequestContext(tenant="acme")):
+            async with quotas.reserve(104) as reservation:
+                reservation.used = 4
+
+    asyncio.run(run())
+    assert threads and threading.get_ident() not in threads
+    assert 296 <= quotas.stats()["acme"]["available"]["tokens"] < 297  # settled from usage
+
+
+def test_over_quota_tenant_gets_429_with_retry_after(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from backend.external import llm_client
+
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=REPLY))
+    monkeypatch.setattr(llm_client, "_client", httpx.AsyncClient(transport=transport))
+    monkeypatch.setattr(llm_client, "tenant_quotas", _quotas(requests_per_minute=1))
+
+    def chat(key: str, content: str) -> httpx.Response:
+        body = {"messages": [{"role": "user", "content": content}]}
+        return client.post("/chat", json=body, headers={"X-API-Key": key})
+
+    assert chat("sk-one", "first").status_code == 200
+    r = chat("sk-one", "second")
+    assert r.status_code == 429
+    assert float(r.headers["Retry-After"]) > 0
+    # Another tenant's bucket is untouched.
+    assert chat("sk-two", "third").status_code == 200
+
+
+def test_fair_queuing_serves_a_light_tenant_before_a_heavy_backlog() -> None:
+    from backend.core.context import INTERACTIVE
+    from backend.core.scheduler import AdmissionScheduler
+
+    scheduler = AdmissionScheduler(1, 16, {INTERACTIVE: 5})
+    order: list[str] = []
+
+    async def generate(tenant: str, weight: float = 1.0) -> None:
+        await scheduler.acquire(INTERACTIVE, 5.0, tenant, weight, cost=100)
+        order.append(tenant)
+        await asyncio.sleep(0)
+        scheduler.release()
+
+    async def run() -> None:
+        await scheduler.acquire(INTERACTIVE, 5.0)  # hold the only slot
+        heavy = [asyncio.create_task(generate("heavy")) for _ in range(4)]
+        await asyncio.sleep(0)
+        light = asyncio.create_task(generate("light"))
+        await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*heavy, light)
+
+    asyncio.run(run())
+    # Arrival order would put "light" last; its first finish tag ties heavy's first.
+    assert order.index("light") <= 1
+    assert order.count("heavy") == 4
+
+
+def test_openai_route_is_charged_to_the_tenant(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from backend.core.context import BULK
+    from backend.core.quotas import Quota
+    from backend.external import llm_client
+
+    sse = (
+        b'data: {"choices":[{"index":0,"delta":{"content":"hi"}}]}\n\n'
+        b'data: {"choices":[],"usage":{"prompt_tokens":10,"completion_tokens":5,'
+        b'"total_tokens":15}}\n\n'
+        b"data: [DONE]\n\n"
+    )
+    priorities: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        priorities.append(llm_client.current_context().priority)
+        if b'"stream":true' in request.content.replace(b" ", b""):
+            return httpx.Response(200, content=sse, headers={"content-type": "text/event-stream"})
+        return httpx.Response(200, json=REPLY)
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(llm_client, "_client", httpx.AsyncClient(transport=transport))
+    quotas = _quotas(requests_per_minute=2)
+    quotas.overrides["batch"] = Quota(requests_per_minute=2, bulk=True)
+    monkeypatch.setattr(llm_client, "tenant_quotas", quotas)
+    monkeypatch.setattr(llm_client.settings, "TENANT_API_KEYS", {"sk-batch": "batch"})
+
+    def complete(stream: bool, key: str = "sk-one") -> httpx.Response:
+        body = {"messages": [{"role": "user", "content": "Hi"}], "stream": stream}
+        return client.post("/v1/chat/completions", json=body, headers={"X-API-Key": key})
+
+    assert complete(False).status_code == 200
+    assert complete(True).status_code == 200
+    r = complete(False)
+    assert r.status_code == 429 and "Retry-After" in r.headers
+    tenant = next(t for t in quotas.stats() if t.startswith("key-"))
+    assert quotas.stats()[tenant]["tokens_used"] == 15 + 15  # settled from usage, both ways
+
+    assert complete(False, "sk-batch").status_code == 200
+    assert priorities[-1] == BULK
+
+
+def test_estimate_body_tokens() -> None:
+    from backend.core.quotas import estimate_body_tokens
+
+    doc = {
+        "messages": [
+            {"role": "system", "content": "x" * 40},
+            {"role": "user", "content": [{"type": "text", "text": "y" * 20}, {"type": "image"}]},
+        ],
+        "max_tokens": 64,
+    }
+    assert estimate_body_tokens(doc) == (14 + 9, 64)
+    assert estimate_body_tokens({"messages": []})[1] == 512  # LLMRequest's default
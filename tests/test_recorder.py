@@ -0,0 +1,59 @@
+import time
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+def test_server_timing_and_debug_requests(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    from backend.external import llm_client
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, json={"choices": [{"message": {"role": "assistant", "content": "hey"}}]}
+        )
+
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    res = client.post("/chat", json={"messages": [{"role": "user", "content": "timing"}]})
+    assert res.status_code == 200
+    timing = res.headers["server-timing"]
+    for phase in ("queue;dur=", "connect;dur=", "generate;dur=", "app;dur="):
+        assert phase in timing
+
+    entry = client.get("/debug/requests", params={"limit": 5}).json()["recent"][0]
+    assert entry["route"] == "/chat" and entry["status"] == 200
+    assert {"queue", "connect", "generate"} <= entry["phases_ms"].keys()
+
+
+def test_recorder_keeps_slowest() -> None:
+    from backend.core.recorder import FlightRecorder
+
+    recorder = FlightRecorder(capacity=3, slowest=2)
+    for ms in (5.0, 50.0, 1.0, 20.0, 2.0):
+        recorder.record({"duration_ms": ms})
+    snap = recorder.snapshot()
+    assert [e["duration_ms"] for e in snap["recent"]] == [2.0, 20.0, 1.0]
+    assert [e["duration_ms"] for e in snap["slowest"]] == [50.0, 20.0]
+    assert snap["recorded"] == 5
+
+
+def test_sampling_profiler_sees_busy_frames() -> None:
+    from backend.core.recorder import SamplingProfiler
+
+    def spin_for_profile(seconds: float) -> None:
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            pass
+
+    profiler = SamplingProfiler(interval=0.001, window=5)
+    profiler.start()
+    try:
+        start = time.monotonic()
+        spin_for_profile(0.1)
+        stacks = profiler.profile(start, time.monotonic())
+    finally:
+        profiler.stop()
+    assert stacks and "spin_for_profile" in stacks[0]["stack"]
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import httpx
+import pytest
+
+
+def test_guard_trips_on_looping_suffix_only() -> None:
+    from backend.core.repetition import RepetitionGuard
+
+    prose = [f"w{i}" for i in range(300)]
+    guard = RepetitionGuard(ngram=4, window=64, max_repeats=3)
+    assert not any(guard.feed(t) for t in prose)
+
+    looping = RepetitionGuard(ngram=4, window=64, max_repeats=3)
+    tokens = ["Here", " is"] + [" the", " same", " phrase", " again", "."] * 10
+    tripped_at = next(i for i, t in enumerate(tokens) if looping.feed(t))
+    # Three occurrences of a 4-gram in a 5-token cycle need 2 + 4 + 2 * 5 tokens.
+    assert tripped_at == 2 + 3 + 2 * 5
+
+
+def test_guard_window_forgets_old_ngrams() -> None:
+    from backend.core.repetition import RepetitionGuard
+
+    guard = RepetitionGuard(ngram=2, window=8, max_repeats=2)
+    tokens = ["a", "b"] + [f"x{i}" for i in range(20)] + ["a", "b"]
+    assert not any(guard.feed(t) for t in tokens)
+
+
+def _sse(pieces: list[str], finish: str = "length") -> str:
+    lines = [f'data: {json.dumps({"id": "c1", "choices": [{"delta": {"content": p}}]})}' for p in pieces]
+    lines.append(f'data: {json.dumps({"choices": [{"delta": {}, "finish_reason": finish}]})}')
+    lines.append("data: [DONE]")
+    return "\n\n".join(lines) + "\n\n"
+
+
+def test_non_stream_call_is_cut_with_repetition_reason(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.core.repetition import repetition_stats
+    from backend.external import llm_client
+    from backend.schemas.chat import LLMRequest
+
+    pieces = ["{", '"a"', ":"] + [" la", " la", " la", " la", " la", " la", " la", " la", " la"] * 40
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=_sse(pieces), headers={"content-type": "text/event-stream"})
+
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    before = repetition_stats.stats()
+    req = LLMRequest.model_validate(
+        {"messages": [{"role": "user", "content": "Sing"}], "max_tokens": 512}
+    )
+    data = asyncio.run(llm_client.llm_generate_content(req))
+
+    choice = data["choices"][0]
+    assert choice["finish_reason"] == "repetition"
+    generated = data["usage"]["completion_tokens"]
+    assert generated < 40
+    after = repetition_stats.stats()
+    assert after["tripped"] == before["tripped"] + 1
+    assert after["tokens_saved"] - before["tokens_saved"] == 512 - generated
+
+
+def test_normal_stream_keeps_upstream_finish_reason(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.external import llm_client
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=_sse(["Hi", " there"], "stop"))
+
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    summary = llm_client.StreamSummary()
+
+    async def collect() -> bytes:
+        return b"".join([p async for p in llm_client._stream({"max_tokens": 8}, None, summary)])
+
+    assert asyncio.run(collect()) == b"Hi there"
+    assert summary.finish_reason == "stop"
+    assert summary.meta == {"id": "c1"}
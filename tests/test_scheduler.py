@@ -0,0 +1,107 @@
+import asyncio
+from typing import Any
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _scheduler(limit: int = 1, queue: int = 8, timeout: float = 5.0) -> Any:
+    from backend.core.context import BULK, INTERACTIVE
+    from backend.core.scheduler import AdmissionScheduler
+
+    return AdmissionScheduler(limit, queue, {INTERACTIVE: timeout, BULK: timeout})
+
+
+def test_interactive_jumps_ahead_of_bulk() -> None:
+    from backend.core.context import BULK, INTERACTIVE
+
+    sched = _scheduler()
+    order: list[str] = []
+
+    async def job(name: str, priority: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        async with sched.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0.02)
+
+    async def run() -> None:
+        await asyncio.gather(
+            job("first", BULK, 0),
+            job("bulk", BULK, 0.005),
+            job("chat", INTERACTIVE, 0.01),
+        )
+
+    asyncio.run(run())
+    assert order == ["first", "chat", "bulk"]
+    assert sched.active == 0
+
+
+def test_full_queue_is_shed_with_429() -> None:
+    from backend.core.scheduler import Overloaded
+
+    sched = _scheduler(limit=1, queue=1)
+
+    async def run() -> Overloaded:
+        await sched.acquire(0, 5.0)  # occupy the only slot
+        waiter = asyncio.ensure_future(sched.acquire(0, 5.0))
+        await asyncio.sleep(0)
+        try:
+            await sched.acquire(0, 5.0)
+        except Overloaded as e:
+            waiter.cancel()
+            return e
+        raise AssertionError("expected Overloaded")
+
+    err = asyncio.run(run())
+    assert err.status_code == 429
+    assert err.retry_after >= 1
+    assert sched.rejected_full == 1
+
+
+def test_queue_deadline_returns_503() -> None:
+    from backend.core.scheduler import Overloaded
+
+    sched = _scheduler(limit=1)
+
+    async def run() -> None:
+        await sched.acquire(0, 5.0)
+        with pytest.raises(Overloaded) as info:
+            await sched.acquire(0, 0.01)
+        assert info.value.status_code == 503
+        sched.release(1.0)
+        # A known 1s service time makes a 0.1s deadline unmeetable up front.
+        await sched.acquire(0, 5.0)
+        with pytest.raises(Overloaded):
+            await sched.acquire(0, 0.1)
+
+    asyncio.run(run())
+    assert sched.rejected_deadline == 2
+    assert sum(sched.waiting.values()) == 0
+
+
+def test_overloaded_maps_to_retry_after(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    import backend.routers.chat as chat_router
+    from backend.core.scheduler import Overloaded
+
+    async def fake_generate(req: Any) -> dict[str, Any]:  # noqa: ANN401 (test helper)
+        raise Overloaded(429, "Upstream queue is full", 2.5)
+
+    monkeypatch.setattr(chat_router, "llm_generate_content", fake_generate)
+
+    res = client.post("/chat", json={"messages": [{"role": "user", "content": "Hi"}]})
+    assert res.status_code == 429
+    assert res.headers["Retry-After"] == "3"
+
+
+def test_stream_is_shed_before_headers(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    import backend.routers.chat as chat_router
+    from backend.core.scheduler import Overloaded
+
+    async def fake_stream(req: Any) -> Any:  # noqa: ANN401 (test helper)
+        raise Overloaded(503, "Timed out waiting for an upstream slot", 1)
+        yield b""  # pragma: no cover
+
+    monkeypatch.setattr(chat_router, "llm_generate_content_stream", fake_stream)
+
+    res = client.post("/chat/stream", json={"messages": [{"role": "user", "content": "Hi"}]})
+    assert res.status_code == 503
+    assert "Retry-After" in res.headers
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import httpx
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+def _completion(content: str) -> dict[str, object]:
+    return {
+        "choices": [{"message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+    }
+
+
+def _unit(*values: float) -> "np.ndarray":
+    v = np.asarray(values, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_lookup_is_scoped_and_thresholded() -> None:
+    from backend.core.semantic_cache import HashingEmbedder, SemanticCache
+
+    cache = SemanticCache(HashingEmbedder(), threshold=0.9, max_entries=8, max_bytes=1 << 20)
+    cache.store("recipe", _unit(1, 0, 0), "chili")
+    assert cache.lookup("recipe", _unit(1, 0.1, 0)) == "chili"
+    assert cache.lookup("recipe", _unit(0, 1, 0)) is None
+    assert cache.lookup("other", _unit(1, 0, 0)) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_evicts_least_recently_used() -> None:
+    from backend.core.semantic_cache import HashingEmbedder, SemanticCache
+
+    cache = SemanticCache(HashingEmbedder(), threshold=0.99, max_entries=2, max_bytes=1 << 20)
+    cache.store("s", _unit(1, 0, 0), "a")
+    cache.store("s", _unit(0, 1, 0), "b")
+    assert cache.lookup("s", _unit(1, 0, 0)) == "a"  # b is now least recently used
+    cache.store("s", _unit(0, 0, 1), "c")
+    assert cache.lookup("s", _unit(0, 1, 0)) is None
+    assert cache.lookup("s", _unit(1, 0, 0)) == "a"
+    assert cache.stats()["entries"] == 2 and cache.stats()["evictions"] == 1
+
+
+def test_scopes_are_dropped_with_their_last_entry() -> None:
+    from backend.core.semantic_cache import HashingEmbedder, SemanticCache
+
+    cache = SemanticCache(HashingEmbedder(), threshold=0.99, max_entries=2, max_bytes=1 << 20)
+    for i in range(50):
+        cache.store(f"conversation-{i}", _unit(1, 0, 0), i)
+    assert cache.stats()["scopes"] == 2
+    assert cache.lookup("conversation-49", _unit(1, 0, 0)) == 49
+    assert cache.lookup("conversation-0", _unit(1, 0, 0)) is None
+
+
+def test_zero_max_entries_turns_the_cache_off() -> None:
+    from backend.core.semantic_cache import HashingEmbedder, SemanticCache
+
+    cache = SemanticCache(HashingEmbedder(), threshold=0.9, max_entries=0, max_bytes=1 << 20)
+    assert not cache.enabled
+    cache.store("s", _unit(1, 0, 0), "a")
+    assert cache.lookup("s", _unit(1, 0, 0)) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_paraphrase_is_served_from_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.core.semantic_cache import HashingEmbedder, SemanticCache
+    from backend.external import llm_client
+    from backend.schemas.chat import LLMRequest
+
+    seen: list[dict[str, object]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(json.loads(request.content))
+        return httpx.Response(200, json=_completion(f"answer {len(seen)}"))
+
+    cache = SemanticCache(HashingEmbedder(), threshold=0.9, max_entries=8, max_bytes=1 << 20)
+    monkeypatch.setattr(llm_client, "semantic_cache", cache)
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+
+    def ask(text: str, system: str = "Be brief.") -> dict:
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": text}]
+        req = LLMRequest.model_validate({"messages": messages})
+        return asyncio.run(llm_client.llm_generate_content(req))
+
+    first = ask("chili recipe Texas style")
+    assert ask("Texas-style chili recipe") == first
+    assert len(seen) == 1
+    ask("Texas-style chili recipe", system="Be verbose.")  # different scope
+    assert len(seen) == 2
+
+
+def test_embedding_failure_bypasses_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.core.semantic_cache import SemanticCache
+    from backend.external import llm_client
+    from backend.schemas.chat import LLMRequest
+
+    async def broken(texts: list[str]) -> list[list[float]]:
+        raise httpx.ConnectError("no embeddings endpoint")
+
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=_completion("fresh"))
+
+    cache = SemanticCache(broken, threshold=0.9, max_entries=8, max_bytes=1 << 20)
+    monkeypatch.setattr(llm_client, "semantic_cache", cache)
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    req = LLMRequest.model_validate({"messages": [{"role": "user", "content": "Hi"}]})
+    for _ in range(2):
+        data = asyncio.run(llm_client.llm_generate_content(req))
+        assert data["choices"][0]["message"]["content"] == "fresh"
+    assert len(calls) == 2
+    assert cache.stats()["errors"] == 2 and cache.stats()["entries"] == 0
+
+
+def test_structured_requests_skip_the_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.core.semantic_cache import HashingEmbedder, SemanticCache
+    from backend.external import llm_client
+    from backend.schemas.chat import LLMRequest
+
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=_completion("not json"))
+
+    cache = SemanticCache(HashingEmbedder(), threshold=0.9, max_entries=8, max_bytes=1 << 20)
+    monkeypatch.setattr(llm_client, "semantic_cache", cache)
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    req = LLMRequest.model_validate(
+        {"messages": [{"role": "user", "content": "Hi"}], "response_schema": {"type": "object"}}
+    )
+    for _ in range(2):
+        asyncio.run(llm_client.llm_generate_content(req))
+    # Unvalidated output is never stored, so the retry reaches the model again.
+    assert len(calls) == 2
+    assert cache.stats()["entries"] == 0
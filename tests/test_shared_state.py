@@ -0,0 +1,54 @@
+from pathlib import Path
+import pytest
+
+
+def _registry():  # noqa: ANN202 (test helper)
+    from backend.core.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+    registry = MetricsRegistry()
+    requests = registry.register(Counter("t_requests_total", "Requests.", ("route",)))
+    inflight = registry.register(Gauge("t_in_flight", "In flight."))
+    latency = registry.register(Histogram("t_latency_seconds", "Latency.", (0.1, 1.0)))
+    return registry, requests, inflight, latency
+
+
+def test_render_sums_worker_snapshots() -> None:
+    registry, requests, inflight, latency = _registry()
+    requests.inc("/chat", amount=3)
+    inflight.set(2)
+    latency.observe(0.05)
+    live = registry.snapshot()
+    requests.inc("/chat", amount=2)
+    latency.observe(0.5)
+    retired = registry.snapshot()
+
+    text = registry.render([live], [retired])
+    assert 't_requests_total{route="/chat"} 8' in text
+    assert "t_in_flight 2" in text  # the retired worker's gauge no longer counts
+    assert 't_latency_seconds_bucket{le="0.1"} 2' in text
+    assert "t_latency_seconds_count 3" in text
+
+
+def test_shared_state_merges_workers(tmp_path: Path) -> None:
+    from backend.core.shared_state import SharedState
+
+    registry, requests, _, _ = _registry()
+    first = SharedState(tmp_path / "shared.sqlite3", publish_interval=1.0)
+    second = SharedState(tmp_path / "shared.sqlite3", publish_interval=1.0)
+    requests.inc("/chat")
+    first.publish(registry)
+    requests.inc("/chat")
+    second.publish(registry, retire=True)
+
+    # Rendering republishes this worker's current values: 2 here plus 2 retired.
+    assert 't_requests_total{route="/chat"} 4' in first.render_metrics(registry)
+    assert first.workers() == 1
+
+
+def test_scheduler_caps_are_split_between_workers(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.settings import Settings
+
+    monkeypatch.setenv("WORKERS", "4")
+    settings = Settings()  # pyright: ignore[reportCallIssue]
+    assert settings.per_worker(16) == 4
+    assert settings.per_worker(2) == 1
@@ -0,0 +1,70 @@
+import asyncio
+import json
+from typing import AsyncIterator
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+def test_identical_requests_share_one_upstream_call(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.external import llm_client
+    from backend.schemas.chat import LLMRequest
+
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(json.loads(request.content))
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    monkeypatch.setattr(
+        llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    monkeypatch.setattr(llm_client, "upstream_flight", llm_client.SingleFlight())
+
+    messages = [{"role": "user", "content": "Extract"}]
+    seeded = LLMRequest.model_validate({"messages": messages, "seed": 1})
+    sampled = LLMRequest.model_validate({"messages": messages})
+
+    async def burst() -> list[dict[str, object]]:
+        return await asyncio.gather(
+            *[llm_client.llm_generate_content(seeded) for _ in range(5)],
+            llm_client.llm_generate_content(sampled),
+        )
+
+    results = asyncio.run(burst())
+    assert len(results) == 6
+    assert len(calls) == 2  # one shared seeded call + the unseeded one
+    assert llm_client.upstream_flight.stats() == {"leaders": 1, "coalesced": 4, "inflight": 0}
+
+
+def test_stream_broadcast_replays_prefix_to_late_joiner() -> None:
+    from backend.core.singleflight import StreamBroadcast
+
+    broadcast = StreamBroadcast()
+    started = []
+
+    async def source() -> AsyncIterator[bytes]:
+        started.append(True)
+        for piece in (b"a", b"b", b"c", b"d"):
+            yield piece
+            await asyncio.sleep(0.01)
+
+    async def read(delay: float) -> bytes:
+        await asyncio.sleep(delay)
+        return b"".join([p async for p in broadcast.subscribe("k", source)])
+
+    async def run() -> list[bytes]:
+        return await asyncio.gather(read(0), read(0.025))
+
+    assert asyncio.run(run()) == [b"abcd", b"abcd"]
+    assert len(started) == 1
+    assert broadcast.stats()["coalesced"] == 1
+
+
+def test_debug_stats_exposes_coalescing(client: TestClient) -> None:
+    res = client.get("/debug/stats")
+    assert res.status_code == 200
+    data = res.json()
+    assert {"leaders", "coalesced", "inflight"} <= set(data["singleflight"])
+    assert "hits" in data["cache"]
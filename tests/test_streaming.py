@@ -0,0 +1,45 @@
+import asyncio
+from typing import AsyncGenerator
+
+
+async def _source(chunks: list[bytes], gap: float = 0.0) -> AsyncGenerator[bytes, None]:
+    for chunk in chunks:
+        if gap:
+            await asyncio.sleep(gap)
+        yield chunk
+
+
+def test_coalesce_merges_by_size_and_sends_first_chunk_alone() -> None:
+    from backend.core.streaming import coalesce
+
+    async def run() -> list[bytes]:
+        return [c async for c in coalesce(_source([b"ab"] * 10), 10.0, 6)]
+
+    out = asyncio.run(run())
+    assert out[0] == b"ab"
+    assert out[1:] == [b"ababab", b"ababab", b"ababab"]
+
+
+def test_coalesce_flushes_on_time_when_source_goes_quiet() -> None:
+    from backend.core.streaming import coalesce
+
+    async def slow() -> AsyncGenerator[bytes, None]:
+        yield b"a"
+        yield b"b"
+        yield b"c"
+        await asyncio.sleep(0.2)
+        yield b"d"
+
+    async def run() -> list[bytes]:
+        return [c async for c in coalesce(slow(), 0.02, 1024)]
+
+    assert asyncio.run(run()) == [b"a", b"bc", b"d"]
+
+
+def test_coalesce_disabled_passes_chunks_through() -> None:
+    from backend.core.streaming import coalesce
+
+    async def run() -> list[bytes]:
+        return [c async for c in coalesce(_source([b"a", b"b"]), 0, 256)]
+
+    assert asyncio.run(run()) == [b"a", b"b"]
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, AsyncGenerator
 import json
 import pytest
 from fastapi.testclient import TestClient
@@ -56,3 +56,129 @@ def test_structured_unknown_type(client: TestClient) -> None:
     res = client.post("/structured", json=req)
     assert res.status_code == 400
     assert res.json()["detail"] == "Unknown response_type"
+
+
+def _ndjson(res: Any) -> list[dict[str, Any]]:
+    return [json.loads(line) for line in res.iter_lines() if line]
+
+
+def test_structured_stream_emits_partials(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    import backend.routers.structured as structured_router
+
+    pieces = ['{"recipe_name": "Chi', 'li", "ingredients": ["beans"', ', "beef"', "]}"]
+
+    async def fake_stream(req: Any) -> AsyncGenerator[bytes, None]:  # noqa: ANN401
+        for piece in pieces:
+            yield piece.encode()
+
+    monkeypatch.setattr(structured_router, "llm_generate_content_stream", fake_stream)
+
+    req = {"messages": [{"role": "user", "content": "Chili"}], "response_type": "recipe"}
+    with client.stream("POST", "/structured/stream", json=req) as res:
+        assert res.status_code == 200
+        events = _ndjson(res)
+
+    partials = [e["partial"] for e in events if "partial" in e]
+    assert {"recipe_name": "Chili", "ingredients": ["beans"]} in partials
+    assert events[-1] == {"object": {"recipe_name": "Chili", "ingredients": ["beans", "beef"]}}
+
+
+def test_structured_stream_aborts_unrecoverable_output(
+    monkeypatch: pytest.MonkeyPatch, client: TestClient
+) -> None:
+    import backend.routers.structured as structured_router
+
+    pulled: list[str] = []
+    closed: list[bool] = []
+
+    async def fake_stream(req: Any) -> AsyncGenerator[bytes, None]:  # noqa: ANN401
+        try:
+            for piece in ['{"event_name": "Party", "participants": "Joe', '"}'] + ["x"] * 100:
+                pulled.append(piece)
+                yield piece.encode()
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(structured_router, "llm_generate_content_stream", fake_stream)
+
+    req = {"messages": [{"role": "user", "content": "Party"}], "response_type": "event"}
+    with client.stream("POST", "/structured/stream", json=req) as res:
+        events = _ndjson(res)
+
+    # "participants" must be a list, so the string value is rejected mid-stream.
+    assert events[-1]["aborted"] is True
+    assert "participants" in events[-1]["error"]
+    assert len(pulled) <= 2 and closed == [True]
+    assert structured_router.STREAM_STATS["aborted_schema"] >= 1
+
+
+def test_structured_repairs_locally(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    import backend.routers.structured as structured_router
+
+    calls: list[Any] = []
+    contents = [
+        '```json\n{"recipe_name": "Soup", "ingredients": ["water"]}\n```',
+        '{"recipe_name": "Stew", "ingredients": ["beef", "carrot"',
+    ]
+
+    async def fake_generate(req: Any) -> dict[str, Any]:  # noqa: ANN401
+        calls.append(req)
+        return {"choices": [{"message": {"content": c}} for c in contents]}
+
+    monkeypatch.setattr(structured_router, "llm_generate_content", fake_generate)
+
+    req = {"messages": [{"role": "user", "content": "Soup"}], "response_type": "recipe", "n": 2}
+    res = client.post("/structured", json=req)
+    assert res.status_code == 200
+    assert [r["recipe_name"] for r in res.json()] == ["Soup", "Stew"]
+    assert res.headers["X-Structured-Provenance"] == "repaired,repaired"
+    assert len(calls) == 1  # no regeneration needed
+
+
+def test_structured_regenerates_only_failed(
+    monkeypatch: pytest.MonkeyPatch, client: TestClient
+) -> None:
+    import backend.routers.structured as structured_router
+
+    calls: list[Any] = []
+    good = json.dumps({"recipe_name": "Pie", "ingredients": ["apple"]})
+
+    async def fake_generate(req: Any) -> dict[str, Any]:  # noqa: ANN401
+        calls.append(req)
+        if len(calls) == 1:
+            contents = [good, "I cannot help with that."]
+        else:
+            contents = [json.dumps({"recipe_name": "Tart", "ingredients": ["pear"]})]
+        return {"choices": [{"message": {"content": c}} for c in contents]}
+
+    monkeypatch.setattr(structured_router, "llm_generate_content", fake_generate)
+
+    req = {"messages": [{"role": "user", "content": "Pie"}], "response_type": "recipe", "n": 2}
+    res = client.post("/structured", json=req)
+    assert [r["recipe_name"] for r in res.json()] == ["Pie", "Tart"]
+    assert res.headers["X-Structured-Provenance"] == "parsed,regenerated"
+    assert len(calls) == 2
+    assert calls[1].n == 1
+    assert calls[1].frequency_penalty > calls[0].frequency_penalty
+
+
+def test_registry_reuses_compiled_task(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.external.llm_client import build_payload
+    from backend.routers.structured import RESPONSE_TYPES, _prepare
+    from backend.schemas.chat import LLMRequest
+    from backend.schemas.structured import Recipe
+
+    def no_schema_rebuild(*args: Any, **kwargs: Any) -> None:
+        raise AssertionError("schema should be compiled once, at registration")
+
+    monkeypatch.setattr(Recipe, "model_json_schema", no_schema_rebuild)
+    req = LLMRequest.model_validate(
+        {"messages": [{"role": "user", "content": "Soup"}], "response_type": "recipe"}
+    )
+    task, clean = _prepare(req)
+    assert task is RESPONSE_TYPES.get("recipe")
+    assert clean.messages[0] is task.system_message
+    payload = build_payload(clean)
+    assert payload["messages"][1] == {"role": "user", "content": "Soup"}
+    assert payload["response_format"]["json_schema"]["schema"] is task.schema
+    assert task.validate_json('{"recipe_name": "S", "ingredients": []}').recipe_name == "S"
@@ -0,0 +1,148 @@
+from typing import Any
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+BOOK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string", "minLength": 1},
+        "year": {"type": "integer"},
+        "genre": {"enum": ["fiction", "nonfiction"]},
+        "first-line": {"type": "string"},
+    },
+    "required": ["title", "genre"],
+}
+
+
+@pytest.fixture()
+def open_registration(monkeypatch: pytest.MonkeyPatch) -> None:
+    from backend.settings import settings
+
+    monkeypatch.setattr(settings, "STRUCTURED_TYPES_OPEN", True)
+
+
+@pytest.mark.usefixtures("open_registration")
+def test_register_and_use_custom_type(monkeypatch: pytest.MonkeyPatch, client: TestClient) -> None:
+    import backend.routers.structured as structured_router
+
+    res = client.post(
+        "/structured/types",
+        json={"name": "book", "json_schema": BOOK_SCHEMA, "prompt": "Describe the book."},
+    )
+    assert res.status_code == 201
+    assert res.json()["fields"] == ["title", "year", "genre", "first-line"]
+    assert "book" in client.get("/structured/types").json()
+
+    sent: list[Any] = []
+    book = {"title": "Dune", "genre": "fiction", "first-line": "In the week..."}
+
+    async def fake_generate(req: Any) -> dict[str, Any]:  # noqa: ANN401
+        sent.append(req)
+        return {"choices": [{"message": {"content": json.dumps(book)}}]}
+
+    monkeypatch.setattr(structured_router, "llm_generate_content", fake_generate)
+
+    req = {"messages": [{"role": "user", "content": "Dune"}], "response_type": "book"}
+    res = client.post("/structured", json=req)
+    assert res.status_code == 200
+    assert res.json() == [{**book, "year": None}]
+    # The caller's schema is forwarded as-is, not a regenerated one.
+    assert sent[0].response_schema == BOOK_SCHEMA
+    assert "Describe the book." in sent[0].messages[0].content
+
+
+@pytest.mark.usefixtures("open_registration")
+def test_rejects_builtin_and_unsupported_schemas(client: TestClient) -> None:
+    res = client.post(
+        "/structured/types",
+        json={"name": "recipe", "json_schema": BOOK_SCHEMA, "prompt": "x"},
+    )
+    assert res.status_code == 409
+
+    bad = {"type": "object", "properties": {"x": {"$ref": "#/defs/x"}}}
+    res = client.post("/structured/types", json={"name": "bad", "json_schema": bad, "prompt": "x"})
+    assert res.status_code == 422
+    assert res.json()["detail"].startswith("Unsupported schema")
+
+
+@pytest.mark.usefixtures("open_registration")
+def test_registered_types_persist_across_workers(
+    monkeypatch: pytest.MonkeyPatch, client: TestClient, tmp_path: Any
+) -> None:
+    import backend.routers.structured as structured_router
+    from backend.core.tasks import TaskStore
+
+    store = TaskStore(str(tmp_path / "types.sqlite3"))
+    monkeypatch.setattr(structured_router, "type_store", store)
+    res = client.post(
+        "/structured/types",
+        json={"name": "novel", "json_schema": BOOK_SCHEMA, "prompt": "Describe the novel."},
+    )
+    assert res.status_code == 201
+
+    # A fresh worker starts with only the built-ins and loads the rest from the store.
+    structured_router.RESPONSE_TYPES._tasks.pop("novel")
+    assert structured_router.load_registered_types() == 1
+    task = structured_router.RESPONSE_TYPES.get("novel")
+    assert task is not None and task.custom
+    assert task.validate_json('{"title": "Emma", "genre": "fiction"}').title == "Emma"
+
+
+def test_compiler_caches_by_schema_hash() -> None:
+    from backend.core.schema_compiler import SchemaCompiler
+
+    compiler = SchemaCompiler(max_entries=2)
+    schemas = [
+        {"type": "object", "properties": {f"f{i}": {"type": "string"}}} for i in range(3)
+    ]
+    first_hash, first = compiler.compile(schemas[0], "a")
+    assert compiler.compile(dict(reversed(list(schemas[0].items()))), "b") == (first_hash, first)
+    compiler.compile(schemas[1], "c")
+    compiler.compile(schemas[2], "d")
+    assert compiler.stats() == {"entries": 2, "hits": 1, "misses": 3, "evictions": 1}
+
+
+def test_custom_types_are_bounded() -> None:
+    from pydantic import BaseModel
+    from backend.core.tasks import TaskRegistry
+
+    class Item(BaseModel):
+        name: str
+
+    registry = TaskRegistry("sys", max_custom=2)
+    registry.register("builtin", Item, "x")
+    for name in ("a", "b"):
+        registry.register(name, Item, "x", custom=True)
+    assert registry.get("a") is not None  # "b" is now the least recently used
+    registry.register("c", Item, "x", custom=True)
+    assert list(registry) == ["builtin", "a", "c"]
+    assert registry.stats() == {"custom": 2, "evictions": 1}
+
+
+def test_registration_requires_the_admin_key(
+    monkeypatch: pytest.MonkeyPatch, client: TestClient
+) -> None:
+    from backend.settings import settings
+
+    body = {"name": "book", "json_schema": BOOK_SCHEMA, "prompt": "Describe the book."}
+    assert client.post("/structured/types", json=body).status_code == 403  # closed by default
+
+    monkeypatch.setattr(settings, "STRUCTURED_TYPES_ADMIN_KEY", "s3cret")
+    assert client.post("/structured/types", json=body).status_code == 401
+    res = client.post("/structured/types", json=body, headers={"X-Admin-Key": "wrong"})
+    assert res.status_code == 401
+    res = client.post("/structured/types", json=body, headers={"X-Admin-Key": "s3cret"})
+    assert res.status_code == 201
+
+
+def test_metric_labels_overflow_to_other(monkeypatch: pytest.MonkeyPatch) -> None:
+    import backend.routers.structured as structured_router
+
+    monkeypatch.setattr(structured_router, "MAX_LABELLED_TYPES", 1)
+    monkeypatch.setattr(structured_router, "_labelled_types", set())
+    _, t1 = structured_router.register_type("t1", BOOK_SCHEMA, "x")
+    _, t2 = structured_router.register_type("t2", BOOK_SCHEMA, "x")
+    assert structured_router.type_label(t1) == "t1"
+    assert structured_router.type_label(t2) == "other"
+    assert structured_router.type_label(structured_router.RESPONSE_TYPES.get("recipe")) == "recipe"
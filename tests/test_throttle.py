@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+import pytest
+
+
+@pytest.fixture()
+def throttled_text():  # noqa: ANN201 (fixture)
+    # The Streamlit pages import their siblings by module name.
+    frontend = str(Path(__file__).resolve().parents[1] / "frontend")
+    if frontend not in sys.path:
+        sys.path.insert(0, frontend)
+    from throttle import ThrottledText
+
+    return ThrottledText
+
+
+def test_redraws_at_most_once_per_period(throttled_text) -> None:  # noqa: ANN001
+    frames: list[str] = []
+    now = [0.0]
+    live = throttled_text(frames.append, max_fps=10, clock=lambda: now[0])
+
+    for i in range(10):  # ten pieces within one 0.1s period
+        now[0] = i * 0.01
+        live.feed(str(i))
+    assert frames == ["0"]  # the first piece shows at once
+
+    now[0] = 0.1
+    live.feed("!")
+    assert frames == ["0", "0123456789!"]
+    assert live.renders == 2
+
+
+def test_finish_flushes_only_pending_text(throttled_text) -> None:  # noqa: ANN001
+    frames: list[str] = []
+    now = [0.0]
+    live = throttled_text(frames.append, max_fps=10, clock=lambda: now[0])
+
+    live.feed("Hel")
+    live.feed("lo")
+    assert live.finish() == "Hello"
+    assert frames == ["Hel", "Hello"]
+
+    assert live.finish() == "Hello"  # nothing new: no redraw
+    live.feed("")  # empty pieces are ignored
+    assert live.renders == 2
+
+
+def test_zero_fps_draws_every_piece(throttled_text) -> None:  # noqa: ANN001
+    frames: list[str] = []
+    live = throttled_text(frames.append, max_fps=0, clock=lambda: 0.0)
+    for piece in ("a", "b", "c"):
+        live.feed(piece)
+    assert frames == ["a", "ab", "abc"]
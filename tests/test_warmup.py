@@ -0,0 +1,94 @@
+import asyncio
+import json
+import httpx
+import pytest
+
+
+def _setup(monkeypatch: pytest.MonkeyPatch, handler, **options):  # noqa: ANN001, ANN202
+    from backend.external import llm_client, warmup
+    from backend.external.balancer import Balancer
+    from backend.routers import health
+
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(llm_client, "_client", httpx.AsyncClient(transport=transport))
+    monkeypatch.setattr(warmup, "balancer", Balancer(["http://a", "http://b"]))
+    defaults = dict(timeout=5.0, retry_seconds=0.01, keep_warm_seconds=0)
+    warmer = warmup.Warmer(**{**defaults, **options})
+    monkeypatch.setattr(health, "warmer", warmer)
+    return warmer
+
+
+def test_warmup_loads_model_and_primes_prefixes_before_ready(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    from backend.routers.health import readiness
+
+    seen: list[tuple[str, str | None]] = []
+    release = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        system = body["messages"][0]["content"] if len(body["messages"]) > 1 else None
+        seen.append((request.url.host, system))
+        assert body["max_tokens"] == 1
+        await release.wait()
+        return httpx.Response(200, json={"choices": []})
+
+    warmer = _setup(monkeypatch, handler)
+
+    async def run() -> None:
+        warmer.start(["sys A", "sys B", "sys A"])
+        await asyncio.sleep(0.01)
+        assert readiness()["ready"] is False
+        release.set()
+        while warmer.warming:
+            await asyncio.sleep(0.01)
+        assert readiness()["ready"] is True
+        await warmer.stop()
+
+    asyncio.run(run())
+    for host in ("a", "b"):
+        # Model load first, then each distinct prefix once.
+        assert [s for h, s in seen if h == host] == [None, "sys A", "sys B"]
+
+
+def test_failed_warmup_is_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(1)
+        return httpx.Response(503 if len(calls) <= 2 else 200, json={})
+
+    warmer = _setup(monkeypatch, handler)
+
+    async def run() -> None:
+        warmer.start([])
+        while warmer.warming:
+            await asyncio.sleep(0.01)
+        await warmer.stop()
+
+    asyncio.run(run())
+    assert warmer.attempts == 2  # both endpoints failed once, then both loaded
+
+
+def test_keep_warm_pings_only_when_idle(monkeypatch: pytest.MonkeyPatch) -> None:
+    from types import SimpleNamespace
+    from backend.external import warmup
+
+    scheduler = SimpleNamespace(admitted=0)
+    monkeypatch.setattr(warmup, "scheduler", scheduler)
+    warmer = _setup(monkeypatch, lambda request: httpx.Response(200), keep_warm_seconds=0.02)
+
+    async def run() -> None:
+        warmer.start([])
+        await asyncio.sleep(0.07)
+        idle_pings = warmer.pings
+        assert idle_pings >= 2  # both endpoints, at least once
+        # Traffic during every interval: no pings.
+        for _ in range(6):
+            scheduler.admitted += 1
+            await asyncio.sleep(0.01)
+        assert warmer.pings - idle_pings <= 2  # at most the tick already in progress
+        await warmer.stop()
+
+    asyncio.run(run())